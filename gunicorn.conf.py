@@ -0,0 +1,120 @@
+"""
+Configuration de gunicorn : préchauffage des workers avant le trafic.
+
+L'application est chargée une seule fois dans le processus maître
+(preload_app), qui compile les gabarits, rend un billet PDF fictif et charge
+le catalogue avant de créer les workers : chaque worker, y compris ceux
+recréés après max_requests ou un redémarrage, hérite de cet état déjà chaud.
+Les connexions à la base ne doivent pas être partagées entre processus : le
+maître ferme les siennes (et vide son pool). Un worker n'ouvre les siennes
+d'avance que si elles serviront aux requêtes : connexions Django d'un worker
+synchrone, qui traite les requêtes dans son thread principal, ou pool
+jo_app.pool_mysql, partagé par les threads du worker. Les threads des
+workers gthread et uvicorn ouvrent chacun leurs connexions à la première
+requête.
+"""
+
+import os
+import shutil
+import tempfile
+
+preload_app = True
+
+# Métriques Prometheus : chaque worker écrit ses compteurs dans ce dossier et
+# /metrics les agrège. Le dossier est défini avant le chargement de
+# l'application ; il n'est vidé qu'au démarrage du maître (on_starting), car
+# ce module est relu à chaque rechargement (HUP) alors que les workers en
+# cours écrivent encore dans leurs fichiers.
+DOSSIER_METRIQUES = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "jo_metriques")
+)
+os.makedirs(DOSSIER_METRIQUES, exist_ok=True)
+
+# Profil de service : "wsgi" (workers synchrones) ou "asgi" (workers uvicorn,
+# pour que les vues asynchrones servent de nombreuses connexions par worker).
+if os.environ.get("SERVEUR_PROFIL", "wsgi") == "asgi":
+    wsgi_app = "jo_projet.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+else:
+    wsgi_app = "jo_projet.wsgi:application"
+
+ETAPES_MAITRE = ("gabarits", "billet", "catalogue")
+ETAPES_WORKER = ("connexions",)
+
+
+def _prechauffer(log, etapes):
+    """
+    Exécute les étapes de préchauffage et journalise leur durée.
+    """
+    from jo_app.prechauffage import prechauffer
+
+    for nom, duree_ms, resultat, erreur in prechauffer(etapes):
+        if erreur:
+            log.warning(f"Préchauffage {nom} en échec ({duree_ms:.1f} ms) : {erreur}")
+        else:
+            log.info(f"Préchauffage {nom} : {resultat} ({duree_ms:.1f} ms)")
+
+
+def on_starting(server):
+    """
+    Vide le dossier des métriques laissé par une exécution précédente.
+    """
+    shutil.rmtree(DOSSIER_METRIQUES, ignore_errors=True)
+    os.makedirs(DOSSIER_METRIQUES)
+
+
+def when_ready(server):
+    """
+    Préchauffe le processus maître avant la création des workers.
+    """
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+
+    from jo_app.pool_mysql.pool import fermer_pools
+
+    _prechauffer(server.log, ETAPES_MAITRE)
+    connections.close_all()
+    fermer_pools()
+
+
+def _etapes_worker(worker):
+    """
+    Retourne les étapes de préchauffage utiles au worker : ses connexions ne
+    sont ouvertes d'avance que s'il traite les requêtes dans son thread
+    principal, ou si elles sont rendues au pool partagé par ses threads.
+    """
+    from django.conf import settings
+    from gunicorn.workers.sync import SyncWorker
+
+    pool = any(
+        base["ENGINE"] == "jo_app.pool_mysql" for base in settings.DATABASES.values()
+    )
+    return ETAPES_WORKER if pool or isinstance(worker, SyncWorker) else ()
+
+
+def post_fork(server, worker):
+    """
+    Ouvre les connexions du worker avant qu'il n'accepte des requêtes.
+    """
+    if server.cfg.preload_app:
+        _prechauffer(worker.log, _etapes_worker(worker))
+
+
+def post_worker_init(worker):
+    """
+    Sans preload_app, chaque worker se préchauffe entièrement après le
+    chargement de l'application.
+    """
+    if not worker.cfg.preload_app:
+        _prechauffer(worker.log, ETAPES_MAITRE + _etapes_worker(worker))
+
+
+def child_exit(server, worker):
+    """
+    Retire les fichiers de jauges du worker terminé ; ses compteurs restent
+    agrégés.
+    """
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,303 @@
+"""
+Ce module gère les achats groupés des partenaires (hospitalités), qui
+achètent des milliers de places en une seule requête.
+
+La soumission est validée en mémoire contre le catalogue, puis la commande,
+ses tickets (un par ligne, avec le titulaire) et ses paiements sont
+enregistrés en une transaction : les places sont acquises au partenaire dès
+la réponse. Les billets sont ensuite émis par lots de ACHATS_GROUPES_LOT,
+chacun dans sa transaction avec l'avancement de l'achat, ce qui permet de
+suivre la progression et de reprendre un traitement interrompu. Les QR codes
+ne sont pas générés à l'émission : ils le sont au premier téléchargement du
+billet, ou en avance avec la commande generer_qr_codes.
+
+Par défaut (ACHATS_GROUPES_EXECUTION = "commande"), les billets sont émis
+par un processus dédié, achats_groupes --traiter --boucle (voir le
+Procfile), qui survit au recyclage des workers web et reprend les achats
+inachevés. Un achat en échec est repris au plus ACHATS_GROUPES_TENTATIVES_MAX
+fois, puis seulement avec --relancer-echecs. En développement, ACHATS_GROUPES_EXECUTION = "thread" lance le
+traitement dans un thread du worker après la validation de la transaction ;
+ce thread disparaît avec le worker, et l'achat reste alors en attente de la
+commande.
+"""
+
+import hashlib
+import logging
+import secrets
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core import signing
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .catalogue import obtenir_catalogue
+from .metriques import compter_billets
+from .models import AchatGroupe, Commande, GenerationTicket, Paiement, Ticket
+
+logger = logging.getLogger(__name__)
+
+SEL = "jo_app.achats_groupes"
+PERMISSION = "jo_app.acheter_en_gros"
+METHODE_PAIEMENT = "facture_partenaire"
+
+
+class LignesInvalides(Exception):
+    """
+    Levée quand des lignes de la soumission ne correspondent pas au catalogue.
+    """
+
+    def __init__(self, erreurs):
+        """
+        Conserve les erreurs, par numéro de ligne.
+        """
+        super().__init__("Lignes invalides.")
+        self.erreurs = erreurs
+
+
+def creer_jeton(partenaire):
+    """
+    Retourne le jeton d'API signé du partenaire. Il reste valable tant que le
+    partenaire est actif et garde la permission acheter_en_gros.
+    """
+    return signing.Signer(salt=SEL).sign(str(partenaire.pk))
+
+
+def accorder_permission(partenaire):
+    """
+    Accorde la permission acheter_en_gros au partenaire.
+    """
+    partenaire.user_permissions.add(
+        Permission.objects.get(
+            codename="acheter_en_gros", content_type__app_label="jo_app"
+        )
+    )
+
+
+def partenaire_du_jeton(jeton):
+    """
+    Retourne l'utilisateur actif désigné par le jeton, ou None.
+    """
+    try:
+        pk = signing.Signer(salt=SEL).unsign(jeton)
+    except signing.BadSignature:
+        return None
+    return get_user_model().objects.filter(pk=pk, is_active=True).first()
+
+
+def cle_commande(partenaire, cle_idempotence):
+    """
+    Retourne la clé d'idempotence de la commande : celle du partenaire,
+    propre à ce partenaire.
+    """
+    return hashlib.sha256(f"{partenaire.pk}:{cle_idempotence}".encode()).hexdigest()
+
+
+def valider_lignes(lignes):
+    """
+    Valide les lignes (sport, offre, quantite, titulaire) contre l'instantané
+    du catalogue, sans requête SQL, et retourne les lignes normalisées
+    (sport, offre, quantité, titulaire). Lève LignesInvalides.
+    """
+    if not isinstance(lignes, list) or not lignes:
+        raise LignesInvalides({"lignes": "Une liste de lignes est attendue."})
+    if len(lignes) > settings.ACHATS_GROUPES_LIGNES_MAX:
+        raise LignesInvalides(
+            {"lignes": f"Au plus {settings.ACHATS_GROUPES_LIGNES_MAX} lignes."}
+        )
+
+    catalogue = obtenir_catalogue()
+    valides = []
+    erreurs = {}
+    for numero, ligne in enumerate(lignes):
+        if not isinstance(ligne, dict):
+            erreurs[numero] = "Objet attendu."
+            continue
+        sport_id, offre_id = ligne.get("sport"), ligne.get("offre")
+        quantite = ligne.get("quantite")
+        titulaire = ligne.get("titulaire", "")
+        if type(sport_id) is not int or type(offre_id) is not int:
+            erreurs[numero] = "sport et offre doivent être des identifiants entiers."
+            continue
+        sport = catalogue.sports_par_id.get(sport_id)
+        offre = catalogue.offres_par_id.get(offre_id)
+        if sport is None:
+            erreurs[numero] = "Sport inconnu."
+        elif offre is None:
+            erreurs[numero] = "Offre inconnue."
+        elif type(quantite) is not int or quantite < 1:
+            erreurs[numero] = "La quantité doit être un entier positif."
+        elif not isinstance(titulaire, str) or len(titulaire) > 100:
+            erreurs[numero] = "Le titulaire doit faire au plus 100 caractères."
+        else:
+            valides.append((sport, offre, quantite, titulaire.strip()))
+
+    total = sum(quantite for _, _, quantite, _ in valides)
+    if not erreurs and total > settings.ACHATS_GROUPES_BILLETS_MAX:
+        erreurs["lignes"] = (
+            f"Au plus {settings.ACHATS_GROUPES_BILLETS_MAX} billets par achat."
+        )
+    if erreurs:
+        raise LignesInvalides(erreurs)
+    return valides
+
+
+def reserver(partenaire, cle_idempotence, lignes):
+    """
+    Enregistre la commande, les tickets et les paiements de l'achat groupé en
+    une transaction, et programme l'émission des billets. Retourne l'achat et
+    un booléen qui indique s'il vient d'être créé : une soumission répétée
+    avec la même clé d'idempotence retourne l'achat existant. Lève
+    LignesInvalides si le catalogue a changé depuis la validation des lignes.
+    """
+    cle = cle_commande(partenaire, cle_idempotence)
+    existant = AchatGroupe.objects.filter(commande__cle_idempotence=cle).first()
+    if existant is not None:
+        return existant, False
+
+    total = sum(quantite for _, _, quantite, _ in lignes)
+    try:
+        with transaction.atomic():
+            commande = Commande.objects.create(
+                utilisateur=partenaire,
+                cle_idempotence=cle,
+                montant=sum(offre.prix * quantite for _, offre, quantite, _ in lignes),
+                nombre_billets=total,
+            )
+            Ticket.objects.bulk_create(
+                (
+                    Ticket(
+                        utilisateur=partenaire,
+                        sport_id=sport.id,
+                        offre_id=offre.id,
+                        quantite=quantite,
+                        titulaire=titulaire,
+                        est_achete=True,
+                        commande=commande,
+                    )
+                    for sport, offre, quantite, titulaire in lignes
+                ),
+                batch_size=settings.ACHATS_GROUPES_LOT,
+            )
+            # Les clés des tickets sont relues : MySQL ne les renvoie pas.
+            Paiement.objects.bulk_create(
+                (
+                    Paiement(
+                        ticket_id=ticket_id,
+                        montant=prix * quantite,
+                        methode_paiement=METHODE_PAIEMENT,
+                        statut_paiement=True,
+                    )
+                    for ticket_id, quantite, prix in commande.tickets.values_list(
+                        "id", "quantite", "offre__prix"
+                    )
+                ),
+                batch_size=settings.ACHATS_GROUPES_LOT,
+            )
+            achat = AchatGroupe.objects.create(
+                partenaire=partenaire, commande=commande, billets_demandes=total
+            )
+            transaction.on_commit(lambda: lancer(achat.pk))
+    except IntegrityError:
+        # Soumission concurrente avec la même clé, ou sport ou offre supprimé
+        # depuis l'instantané du catalogue qui a validé les lignes
+        existant = AchatGroupe.objects.filter(commande__cle_idempotence=cle).first()
+        if existant is None:
+            raise LignesInvalides(
+                {"lignes": "Le catalogue a changé, soumettez à nouveau l'achat."}
+            )
+        return existant, False
+    return achat, True
+
+
+def lancer(achat_id):
+    """
+    Lance l'émission des billets dans un thread si ACHATS_GROUPES_EXECUTION
+    vaut "thread" ; sinon, elle est laissée à la commande achats_groupes
+    --traiter.
+    """
+    if settings.ACHATS_GROUPES_EXECUTION == "thread":
+        threading.Thread(
+            target=traiter_en_arriere_plan, args=(achat_id,), daemon=True
+        ).start()
+
+
+def traiter_en_arriere_plan(achat_id):
+    """
+    Émet les billets de l'achat, puis ferme les connexions du thread.
+    """
+    try:
+        traiter(achat_id)
+    except Exception:
+        logger.exception("Achat groupé %s en échec.", achat_id)
+    finally:
+        connections.close_all()
+
+
+def billets_a_emettre(tickets, debut, nombre):
+    """
+    Retourne le ticket de chacun des billets de rang debut à debut + nombre,
+    les billets étant numérotés dans l'ordre des tickets.
+    """
+    resultat = []
+    for ticket_id, quantite in tickets:
+        if debut >= quantite:
+            debut -= quantite
+            continue
+        resultat += [ticket_id] * min(quantite - debut, nombre - len(resultat))
+        debut = 0
+        if len(resultat) == nombre:
+            break
+    return resultat
+
+
+def traiter(achat_id):
+    """
+    Émet les billets restants de l'achat par lots. Chaque lot est inséré
+    avec bulk_create dans la même transaction que l'avancement de l'achat,
+    verrouillé pendant le lot : un traitement interrompu reprend au lot
+    suivant, et deux traitements simultanés n'émettent pas deux fois le même
+    billet. Un échec est enregistré sur l'achat et compté. Retourne l'achat.
+    """
+    achat = AchatGroupe.objects.get(pk=achat_id)
+    tickets = list(achat.commande.tickets.order_by("id").values_list("id", "quantite"))
+    try:
+        while True:
+            with transaction.atomic():
+                achat = AchatGroupe.objects.select_for_update().get(pk=achat_id)
+                restants = achat.billets_demandes - achat.billets_emis
+                if restants <= 0:
+                    if achat.statut != AchatGroupe.TERMINE:
+                        achat.statut = AchatGroupe.TERMINE
+                        achat.erreur = ""
+                        achat.date_fin = timezone.now()
+                        achat.save(update_fields=["statut", "erreur", "date_fin"])
+                        transaction.on_commit(
+                            lambda: compter_billets(
+                                achat.commande.tickets.select_related("sport", "offre")
+                            )
+                        )
+                    break
+                lot = billets_a_emettre(
+                    tickets,
+                    achat.billets_emis,
+                    min(restants, settings.ACHATS_GROUPES_LOT),
+                )
+                GenerationTicket.objects.bulk_create(
+                    GenerationTicket(
+                        ticket_id=ticket_id, cle_securisee_2=secrets.token_hex(32)
+                    )
+                    for ticket_id in lot
+                )
+                achat.billets_emis += len(lot)
+                achat.statut = AchatGroupe.EN_COURS
+                achat.save(update_fields=["billets_emis", "statut"])
+    except Exception as e:
+        AchatGroupe.objects.filter(pk=achat_id).update(
+            statut=AchatGroupe.ECHOUE, erreur=str(e), echecs=F("echecs") + 1
+        )
+        raise
+    return achat
@@ -1,14 +1,210 @@
 """
 Ce module gère l'administration de l'application via Django Admin.
+
+Les listes sont prévues pour une base de production (millions de billets) :
+les objets liés affichés sont chargés par jointure (list_select_related), les
+clés étrangères sont saisies par identifiant (raw_id_fields) et la recherche
+porte sur des colonnes indexées, par égalité. Le total non filtré n'est pas
+recalculé (show_full_result_count) et, au-delà de ADMIN_COMPTE_ESTIME_SEUIL
+lignes, le nombre de lignes d'une liste non filtrée est estimé à partir des
+statistiques de la base au lieu d'un COUNT(*).
 """
 
+from django.conf import settings
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from .models import (
+    AchatGroupe,
+    Commande,
+    GenerationTicket,
+    Offre,
+    Paiement,
+    Sport,
+    Ticket,
+    Utilisateur,
+)
+
+
+def estimer_lignes(modele, alias):
+    """
+    Retourne le nombre de lignes de la table estimé par la base (MySQL et
+    PostgreSQL), ou None si la base n'en fournit pas.
+    """
+    connexion = connections[alias]
+    table = modele._meta.db_table
+    if connexion.vendor == "mysql":
+        requete = (
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s"
+        )
+    elif connexion.vendor == "postgresql":
+        requete = "SELECT reltuples::bigint FROM pg_class WHERE relname = %s"
+    else:
+        return None
+    with connexion.cursor() as curseur:
+        curseur.execute(requete, [table])
+        ligne = curseur.fetchone()
+    return ligne[0] if ligne and ligne[0] is not None and ligne[0] >= 0 else None
+
+
+class PaginateurEstime(Paginator):
+    """
+    Paginateur qui estime le nombre de lignes d'une liste non filtrée.
+    """
+
+    @cached_property
+    def count(self):
+        """
+        Retourne l'estimation de la base pour une liste non filtrée au-delà
+        du seuil, le nombre exact sinon.
+        """
+        requete = getattr(self.object_list, "query", None)
+        if requete is not None and not requete.where:
+            estimation = estimer_lignes(self.object_list.model, self.object_list.db)
+            if (
+                estimation is not None
+                and estimation > settings.ADMIN_COMPTE_ESTIME_SEUIL
+            ):
+                return estimation
+        return super().count
+
+
+class GrandeTableAdmin(admin.ModelAdmin):
+    """
+    Réglages communs des listes de grandes tables.
+    """
+
+    paginator = PaginateurEstime
+    show_full_result_count = False
+
+
+@admin.register(Utilisateur)
+class UtilisateurAdmin(GrandeTableAdmin):
+    """
+    Administration des utilisateurs.
+    """
+
+    list_display = ("email", "prenom", "nom", "ville", "is_staff", "is_active")
+    list_filter = ("is_staff", "is_active")
+    search_fields = ("=email", "=cle_securisee_1")
+    filter_horizontal = ("groups", "user_permissions")
+
+
+@admin.register(Sport)
+class SportAdmin(admin.ModelAdmin):
+    """
+    Administration des sports.
+    """
+
+    list_display = ("nom", "date_evenement")
+    search_fields = ("nom",)
+    date_hierarchy = "date_evenement"
+
+
+@admin.register(Offre)
+class OffreAdmin(admin.ModelAdmin):
+    """
+    Administration des offres.
+    """
+
+    list_display = ("type", "prix")
+
+
+@admin.register(Commande)
+class CommandeAdmin(GrandeTableAdmin):
+    """
+    Administration des commandes.
+    """
+
+    list_display = ("id", "utilisateur", "montant", "nombre_billets", "date_commande")
+    list_select_related = ("utilisateur",)
+    raw_id_fields = ("utilisateur",)
+    search_fields = ("=utilisateur__email", "=cle_idempotence", "=reference_paiement")
+    date_hierarchy = "date_commande"
+
+
+@admin.register(Ticket)
+class TicketAdmin(GrandeTableAdmin):
+    """
+    Administration des tickets.
+    """
+
+    list_display = (
+        "id",
+        "utilisateur",
+        "sport",
+        "offre",
+        "quantite",
+        "est_achete",
+        "date_creation",
+    )
+    list_select_related = ("utilisateur", "sport", "offre")
+    list_filter = ("est_achete",)
+    raw_id_fields = ("utilisateur", "commande")
+    search_fields = ("=utilisateur__email",)
+
+
+@admin.register(Paiement)
+class PaiementAdmin(GrandeTableAdmin):
+    """
+    Administration des paiements.
+    """
+
+    list_display = (
+        "id",
+        "ticket",
+        "montant",
+        "methode_paiement",
+        "statut_paiement",
+        "date_paiement",
+    )
+    list_select_related = ("ticket__sport", "ticket__offre")
+    list_filter = ("statut_paiement",)
+    raw_id_fields = ("ticket",)
+    search_fields = ("=ticket__utilisateur__email",)
+    date_hierarchy = "date_paiement"
+
+
+@admin.register(GenerationTicket)
+class GenerationTicketAdmin(GrandeTableAdmin):
+    """
+    Administration des billets générés.
+    """
+
+    list_display = ("id", "ticket", "acheteur", "date_generation")
+    list_select_related = ("ticket__sport", "ticket__offre", "ticket__utilisateur")
+    raw_id_fields = ("ticket",)
+    search_fields = ("=cle_securisee_2", "=ticket__utilisateur__email")
+    date_hierarchy = "date_generation"
+
+    @admin.display(description="Acheteur", ordering="ticket__utilisateur__email")
+    def acheteur(self, billet):
+        """
+        Retourne l'adresse e-mail de l'acheteur du billet.
+        """
+        return billet.ticket.utilisateur.email
+
 
-from .models import GenerationTicket, Offre, Paiement, Sport, Ticket, Utilisateur
+@admin.register(AchatGroupe)
+class AchatGroupeAdmin(admin.ModelAdmin):
+    """
+    Administration des achats groupés des partenaires.
+    """
 
-admin.site.register(Utilisateur)
-admin.site.register(Sport)
-admin.site.register(Offre)
-admin.site.register(Ticket)
-admin.site.register(Paiement)
-admin.site.register(GenerationTicket)
+    list_display = (
+        "id",
+        "partenaire",
+        "statut",
+        "billets_emis",
+        "billets_demandes",
+        "echecs",
+        "date_creation",
+        "date_fin",
+    )
+    list_select_related = ("partenaire",)
+    list_filter = ("statut",)
+    raw_id_fields = ("partenaire", "commande")
+    search_fields = ("=partenaire__email",)
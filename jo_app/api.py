@@ -0,0 +1,445 @@
+"""
+Ce module contient l'API JSON en lecture seule, version 1 (/api/v1/), de
+l'application mobile : sports, offres, commandes et billets de l'utilisateur
+connecté, et contenu du QR code d'un billet. Il contient aussi les achats
+groupés des partenaires (voir achats_groupes.py), authentifiés par jeton.
+
+- Les listes sont paginées par curseur : ?apres=<id> (identifiants décroissants
+  pour les commandes et les billets, croissants pour le catalogue) et
+  ?limite=<n>. La réponse donne le curseur de la page suivante, ou null.
+- ?champs=id,nom,... restreint les champs renvoyés (et ceux lus en base).
+- Chaque ressource porte un ETag. Une requête conditionnelle (If-None-Match)
+  sur une ressource inchangée reçoit un 304 : l'ETag est calculé par une
+  requête d'agrégat, avant toute lecture des lignes et toute sérialisation.
+  Le catalogue est servi depuis son instantané en mémoire (voir catalogue.py).
+"""
+
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.urls import path, reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.views.decorators.csrf import csrf_exempt
+
+from .achats_groupes import (
+    PERMISSION,
+    LignesInvalides,
+    partenaire_du_jeton,
+    reserver,
+    valider_lignes,
+)
+from .catalogue import obtenir_catalogue
+from .models import AchatGroupe, Commande, GenerationTicket
+
+# Champs du catalogue : nom dans l'API -> valeur tirée de l'instantané
+CHAMPS_SPORT = {
+    "id": lambda sport, catalogue: sport.id,
+    "nom": lambda sport, catalogue: sport.nom,
+    "date_evenement": lambda sport, catalogue: sport.date_evenement.isoformat(),
+    "date_formatee": lambda sport, catalogue: catalogue.dates_formatees[sport.id],
+    "description": lambda sport, catalogue: sport.description,
+}
+CHAMPS_OFFRE = {
+    "id": lambda offre, catalogue: offre.id,
+    "type": lambda offre, catalogue: offre.type,
+    "prix": lambda offre, catalogue: str(offre.prix),
+}
+# Champs lus en base : nom dans l'API -> (chemin lu en base, valeur)
+CHAMPS_COMMANDE = {
+    "id": ("id", lambda commande: commande.id),
+    "montant": ("montant", lambda commande: str(commande.montant)),
+    "nombre_billets": ("nombre_billets", lambda commande: commande.nombre_billets),
+    "date_commande": (
+        "date_commande",
+        lambda commande: commande.date_commande.isoformat(),
+    ),
+    "reference_paiement": (
+        "reference_paiement",
+        lambda commande: commande.reference_paiement,
+    ),
+}
+CHAMPS_BILLET = {
+    "id": ("id", lambda billet: billet.id),
+    "commande": ("ticket__commande", lambda billet: billet.ticket.commande_id),
+    "sport": ("ticket__sport__nom", lambda billet: billet.ticket.sport.nom),
+    "date_evenement": (
+        "ticket__sport__date_evenement",
+        lambda billet: billet.ticket.sport.date_evenement.isoformat(),
+    ),
+    "offre": ("ticket__offre__type", lambda billet: billet.ticket.offre.type),
+    "prix": ("ticket__offre__prix", lambda billet: str(billet.ticket.offre.prix)),
+    "quantite": ("ticket__quantite", lambda billet: billet.ticket.quantite),
+    "date_generation": (
+        "date_generation",
+        lambda billet: billet.date_generation.isoformat(),
+    ),
+    "qr_code": ("qr_code", lambda billet: billet.qr_code or None),
+}
+
+
+class ErreurApi(Exception):
+    """
+    Levée pour une requête invalide : renvoyée au client avec son statut.
+    """
+
+    def __init__(self, message, statut=400):
+        """
+        Conserve le message et le statut HTTP de l'erreur.
+        """
+        super().__init__(message)
+        self.statut = statut
+
+
+def ressource(authentifiee=False):
+    """
+    Décore une vue de l'API : méthode GET uniquement, authentification
+    éventuelle (401 en JSON plutôt qu'une redirection) et erreurs en JSON.
+    """
+
+    def decorateur(vue):
+        """
+        Enveloppe la vue.
+        """
+
+        @wraps(vue)
+        def enveloppe(request, *args, **kwargs):
+            """
+            Vérifie la requête puis appelle la vue.
+            """
+            if request.method not in ("GET", "HEAD"):
+                return JsonResponse({"erreur": "Méthode non autorisée."}, status=405)
+            if authentifiee and not request.user.is_authenticated:
+                return JsonResponse({"erreur": "Authentification requise."}, status=401)
+            try:
+                response = vue(request, *args, **kwargs)
+            except ErreurApi as e:
+                return JsonResponse({"erreur": str(e)}, status=e.statut)
+            if authentifiee:
+                patch_cache_control(response, private=True)
+            else:
+                patch_cache_control(
+                    response, public=True, max_age=settings.CATALOGUE_MAX_AGE
+                )
+            return response
+
+        return enveloppe
+
+    return decorateur
+
+
+def champs_demandes(request, disponibles):
+    """
+    Retourne les champs demandés par ?champs= (tous par défaut), "id" compris.
+    """
+    valeur = request.GET.get("champs")
+    if not valeur:
+        return list(disponibles)
+    champs = ["id", *(c for c in valeur.split(",") if c and c != "id")]
+    inconnus = [c for c in champs if c not in disponibles]
+    if inconnus:
+        raise ErreurApi(f"Champs inconnus : {', '.join(inconnus)}")
+    return champs
+
+
+def pagination(request):
+    """
+    Retourne le curseur (identifiant, ou None) et la taille de page demandés.
+    """
+    try:
+        apres = int(request.GET["apres"]) if request.GET.get("apres") else None
+        limite = int(request.GET.get("limite", settings.API_PAGE_TAILLE))
+    except ValueError:
+        raise ErreurApi("apres et limite doivent être des entiers.")
+    if not 1 <= limite <= settings.API_PAGE_TAILLE_MAX:
+        raise ErreurApi(f"limite doit être entre 1 et {settings.API_PAGE_TAILLE_MAX}.")
+    return apres, limite
+
+
+def repondre(request, version, contenu):
+    """
+    Retourne un 304 si l'ETag de la représentation (version des données et
+    paramètres de la requête) correspond à If-None-Match, sinon la réponse
+    JSON produite par contenu().
+    """
+    empreinte = hashlib.sha1(
+        f"{request.path}|{version}|{request.GET.urlencode()}".encode()
+    ).hexdigest()
+    etag = quote_etag(empreinte)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse(contenu())
+    response["ETag"] = etag
+    return response
+
+
+def page(elements, limite, serialiser):
+    """
+    Sérialise une page lue avec une ligne de plus que la limite, et retourne
+    les données avec le curseur de la page suivante.
+    """
+    suivant = elements[limite - 1].id if len(elements) > limite else None
+    return {
+        "donnees": [serialiser(element) for element in elements[:limite]],
+        "suivant": suivant,
+    }
+
+
+def lire_page(requete, champs, definitions, apres, limite):
+    """
+    Lit une page de la requête par identifiants décroissants, en ne chargeant
+    que les colonnes et les jointures nécessaires aux champs demandés.
+    """
+    chemins = {definitions[champ][0] for champ in champs}
+    jointures = {c.rsplit("__", 1)[0] for c in chemins if "__" in c}
+    if apres is not None:
+        requete = requete.filter(id__lt=apres)
+    requete = requete.select_related(*jointures).only(*chemins)
+    return list(requete.order_by("-id")[: limite + 1])
+
+
+def liste_catalogue(request, elements, definitions):
+    """
+    Retourne une page d'éléments du catalogue, par identifiants croissants.
+    """
+    champs = champs_demandes(request, definitions)
+    apres, limite = pagination(request)
+    catalogue = obtenir_catalogue()
+    elements = getattr(catalogue, elements)
+    if apres is not None:
+        elements = [element for element in elements if element.id > apres]
+    return repondre(
+        request,
+        catalogue.version,
+        lambda: page(
+            elements[: limite + 1],
+            limite,
+            lambda e: {c: definitions[c](e, catalogue) for c in champs},
+        ),
+    )
+
+
+@ressource()
+def sports(request):
+    """
+    Liste les sports du catalogue.
+    """
+    return liste_catalogue(request, "sports", CHAMPS_SPORT)
+
+
+@ressource()
+def sport(request, sport_id):
+    """
+    Retourne un sport du catalogue.
+    """
+    champs = champs_demandes(request, CHAMPS_SPORT)
+    catalogue = obtenir_catalogue()
+    element = catalogue.sports_par_id.get(sport_id)
+    if element is None:
+        raise ErreurApi("Sport introuvable.", statut=404)
+    return repondre(
+        request,
+        catalogue.version,
+        lambda: {c: CHAMPS_SPORT[c](element, catalogue) for c in champs},
+    )
+
+
+@ressource()
+def offres(request):
+    """
+    Liste les offres du catalogue.
+    """
+    return liste_catalogue(request, "offres", CHAMPS_OFFRE)
+
+
+@ressource(authentifiee=True)
+def commandes(request):
+    """
+    Liste les commandes de l'utilisateur, de la plus récente à la plus ancienne.
+    """
+    champs = champs_demandes(request, CHAMPS_COMMANDE)
+    apres, limite = pagination(request)
+    requete = Commande.objects.filter(utilisateur=request.user)
+    etat = requete.aggregate(nombre=Count("id"), dernier=Max("id"))
+
+    def contenu():
+        """
+        Lit et sérialise la page de commandes.
+        """
+        elements = lire_page(requete, champs, CHAMPS_COMMANDE, apres, limite)
+        return page(
+            elements, limite, lambda e: {c: CHAMPS_COMMANDE[c][1](e) for c in champs}
+        )
+
+    return repondre(request, f"{etat['nombre']}-{etat['dernier']}", contenu)
+
+
+@ressource(authentifiee=True)
+def billets(request):
+    """
+    Liste les billets de l'utilisateur, du plus récent au plus ancien ;
+    ?commande=<id> se limite aux billets d'une commande.
+    """
+    champs = champs_demandes(request, CHAMPS_BILLET)
+    apres, limite = pagination(request)
+    requete = GenerationTicket.objects.filter(ticket__utilisateur=request.user)
+    if request.GET.get("commande"):
+        try:
+            requete = requete.filter(ticket__commande_id=int(request.GET["commande"]))
+        except ValueError:
+            raise ErreurApi("commande doit être un entier.")
+    # Le QR code est ajouté après la création du billet, et le sport, l'offre
+    # et le prix viennent du catalogue : ils font partie de l'état.
+    etat = requete.aggregate(
+        nombre=Count("id"), dernier=Max("id"), qr_codes=Count("qr_code")
+    )
+    version = (
+        f"{etat['nombre']}-{etat['dernier']}-{etat['qr_codes']}-"
+        f"{obtenir_catalogue().version}"
+    )
+
+    def contenu():
+        """
+        Lit et sérialise la page de billets.
+        """
+        elements = lire_page(requete, champs, CHAMPS_BILLET, apres, limite)
+        return page(
+            elements, limite, lambda e: {c: CHAMPS_BILLET[c][1](e) for c in champs}
+        )
+
+    return repondre(request, version, contenu)
+
+
+@ressource(authentifiee=True)
+def qr_code_billet(request, billet_id):
+    """
+    Retourne le contenu du QR code d'un billet de l'utilisateur (clé de
+    l'acheteur suivie de la clé du billet, voir scan_view) et l'URL de l'image,
+    null tant qu'elle n'est pas générée : l'application affiche le QR code à
+    partir du contenu.
+    """
+    billet = (
+        GenerationTicket.objects.filter(id=billet_id, ticket__utilisateur=request.user)
+        .values("id", "cle_securisee_2", "qr_code")
+        .first()
+    )
+    if billet is None:
+        raise ErreurApi("Billet introuvable.", statut=404)
+    return repondre(
+        request,
+        f"{billet['cle_securisee_2']}-{billet['qr_code']}",
+        lambda: {
+            "id": billet["id"],
+            "contenu": f"{request.user.cle_securisee_1}{billet['cle_securisee_2']}",
+            "qr_code": billet["qr_code"] or None,
+        },
+    )
+
+
+def ressource_partenaire(vue):
+    """
+    Décore une vue des partenaires : jeton d'API (Authorization: Bearer),
+    permission acheter_en_gros, pas de jeton CSRF, erreurs en JSON. La vue
+    reçoit le partenaire après la requête.
+    """
+
+    @csrf_exempt
+    @wraps(vue)
+    def enveloppe(request, *args, **kwargs):
+        """
+        Authentifie le partenaire puis appelle la vue.
+        """
+        entete = request.headers.get("Authorization", "")
+        partenaire = None
+        if entete.startswith("Bearer "):
+            partenaire = partenaire_du_jeton(entete.removeprefix("Bearer "))
+        if partenaire is None:
+            return JsonResponse({"erreur": "Jeton de partenaire requis."}, status=401)
+        if not partenaire.has_perm(PERMISSION):
+            return JsonResponse(
+                {"erreur": "Permission acheter_en_gros requise."}, status=403
+            )
+        try:
+            response = vue(request, partenaire, *args, **kwargs)
+        except ErreurApi as e:
+            response = JsonResponse({"erreur": str(e)}, status=e.statut)
+        patch_cache_control(response, no_store=True)
+        return response
+
+    return enveloppe
+
+
+def decrire_achat(achat):
+    """
+    Retourne la description JSON d'un achat groupé et de son avancement.
+    """
+    return {
+        "id": achat.id,
+        "statut": achat.statut,
+        "commande": achat.commande_id,
+        "billets_demandes": achat.billets_demandes,
+        "billets_emis": achat.billets_emis,
+        "progression": round(achat.billets_emis / achat.billets_demandes, 4),
+        "erreur": achat.erreur,
+        "echecs": achat.echecs,
+        "date_creation": achat.date_creation.isoformat(),
+        "date_fin": achat.date_fin.isoformat() if achat.date_fin else None,
+        "suivi": reverse("api_v1:achat_groupe", args=[achat.id]),
+    }
+
+
+@ressource_partenaire
+def achats_groupes(request, partenaire):
+    """
+    Enregistre un achat groupé : {"cle_idempotence": "...", "lignes": [{"sport":
+    id, "offre": id, "quantite": n, "titulaire": "..."}, ...]}. Répond 202 avec
+    l'adresse de suivi ; une soumission répétée avec la même clé (ou l'en-tête
+    Idempotency-Key) répond 200 avec l'achat existant.
+    """
+    if request.method != "POST":
+        raise ErreurApi("Méthode non autorisée.", statut=405)
+    try:
+        corps = json.loads(request.body)
+    except ValueError:
+        raise ErreurApi("Le corps de la requête doit être du JSON.")
+    if not isinstance(corps, dict):
+        raise ErreurApi("Le corps de la requête doit être un objet JSON.")
+    cle = corps.get("cle_idempotence") or request.headers.get("Idempotency-Key")
+    if not isinstance(cle, str) or not 1 <= len(cle) <= 64:
+        raise ErreurApi("cle_idempotence (64 caractères au plus) est requise.")
+    try:
+        achat, cree = reserver(partenaire, cle, valider_lignes(corps.get("lignes")))
+    except LignesInvalides as e:
+        return JsonResponse({"erreur": str(e), "lignes": e.erreurs}, status=400)
+
+    response = JsonResponse(decrire_achat(achat), status=202 if cree else 200)
+    response["Location"] = reverse("api_v1:achat_groupe", args=[achat.id])
+    return response
+
+
+@ressource_partenaire
+def achat_groupe(request, partenaire, achat_id):
+    """
+    Retourne l'avancement d'un achat groupé du partenaire.
+    """
+    achat = AchatGroupe.objects.filter(id=achat_id, partenaire=partenaire).first()
+    if achat is None:
+        raise ErreurApi("Achat groupé introuvable.", statut=404)
+    return JsonResponse(decrire_achat(achat))
+
+
+app_name = "api_v1"
+urlpatterns = [
+    path("sports/", sports, name="sports"),
+    path("sports/<int:sport_id>/", sport, name="sport"),
+    path("offres/", offres, name="offres"),
+    path("commandes/", commandes, name="commandes"),
+    path("billets/", billets, name="billets"),
+    path("billets/<int:billet_id>/qr/", qr_code_billet, name="qr_code_billet"),
+    path("achats-groupes/", achats_groupes, name="achats_groupes"),
+    path("achats-groupes/<int:achat_id>/", achat_groupe, name="achat_groupe"),
+]
@@ -8,3 +8,16 @@ from django.apps import AppConfig
 class JoAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "jo_app"
+
+    def ready(self):
+        """
+        Connecte les signaux d'invalidation du catalogue et du cache des
+        utilisateurs et l'instrumentation des connexions à la base, et
+        enregistre la vérification du cache de la file d'attente.
+        """
+        from . import (  # noqa: F401
+            authentification,
+            catalogue,
+            file_attente,
+            instrumentation,
+        )
@@ -0,0 +1,102 @@
+"""
+Ce module contient le backend d'authentification de l'application.
+
+AuthenticationMiddleware charge l'utilisateur connecté à chaque requête :
+le backend le garde dans le cache partagé, sous une clé qui dépend des champs
+du modèle (un changement de schéma ignore les anciennes entrées). L'entrée
+est supprimée à chaque enregistrement ou suppression de l'utilisateur
+(mot de passe, désactivation, droits, dernière connexion), et expire au plus
+tard après AUTH_CACHE_DUREE secondes pour les mises à jour faites par
+QuerySet.update(), qui n'envoient pas de signal.
+"""
+
+import hashlib
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+def cache_utilisateurs():
+    """
+    Retourne le cache des utilisateurs s'il est partagé entre les workers,
+    sinon None : un cache local ne verrait pas les invalidations des autres.
+    """
+    cache = caches[settings.AUTH_CACHE_ALIAS]
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+@lru_cache(maxsize=None)
+def version_modele():
+    """
+    Retourne une empreinte des champs du modèle utilisateur.
+    """
+    champs = ",".join(f.attname for f in get_user_model()._meta.concrete_fields)
+    return hashlib.md5(champs.encode()).hexdigest()[:8]
+
+
+def cle_utilisateur(user_id):
+    """
+    Retourne la clé de cache d'un utilisateur, versionnée par les champs du modèle.
+    """
+    return f"auth:utilisateur:{version_modele()}:{user_id}"
+
+
+def invalider_utilisateur(user_id):
+    """
+    Supprime l'utilisateur du cache.
+    """
+    cache = cache_utilisateurs()
+    if cache is not None:
+        cache.delete(cle_utilisateur(user_id))
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def utilisateur_modifie(sender, instance, **kwargs):
+    """
+    Invalide l'utilisateur immédiatement, puis à nouveau après la validation
+    de la transaction pour qu'aucune requête ne remette en cache l'ancienne ligne.
+    """
+    invalider_utilisateur(instance.pk)
+    transaction.on_commit(lambda: invalider_utilisateur(instance.pk))
+
+
+class CacheUtilisateurBackend(ModelBackend):
+    """
+    ModelBackend dont get_user lit l'utilisateur dans le cache partagé.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """
+        Authentifie comme ModelBackend. Un échec interrompt la chaîne des
+        backends : ModelBackend, qui suit dans AUTHENTICATION_BACKENDS pour les
+        sessions ouvertes avant ce backend, ne recalcule pas le hachage.
+        """
+        utilisateur = super().authenticate(request, username, password, **kwargs)
+        if utilisateur is None and password is not None:
+            raise PermissionDenied
+        return utilisateur
+
+    def get_user(self, user_id):
+        """
+        Retourne l'utilisateur actif depuis le cache, ou depuis la base à défaut.
+        """
+        cache = cache_utilisateurs()
+        if cache is None:
+            return super().get_user(user_id)
+
+        cle = cle_utilisateur(user_id)
+        utilisateur = cache.get(cle)
+        if utilisateur is None:
+            utilisateur = super().get_user(user_id)
+            if utilisateur is not None:
+                cache.set(cle, utilisateur, settings.AUTH_CACHE_DUREE)
+            return utilisateur
+        return utilisateur if self.user_can_authenticate(utilisateur) else None
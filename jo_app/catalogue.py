@@ -0,0 +1,196 @@
+"""
+Ce module gère le cache du catalogue (sports et offres).
+
+Le catalogue change quelques fois par saison : chaque processus en garde un
+instantané en mémoire, étiqueté par un numéro de version partagé dans le cache
+Django. Toute modification d'un Sport ou d'une Offre change ce numéro, ce qui
+force chaque processus à recharger son instantané à sa prochaine lecture.
+
+Avec un cache propre à chaque processus (LocMemCache), le numéro ne serait
+changé que dans le worker auteur de la modification. L'instantané est alors
+relu toutes les CATALOGUE_DUREE_LOCALE secondes, et sa version est une
+empreinte de son contenu : identique dans tous les workers pour un même
+catalogue. La vérification verifier_cache le signale hors DEBUG.
+"""
+
+import hashlib
+import secrets
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import formats
+
+from .formatage import formater_date
+from .models import Offre, Sport
+
+CLE_VERSION = "catalogue:version"
+
+_verrou = threading.Lock()
+_instantane = None
+
+
+def cache_local():
+    """
+    Indique si le cache par défaut est propre au processus : il ne propage
+    alors pas les invalidations aux autres workers.
+    """
+    return isinstance(caches["default"], (LocMemCache, DummyCache))
+
+
+@checks.register(checks.Tags.caches)
+def verifier_cache(app_configs, **kwargs):
+    """
+    Signale un catalogue versionné dans un cache propre à chaque processus.
+    """
+    if settings.DEBUG or not cache_local():
+        return []
+    return [
+        checks.Warning(
+            "Le catalogue est versionné dans un cache propre à chaque "
+            "processus : une modification n'est vue des autres workers "
+            "qu'après CATALOGUE_DUREE_LOCALE secondes.",
+            hint="Définir DJANGO_CACHE_URL vers un cache partagé (Redis, "
+            "Memcached).",
+            id="jo_app.W002",
+        )
+    ]
+
+
+def empreinte(sports, offres):
+    """
+    Retourne une version calculée à partir du contenu du catalogue.
+    """
+    lignes = [
+        [getattr(objet, champ.attname) for champ in objet._meta.concrete_fields]
+        for objet in [*sports, *offres]
+    ]
+    return hashlib.sha1(repr(lignes).encode()).hexdigest()[:16]
+
+
+class Catalogue:
+    """
+    Instantané en lecture seule des sports et des offres, avec leurs libellés.
+    """
+
+    def __init__(self, version, sports, offres, expiration=None):
+        """
+        Indexe les sports et les offres et prépare leurs libellés.
+        `expiration` (horloge monotone) borne la durée de vie de l'instantané
+        lorsque le cache est local.
+        """
+        self.version = version
+        self.expiration = expiration
+        self.sports = sports
+        self.offres = offres
+        self.sports_par_id = {sport.id: sport for sport in sports}
+        self.offres_par_id = {offre.id: offre for offre in offres}
+        self.sports_par_nom = {}
+        for sport in sports:
+            self.sports_par_nom.setdefault(sport.nom, sport)
+
+        self.choix_sports = [
+            (sport.id, f"{sport.nom} - {formats.localize(sport.date_evenement)}")
+            for sport in sports
+        ]
+        self.choix_offres = [
+            (offre.id, f"{offre.type} - {formats.localize_input(offre.prix)}€")
+            for offre in offres
+        ]
+        self.dates_formatees = {
+            sport.id: formater_date(sport.date_evenement) for sport in sports
+        }
+
+    def valide(self, version):
+        """
+        Indique si l'instantané peut encore servir pour cette version partagée
+        (None avec un cache local, où seule son expiration compte).
+        """
+        if self.expiration is not None:
+            return time.monotonic() < self.expiration
+        return self.version == version
+
+
+def version_catalogue():
+    """
+    Retourne le numéro de version du catalogue : celui du cache partagé, ou
+    l'empreinte de l'instantané avec un cache local.
+    """
+    if cache_local():
+        return obtenir_catalogue().version
+    version = cache.get(CLE_VERSION)
+    if version is None:
+        cache.add(CLE_VERSION, secrets.token_hex(8), timeout=None)
+        version = cache.get(CLE_VERSION)
+    return version
+
+
+def obtenir_catalogue():
+    """
+    Retourne l'instantané du catalogue, rechargé seulement si sa version a changé.
+    """
+    global _instantane
+
+    version = None if cache_local() else version_catalogue()
+    instantane = _instantane
+    if instantane is not None and instantane.valide(version):
+        return instantane
+
+    with _verrou:
+        if _instantane is not None and _instantane.valide(version):
+            return _instantane
+        # La version est lue avant les requêtes : une invalidation concurrente
+        # provoque au pire un rechargement de plus, jamais un instantané périmé.
+        sports = list(Sport.objects.order_by("pk"))
+        offres = list(Offre.objects.order_by("pk"))
+        if version is None:
+            _instantane = Catalogue(
+                empreinte(sports, offres),
+                sports,
+                offres,
+                expiration=time.monotonic() + settings.CATALOGUE_DUREE_LOCALE,
+            )
+        else:
+            _instantane = Catalogue(version, sports, offres)
+        return _instantane
+
+
+async def aobtenir_catalogue():
+    """
+    Version asynchrone de obtenir_catalogue : seul un rechargement, qui
+    interroge la base, passe par un thread.
+    """
+    version = None if cache_local() else await cache.aget(CLE_VERSION)
+    instantane = _instantane
+    if instantane is not None and instantane.valide(version):
+        return instantane
+    return await sync_to_async(obtenir_catalogue)()
+
+
+def invalider_catalogue():
+    """
+    Change la version du catalogue pour tous les processus.
+    """
+    global _instantane
+
+    cache.set(CLE_VERSION, secrets.token_hex(8), timeout=None)
+    _instantane = None
+
+
+@receiver([post_save, post_delete], sender=Sport)
+@receiver([post_save, post_delete], sender=Offre)
+def catalogue_modifie(sender, **kwargs):
+    """
+    Invalide le catalogue immédiatement, puis à nouveau après la validation
+    de la transaction pour qu'aucun processus ne garde une lecture antérieure.
+    """
+    invalider_catalogue()
+    transaction.on_commit(invalider_catalogue)
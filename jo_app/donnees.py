@@ -0,0 +1,288 @@
+"""
+Ce module génère des données synthétiques à l'échelle des Jeux : acheteurs,
+catalogue, commandes, tickets, paiements, billets et paniers abandonnés.
+
+Les lignes sont insérées par lots avec bulk_create. Les clés primaires sont
+attribuées par le générateur, car MySQL ne les renvoie pas après un
+bulk_create. Tous les tirages viennent d'un random.Random initialisé par la
+graine : la même graine sur la même base produit les mêmes données. Les
+mots de passe partagent un hachage calculé une seule fois. Aucun QR code
+n'est généré ni téléversé.
+"""
+
+import random
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import (
+    Commande,
+    GenerationTicket,
+    Offre,
+    Paiement,
+    Sport,
+    Ticket,
+    Utilisateur,
+)
+
+# Sports du plus demandé au moins demandé
+SPORTS = (
+    "Athlétisme",
+    "Natation",
+    "Gymnastique artistique",
+    "Football",
+    "Basketball",
+    "Judo",
+    "Tennis",
+    "Cyclisme sur piste",
+    "Handball",
+    "Volley-ball",
+    "Rugby à 7",
+    "Escrime",
+    "Aviron",
+    "Boxe",
+    "Water-polo",
+    "Plongeon",
+    "Badminton",
+    "Tennis de table",
+    "Skateboard",
+    "Escalade",
+    "Breaking",
+    "Équitation",
+    "Canoë-kayak",
+    "Voile",
+    "Tir à l'arc",
+    "Haltérophilie",
+    "Lutte",
+    "Taekwondo",
+    "Triathlon",
+    "Pentathlon moderne",
+    "Golf",
+    "Hockey sur gazon",
+)
+OFFRES = (
+    ("Solo", Decimal("50.00")),
+    ("Duo", Decimal("90.00")),
+    ("Famille", Decimal("150.00")),
+)
+POIDS_OFFRES = (60, 30, 10)
+PLACES = (1, 2, 3, 4)
+POIDS_PLACES = (50, 30, 10, 10)
+TICKETS_PAR_COMMANDE = (1, 2, 3)
+POIDS_TICKETS_PAR_COMMANDE = (70, 22, 8)
+METHODES_PAIEMENT = ("carte", "paypal", "virement")
+POIDS_METHODES = (85, 10, 5)
+
+DEBUT_VENTES = timezone.make_aware(datetime(2023, 5, 11))
+FIN_VENTES = timezone.make_aware(datetime(2024, 8, 11))
+OUVERTURE = date(2024, 7, 26)
+MOT_DE_PASSE = "Synthetique@2024!"
+
+
+class GenerateurDonnees:
+    """
+    Générateur déterministe de données synthétiques, inséré par lots.
+    """
+
+    def __init__(self, graine=2024, taille_lot=5000, progression=None):
+        """
+        Initialise le générateur ; `progression` reçoit le nombre de billets
+        insérés après chaque lot.
+        """
+        self.graine = graine
+        self.aleatoire = random.Random(graine)
+        self.taille_lot = taille_lot
+        self.progression = progression
+
+    def cle(self):
+        """
+        Retourne une clé hexadécimale de 64 caractères tirée de la graine.
+        """
+        return f"{self.aleatoire.getrandbits(256):064x}"
+
+    def date_vente(self, debut=DEBUT_VENTES, fin=FIN_VENTES):
+        """
+        Retourne un instant tiré entre les deux dates.
+        """
+        return debut + (fin - debut) * self.aleatoire.random()
+
+    def prochaine_cle(self, modele):
+        """
+        Retourne la première clé primaire libre du modèle.
+        """
+        return (modele.objects.aggregate(maximum=Max("pk"))["maximum"] or 0) + 1
+
+    def catalogue(self):
+        """
+        Crée les sports et les offres manquants et retourne les sports avec
+        leur popularité (loi de Zipf) et les offres.
+        """
+        sports = [
+            Sport.objects.get_or_create(
+                nom=nom,
+                defaults={"date_evenement": OUVERTURE + timedelta(days=rang % 17)},
+            )[0]
+            for rang, nom in enumerate(SPORTS)
+        ]
+        offres = [
+            Offre.objects.get_or_create(type=nom, defaults={"prix": prix})[0]
+            for nom, prix in OFFRES
+        ]
+        popularite = [1 / rang**1.1 for rang in range(1, len(sports) + 1)]
+        return sports, popularite, offres
+
+    def utilisateurs(self, nombre):
+        """
+        Crée `nombre` acheteurs et retourne leurs clés primaires.
+        """
+        mot_de_passe = make_password(MOT_DE_PASSE, salt=f"synthetique{self.graine}")
+        premiere = self.prochaine_cle(Utilisateur)
+        cles = list(range(premiere, premiere + nombre))
+        for debut in range(0, nombre, self.taille_lot):
+            Utilisateur.objects.bulk_create(
+                Utilisateur(
+                    pk=pk,
+                    email=f"acheteur{pk}.{self.graine}@synthetique.exemple.fr",
+                    nom=f"Acheteur{pk}",
+                    prenom="Synthétique",
+                    sexe=self.aleatoire.choices(("H", "F", "NB"), (48, 48, 4))[0],
+                    adresse=f"{pk % 200 + 1} rue de Rivoli",
+                    code_postal=f"{75001 + pk % 20}",
+                    ville="Paris",
+                    password=mot_de_passe,
+                    cle_securisee_1=self.cle(),
+                )
+                for pk in cles[debut : debut + self.taille_lot]
+            )
+        return cles
+
+    def ventes(self, billets, acheteurs, catalogue, taux_abandon=0.0):
+        """
+        Crée des commandes payées jusqu'à exactement `billets` billets, puis
+        des paniers abandonnés (taux_abandon tickets par ticket vendu).
+        Retourne le nombre de lignes créées par modèle.
+        """
+        sports, popularite, offres = catalogue
+        commande_pk = self.prochaine_cle(Commande)
+        ticket_pk = self.prochaine_cle(Ticket)
+        comptes = dict.fromkeys(("commandes", "tickets", "paiements", "billets"), 0)
+        lot = {modele: [] for modele in (Commande, Ticket, Paiement, GenerationTicket)}
+
+        restants = billets
+        while restants > 0:
+            instant = self.date_vente()
+            commande = Commande(
+                pk=commande_pk,
+                utilisateur_id=self.aleatoire.choice(acheteurs),
+                cle_idempotence=self.cle(),
+                reference_paiement=self.cle()[:32],
+                date_commande=instant,
+            )
+            nombre_tickets = self.aleatoire.choices(
+                TICKETS_PAR_COMMANDE, POIDS_TICKETS_PAR_COMMANDE
+            )[0]
+            for _ in range(nombre_tickets):
+                if restants == 0:
+                    break
+                places = min(restants, self.aleatoire.choices(PLACES, POIDS_PLACES)[0])
+                offre = self.aleatoire.choices(offres, POIDS_OFFRES)[0]
+                lot[Ticket].append(
+                    Ticket(
+                        pk=ticket_pk,
+                        utilisateur_id=commande.utilisateur_id,
+                        sport=self.aleatoire.choices(sports, popularite)[0],
+                        offre=offre,
+                        quantite=places,
+                        est_achete=True,
+                        date_creation=instant,
+                        commande_id=commande_pk,
+                    )
+                )
+                lot[Paiement].append(
+                    Paiement(
+                        ticket_id=ticket_pk,
+                        montant=offre.prix * places,
+                        methode_paiement=self.aleatoire.choices(
+                            METHODES_PAIEMENT, POIDS_METHODES
+                        )[0],
+                        statut_paiement=True,
+                        date_paiement=instant,
+                    )
+                )
+                lot[GenerationTicket] += [
+                    GenerationTicket(ticket_id=ticket_pk, cle_securisee_2=self.cle())
+                    for _ in range(places)
+                ]
+                commande.montant += offre.prix * places
+                commande.nombre_billets += places
+                restants -= places
+                ticket_pk += 1
+            lot[Commande].append(commande)
+            commande_pk += 1
+            if len(lot[GenerationTicket]) >= self.taille_lot or restants == 0:
+                self.inserer(lot, comptes)
+
+        paniers = round(comptes["tickets"] * taux_abandon)
+        maintenant = timezone.now()
+        for debut in range(0, paniers, self.taille_lot):
+            Ticket.objects.bulk_create(
+                Ticket(
+                    pk=ticket_pk + i,
+                    utilisateur_id=self.aleatoire.choice(acheteurs),
+                    sport=self.aleatoire.choices(sports, popularite)[0],
+                    offre=self.aleatoire.choices(offres, POIDS_OFFRES)[0],
+                    quantite=self.aleatoire.choices(PLACES, POIDS_PLACES)[0],
+                    date_creation=self.date_vente(
+                        maintenant - timedelta(days=30), maintenant
+                    ),
+                )
+                for i in range(debut, min(debut + self.taille_lot, paniers))
+            )
+        comptes["paniers_abandonnes"] = paniers
+        return comptes
+
+    def inserer(self, lot, comptes):
+        """
+        Insère un lot de commandes et de leurs lignes, puis le vide.
+        """
+        with transaction.atomic():
+            for modele, objets in lot.items():
+                modele.objects.bulk_create(objets, batch_size=self.taille_lot)
+        comptes["commandes"] += len(lot[Commande])
+        comptes["tickets"] += len(lot[Ticket])
+        comptes["paiements"] += len(lot[Paiement])
+        comptes["billets"] += len(lot[GenerationTicket])
+        for objets in lot.values():
+            objets.clear()
+        if self.progression is not None:
+            self.progression(comptes["billets"])
+
+    def generer(self, utilisateurs, billets, taux_abandon=0.15):
+        """
+        Génère le catalogue, les acheteurs, les ventes et les paniers
+        abandonnés, et retourne le nombre de lignes créées par modèle.
+        """
+        catalogue = self.catalogue()
+        acheteurs = self.utilisateurs(utilisateurs)
+        comptes = {"utilisateurs": len(acheteurs)}
+        comptes.update(self.ventes(billets, acheteurs, catalogue, taux_abandon))
+        reinitialiser_sequences()
+        return comptes
+
+
+def reinitialiser_sequences():
+    """
+    Recale les séquences des clés primaires attribuées par le générateur
+    (PostgreSQL ; sans effet sur MySQL et SQLite).
+    """
+    requetes = connection.ops.sequence_reset_sql(
+        no_style(), [Utilisateur, Commande, Ticket]
+    )
+    with connection.cursor() as curseur:
+        for requete in requetes:
+            curseur.execute(requete)
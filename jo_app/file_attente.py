@@ -0,0 +1,193 @@
+"""
+Ce module gère la file d'attente virtuelle des ouvertures de ventes.
+
+Chaque visiteur du parcours d'achat reçoit un numéro d'ordre (compteur partagé
+dans le cache). Un front d'admission avance au débit configuré, à la manière
+d'un seau à jetons : un visiteur est admis dès que son numéro est inférieur ou
+égal au front. Il reçoit alors un jeton d'admission signé et limité dans le
+temps, vérifié sans aucun accès à la base de données.
+
+Le numéro et le jeton sont liés à la session du visiteur (empreinte de son
+cookie de session, sans charger la session) : copiés dans un autre
+navigateur, ils ne valent rien. Le compteur et le front doivent être
+partagés par tous les workers ; avec un cache propre à chaque processus
+(LocMemCache), chaque worker aurait sa propre file et le débit réel serait
+multiplié par le nombre de workers, ce que signale la vérification
+verifier_cache.
+"""
+
+import time
+
+from django.conf import settings
+from django.core import checks, signing
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+CLE_SUIVANT = "file_attente:suivant"
+CLE_ADMIS = "file_attente:admis"
+CLE_DERNIERE_MAJ = "file_attente:derniere_maj"
+
+COOKIE_ADMISSION = "jo_admission"
+COOKIE_NUMERO = "jo_file_attente"
+
+SEL_ADMISSION = "jo_app.file_attente.admission"
+SEL_NUMERO = "jo_app.file_attente.numero"
+SEL_LIAISON = "jo_app.file_attente.liaison"
+
+CACHES_NON_PARTAGES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@checks.register(checks.Tags.caches)
+def verifier_cache(app_configs, **kwargs):
+    """
+    Signale une file d'attente active sur un cache propre à chaque processus.
+    """
+    if not settings.FILE_ATTENTE_ACTIVE:
+        return []
+    if settings.CACHES["default"]["BACKEND"] not in CACHES_NON_PARTAGES:
+        return []
+    return [
+        checks.Warning(
+            "La file d'attente utilise un cache propre à chaque processus : "
+            "chaque worker tient sa propre file et admet FILE_ATTENTE_DEBIT "
+            "visiteurs par seconde.",
+            hint="Définir DJANGO_CACHE_URL vers un cache partagé (Redis, "
+            "Memcached) ou désactiver FILE_ATTENTE_ACTIVE.",
+            id="jo_app.W001",
+        )
+    ]
+
+
+def _incrementer(cle, delta=1):
+    """
+    Incrémente un compteur partagé du cache, en le créant si besoin.
+    """
+    cache.add(cle, 0, timeout=None)
+    return cache.incr(cle, delta)
+
+
+def avancer_admissions(maintenant=None):
+    """
+    Fait avancer le front d'admission au débit configuré et le retourne.
+    Un seul processus avance le front par seconde ; le front ne dépasse jamais
+    le dernier numéro attribué de plus de FILE_ATTENTE_RAFALE places.
+    """
+    seconde = int(time.time() if maintenant is None else maintenant)
+    if not cache.add(f"file_attente:tick:{seconde}", True, timeout=5):
+        return cache.get(CLE_ADMIS, 0)
+
+    derniere = cache.get(CLE_DERNIERE_MAJ)
+    cache.set(CLE_DERNIERE_MAJ, seconde, timeout=None)
+    plafond = cache.get(CLE_SUIVANT, 0) + settings.FILE_ATTENTE_RAFALE
+
+    if derniere is None:
+        admis = plafond
+    else:
+        credit = max(seconde - derniere, 0) * settings.FILE_ATTENTE_DEBIT
+        admis = min(_incrementer(CLE_ADMIS, credit), plafond)
+    cache.set(CLE_ADMIS, admis, timeout=None)
+    return admis
+
+
+def liaison(request):
+    """
+    Retourne l'empreinte du cookie de session du visiteur, à laquelle ses
+    cookies de file d'attente sont liés, ou None s'il n'a pas de session.
+    """
+    cle = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not cle:
+        return None
+    return salted_hmac(SEL_LIAISON, cle).hexdigest()
+
+
+def lire_numero(valeur, empreinte):
+    """
+    Retourne le numéro d'ordre contenu dans le cookie signé s'il est lié à
+    cette session, ou None.
+    """
+    if not valeur:
+        return None
+    try:
+        numero, lie_a = signing.loads(valeur, salt=SEL_NUMERO)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    return numero if lie_a == empreinte else None
+
+
+def signer_numero(numero, empreinte):
+    """
+    Retourne la valeur signée du cookie de numéro d'ordre.
+    """
+    return signing.dumps([numero, empreinte], salt=SEL_NUMERO)
+
+
+def signer_admission(numero, empreinte):
+    """
+    Retourne un jeton d'admission signé et horodaté, lié à la session.
+    """
+    return signing.dumps([numero, empreinte], salt=SEL_ADMISSION)
+
+
+def admission_valide(request):
+    """
+    Vérifie la signature, l'expiration et la session du jeton d'admission de
+    la requête.
+    """
+    jeton = request.COOKIES.get(COOKIE_ADMISSION)
+    if not jeton:
+        return False
+    try:
+        _, lie_a = signing.loads(
+            jeton, salt=SEL_ADMISSION, max_age=settings.FILE_ATTENTE_DUREE_ADMISSION
+        )
+    except (signing.BadSignature, TypeError, ValueError):
+        return False
+    return lie_a == liaison(request)
+
+
+def position(request):
+    """
+    Retourne le numéro d'ordre du visiteur et sa position dans la file
+    (0 lorsqu'il est admis). Un numéro est attribué au premier passage.
+    """
+    admis = avancer_admissions()
+    numero = lire_numero(request.COOKIES.get(COOKIE_NUMERO), liaison(request))
+    if numero is None or numero > cache.get(CLE_SUIVANT, 0):
+        numero = _incrementer(CLE_SUIVANT)
+    return numero, max(numero - admis, 0)
+
+
+def demande_json(request):
+    """
+    Indique si la requête vient d'un script (fetch, XMLHttpRequest) et attend
+    une réponse JSON plutôt que la page d'attente.
+    """
+    script = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+    return script or "application/json" in request.headers.get("Accept", "")
+
+
+def poser_cookies(response, request, numero, admis):
+    """
+    Pose le cookie de numéro d'ordre et, si le visiteur est admis, son jeton,
+    tous deux liés à sa session.
+    """
+    empreinte = liaison(request)
+    options = {
+        "httponly": True,
+        "samesite": "Lax",
+        "secure": settings.SESSION_COOKIE_SECURE,
+    }
+    if admis:
+        response.set_cookie(
+            COOKIE_ADMISSION,
+            signer_admission(numero, empreinte),
+            max_age=settings.FILE_ATTENTE_DUREE_ADMISSION,
+            **options,
+        )
+        response.delete_cookie(COOKIE_NUMERO)
+    else:
+        response.set_cookie(COOKIE_NUMERO, signer_numero(numero, empreinte), **options)
+    return response
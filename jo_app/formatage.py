@@ -0,0 +1,51 @@
+"""
+Ce module gère le formatage en français des dates et des prix.
+
+Il remplace locale.setlocale, dont l'état est global au processus et qui se
+rabat silencieusement sur la locale "C" sur les hôtes sans fr_FR.UTF-8 :
+les tables sont précalculées, les fonctions sont sans état partagé modifiable
+et donc sûres avec des workers multi-threads ou asynchrones.
+"""
+
+from functools import lru_cache
+
+MOIS = (
+    "janvier",
+    "février",
+    "mars",
+    "avril",
+    "mai",
+    "juin",
+    "juillet",
+    "août",
+    "septembre",
+    "octobre",
+    "novembre",
+    "décembre",
+)
+
+# "1,234.50" -> "1 234,50"
+_SEPARATEURS_FR = str.maketrans({",": " ", ".": ","})
+
+
+@lru_cache(maxsize=4096)
+def formater_date(valeur):
+    """
+    Retourne une date au format "25 juillet 2024" (équivalent de "%d %B %Y").
+    """
+    return f"{valeur.day:02d} {MOIS[valeur.month - 1]} {valeur.year}"
+
+
+@lru_cache(maxsize=4096)
+def formater_prix(montant):
+    """
+    Retourne un montant avec deux décimales et séparateurs français ("1 234,50").
+    """
+    return f"{montant:,.2f}".translate(_SEPARATEURS_FR)
+
+
+def formater_euros(montant):
+    """
+    Retourne un montant suivi du symbole euro ("1 234,50€").
+    """
+    return f"{formater_prix(montant)}€"
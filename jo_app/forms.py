@@ -5,8 +5,7 @@ Ce module gère les formulaires de l'application. Dont les formulaires Utilisate
 from django import forms
 from django.contrib.auth.forms import AuthenticationForm
 from django.core.exceptions import ValidationError
-from django.utils import formats
-from django.utils.formats import localize
+from .catalogue import obtenir_catalogue
 from .models import Offre, Paiement, Sport, Ticket, Utilisateur, validate_password
 
 
@@ -123,11 +122,51 @@ class UtilisateurForm(forms.ModelForm):
         return user
 
 
+class ChoixCatalogueField(forms.ModelChoiceField):
+    """
+    Champ de choix d'un sport ou d'une offre validé avec le catalogue en mémoire,
+    sans requête à la base de données.
+    """
+
+    def __init__(self, index, **kwargs):
+        """
+        Initialise le champ avec le nom de l'index du catalogue à utiliser.
+        """
+        self.index = index
+        super().__init__(queryset=None, **kwargs)
+
+    def to_python(self, value):
+        """
+        Retourne l'objet du catalogue correspondant à la valeur choisie.
+        """
+        if value in self.empty_values:
+            return None
+        if isinstance(value, (Offre, Sport)):
+            value = value.pk
+        try:
+            return getattr(obtenir_catalogue(), self.index)[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice"
+            )
+
+
 class TicketForm(forms.ModelForm):
     """
     Formulaire pour choisir un ticket.
     """
 
+    offre = ChoixCatalogueField(
+        "offres_par_id",
+        label="Choix de l'offre",
+        widget=forms.Select(attrs={"class": "form-control", "localize": True}),
+    )
+    sport = ChoixCatalogueField(
+        "sports_par_id",
+        label="Choix du sport",
+        widget=forms.Select(attrs={"class": "form-control", "localize": True}),
+    )
+
     class Meta:
         """
         Classe Meta pour le formulaire TicketForm.
@@ -135,29 +174,28 @@ class TicketForm(forms.ModelForm):
 
         model = Ticket
         fields = ["offre", "sport"]
-        labels = {
-            "offre": "Choix de l'offre",
-            "sport": "Choix du sport",
-        }
-        widgets = {
-            "offre": forms.Select(attrs={"class": "form-control", "localize": True}),
-            "sport": forms.Select(attrs={"class": "form-control", "localize": True}),
-        }
 
     def __init__(self, *args, **kwargs):
         """
-        Initialise les champs du formulaire avec les offres et les sports disponibles.
+        Initialise les champs du formulaire avec les offres et les sports du catalogue.
         """
         super().__init__(*args, **kwargs)
-        self.fields["sport"].choices = [("", "Choisissez votre sport !")] + [
-            (sport.id, f"{sport.nom} - {formats.localize(sport.date_evenement)}")
-            for sport in Sport.objects.all()
-        ]
-
-        self.fields["offre"].choices = [("", "Choisissez votre offre !")] + [
-            (offre.id, f"{offre.type} - {formats.localize_input(offre.prix)}€")
-            for offre in Offre.objects.all()
-        ]
+        catalogue = obtenir_catalogue()
+        self.fields["sport"].choices = [
+            ("", "Choisissez votre sport !")
+        ] + catalogue.choix_sports
+        self.fields["offre"].choices = [
+            ("", "Choisissez votre offre !")
+        ] + catalogue.choix_offres
+
+    def _get_validation_exclusions(self):
+        """
+        Exclut le sport et l'offre de la validation du modèle : leur existence
+        est déjà vérifiée par le catalogue, sans requête supplémentaire.
+        """
+        exclusions = super()._get_validation_exclusions()
+        exclusions.update({"offre", "sport"})
+        return exclusions
 
 
 class PaiementForm(forms.ModelForm):
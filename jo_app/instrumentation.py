@@ -0,0 +1,258 @@
+"""
+Ce module mesure où passe le temps des requêtes.
+
+InstrumentationMiddleware ouvre une mesure par requête ; pendant la requête,
+les requêtes SQL (enveloppe ajoutée à chaque connexion), le rendu des
+gabarits (moteur DjangoTemplatesMesures) et les appels externes (Cloudinary,
+WeasyPrint, passerelle de paiement, via chronometrer) y ajoutent leur durée.
+La mesure est renvoyée au personnel dans l'en-tête Server-Timing et agrégée
+dans des histogrammes de latence par vue, en mémoire du processus : chaque
+worker a les siens.
+
+Les durées peuvent se recouvrir (une requête SQL lancée pendant le rendu
+d'un gabarit compte dans les deux).
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.template.backends.django import DjangoTemplates
+
+CATEGORIES = ("db", "gabarits", "cloudinary", "pdf", "passerelle")
+
+# Bornes supérieures des compartiments des histogrammes (millisecondes)
+SEUILS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_mesure = ContextVar("jo_mesure", default=None)
+_histogrammes = {}
+_verrou = threading.Lock()
+
+
+@dataclass
+class Mesure:
+    """
+    Durées mesurées pendant une requête (secondes).
+    """
+
+    debut: float = field(default_factory=time.perf_counter)
+    durees: dict = field(default_factory=lambda: dict.fromkeys(CATEGORIES, 0.0))
+    requetes_sql: int = 0
+    en_cours: set = field(default_factory=set)
+
+    def total(self):
+        """
+        Retourne la durée écoulée depuis le début de la requête.
+        """
+        return time.perf_counter() - self.debut
+
+
+@dataclass
+class Histogramme:
+    """
+    Histogramme des latences d'une vue, avec le cumul de chaque catégorie.
+    """
+
+    compteurs: list = field(default_factory=lambda: [0] * (len(SEUILS_MS) + 1))
+    nombre: int = 0
+    somme: float = 0.0
+    categories: dict = field(default_factory=lambda: dict.fromkeys(CATEGORIES, 0.0))
+    requetes_sql: int = 0
+
+    def ajouter(self, total, mesure):
+        """
+        Ajoute la requête à l'histogramme.
+        """
+        millisecondes = total * 1000
+        rang = next(
+            (i for i, seuil in enumerate(SEUILS_MS) if millisecondes <= seuil),
+            len(SEUILS_MS),
+        )
+        self.compteurs[rang] += 1
+        self.nombre += 1
+        self.somme += total
+        for categorie, duree in mesure.durees.items():
+            self.categories[categorie] += duree
+        self.requetes_sql += mesure.requetes_sql
+
+    def centile(self, rang):
+        """
+        Retourne la borne du compartiment qui contient le centile (ms), ou
+        None s'il est au-delà du dernier seuil.
+        """
+        cible = self.nombre * rang / 100
+        cumul = 0
+        for seuil, compteur in zip(SEUILS_MS, self.compteurs):
+            cumul += compteur
+            if cumul >= cible:
+                return seuil
+        return None
+
+
+def demarrer():
+    """
+    Ouvre la mesure de la requête en cours et retourne le jeton à rendre à
+    terminer.
+    """
+    return _mesure.set(Mesure())
+
+
+def terminer(jeton, vue):
+    """
+    Ferme la mesure, l'ajoute à l'histogramme de la vue et la retourne avec
+    sa durée totale.
+    """
+    mesure = _mesure.get()
+    _mesure.reset(jeton)
+    total = mesure.total()
+    with _verrou:
+        _histogrammes.setdefault(vue, Histogramme()).ajouter(total, mesure)
+    return mesure, total
+
+
+@contextmanager
+def chronometrer(categorie):
+    """
+    Ajoute la durée du bloc à la catégorie de la mesure en cours. Un bloc
+    imbriqué dans un bloc de la même catégorie n'est compté qu'une fois.
+    """
+    mesure = _mesure.get()
+    if mesure is None or categorie in mesure.en_cours:
+        yield
+        return
+    mesure.en_cours.add(categorie)
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        mesure.durees[categorie] += time.perf_counter() - debut
+        mesure.en_cours.discard(categorie)
+
+
+def enveloppe_sql(execute, sql, params, many, context):
+    """
+    Compte la requête SQL et mesure sa durée (voir connection.execute_wrapper).
+    """
+    mesure = _mesure.get()
+    if mesure is None:
+        return execute(sql, params, many, context)
+    mesure.requetes_sql += 1
+    with chronometrer("db"):
+        return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def instrumenter_connexion(sender, connection, **kwargs):
+    """
+    Ajoute l'enveloppe de mesure à la connexion, une seule fois pour toute sa
+    durée de vie. Elle est placée en tête : execute_wrapper() retire la
+    dernière enveloppe de la liste en sortie de bloc.
+    """
+    if enveloppe_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, enveloppe_sql)
+
+
+def server_timing(mesure, total):
+    """
+    Retourne la valeur de l'en-tête Server-Timing de la mesure.
+    """
+    entrees = [f"total;dur={total * 1000:.1f}"]
+    for categorie, duree in mesure.durees.items():
+        if duree or (categorie == "db" and mesure.requetes_sql):
+            description = (
+                f';desc="{mesure.requetes_sql} SQL"' if categorie == "db" else ""
+            )
+            entrees.append(f"{categorie};dur={duree * 1000:.1f}{description}")
+    return ", ".join(entrees)
+
+
+def histogrammes():
+    """
+    Retourne une copie des histogrammes du processus, par vue.
+    """
+    with _verrou:
+        return {
+            vue: Histogramme(
+                list(h.compteurs), h.nombre, h.somme, dict(h.categories), h.requetes_sql
+            )
+            for vue, h in _histogrammes.items()
+        }
+
+
+def instantane():
+    """
+    Retourne les histogrammes du processus sous une forme sérialisable en JSON.
+    """
+    vues = {}
+    for vue, h in sorted(histogrammes().items()):
+        bornes = [str(seuil) for seuil in SEUILS_MS] + ["+Inf"]
+        vues[vue] = {
+            "nombre": h.nombre,
+            "moyenne_ms": round(h.somme * 1000 / h.nombre, 1),
+            "p50_ms": h.centile(50),
+            "p95_ms": h.centile(95),
+            "p99_ms": h.centile(99),
+            "requetes_sql": round(h.requetes_sql / h.nombre, 1),
+            "categories_ms": {
+                categorie: round(duree * 1000 / h.nombre, 1)
+                for categorie, duree in h.categories.items()
+            },
+            "compartiments": dict(zip(bornes, h.compteurs)),
+        }
+    return {"pid": os.getpid(), "vues": vues}
+
+
+def reinitialiser():
+    """
+    Vide les histogrammes du processus.
+    """
+    with _verrou:
+        _histogrammes.clear()
+
+
+class GabaritMesure:
+    """
+    Gabarit dont le rendu est chronométré.
+    """
+
+    def __init__(self, gabarit):
+        """
+        Enveloppe le gabarit du moteur Django.
+        """
+        self.gabarit = gabarit
+
+    def __getattr__(self, nom):
+        """
+        Délègue les autres attributs au gabarit.
+        """
+        return getattr(self.gabarit, nom)
+
+    def render(self, context=None, request=None):
+        """
+        Rend le gabarit en mesurant la durée du rendu.
+        """
+        with chronometrer("gabarits"):
+            return self.gabarit.render(context, request)
+
+
+class DjangoTemplatesMesures(DjangoTemplates):
+    """
+    Moteur de gabarits Django dont les rendus sont chronométrés.
+    """
+
+    def from_string(self, template_code):
+        """
+        Compile le gabarit donné sous forme de texte.
+        """
+        return GabaritMesure(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        """
+        Charge le gabarit demandé.
+        """
+        return GabaritMesure(super().get_template(template_name))
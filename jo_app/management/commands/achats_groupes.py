@@ -0,0 +1,145 @@
+"""
+Ce module contient la commande de gestion des achats groupés des partenaires.
+Sans argument, elle liste les derniers achats ; avec --jeton, elle crée le
+jeton d'API d'un partenaire ; avec --traiter, elle émet les billets des
+achats inachevés (voir jo_app.achats_groupes). Un achat en échec
+ACHATS_GROUPES_TENTATIVES_MAX fois n'est plus repris, sauf avec
+--relancer-echecs.
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from jo_app.achats_groupes import (
+    PERMISSION,
+    accorder_permission,
+    creer_jeton,
+    traiter,
+)
+from jo_app.models import AchatGroupe
+
+
+class Command(BaseCommand):
+    """
+    Commande de gestion des achats groupés.
+    """
+
+    help = "Liste ou traite les achats groupés, ou crée un jeton de partenaire."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "--jeton",
+            metavar="EMAIL",
+            help="Crée le jeton d'API de ce partenaire.",
+        )
+        parser.add_argument(
+            "--accorder",
+            action="store_true",
+            help="Avec --jeton, accorde la permission acheter_en_gros.",
+        )
+        parser.add_argument(
+            "--traiter",
+            action="store_true",
+            help=(
+                "Émet les billets des achats en attente, en cours ou en échec "
+                "moins de ACHATS_GROUPES_TENTATIVES_MAX fois."
+            ),
+        )
+        parser.add_argument(
+            "--relancer-echecs",
+            action="store_true",
+            help=(
+                "Avec --traiter, remet à zéro les échecs des achats en échec "
+                "pour les reprendre."
+            ),
+        )
+        parser.add_argument(
+            "--boucle",
+            type=float,
+            metavar="SECONDES",
+            help="Avec --traiter, recommence à cet intervalle jusqu'à interruption.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=20, help="Nombre d'achats listés."
+        )
+
+    def handle(self, *args, **options):
+        """
+        Exécute l'action demandée.
+        """
+        if options["jeton"]:
+            self.creer_jeton(options["jeton"], options["accorder"])
+        elif options["traiter"]:
+            if options["relancer_echecs"]:
+                relances = AchatGroupe.objects.filter(statut=AchatGroupe.ECHOUE).update(
+                    echecs=0
+                )
+                self.stdout.write(f"{relances} achat(s) en échec relancé(s).")
+            while True:
+                self.traiter()
+                if options["boucle"] is None:
+                    break
+                time.sleep(options["boucle"])
+        else:
+            self.lister(options["top"])
+
+    def creer_jeton(self, email, accorder):
+        """
+        Affiche le jeton d'API du partenaire.
+        """
+        partenaire = get_user_model().objects.filter(email=email).first()
+        if partenaire is None:
+            raise CommandError(f"Utilisateur introuvable : {email}")
+        if accorder:
+            accorder_permission(partenaire)
+            partenaire = get_user_model().objects.get(pk=partenaire.pk)
+        if not partenaire.has_perm(PERMISSION):
+            raise CommandError(
+                f"{email} n'a pas la permission acheter_en_gros (voir --accorder)."
+            )
+        self.stdout.write("Jeton d'API (en-tête Authorization) :")
+        self.stdout.write(f"  Bearer {creer_jeton(partenaire)}")
+
+    def traiter(self):
+        """
+        Émet les billets des achats inachevés, du plus ancien au plus récent,
+        sauf ceux en échec ACHATS_GROUPES_TENTATIVES_MAX fois.
+        """
+        maximum = settings.ACHATS_GROUPES_TENTATIVES_MAX
+        inacheves = AchatGroupe.objects.exclude(statut=AchatGroupe.TERMINE).filter(
+            echecs__lt=maximum
+        )
+        for achat_id in inacheves.order_by("id").values_list("id", flat=True):
+            try:
+                achat = traiter(achat_id)
+            except Exception as e:
+                self.stderr.write(f"Achat groupé {achat_id} en échec : {e}")
+                echecs = AchatGroupe.objects.get(pk=achat_id).echecs
+                if echecs >= maximum:
+                    self.stderr.write(
+                        f"Achat groupé {achat_id} abandonné après {echecs} "
+                        "échecs (voir --relancer-echecs)."
+                    )
+            else:
+                self.stdout.write(
+                    f"Achat groupé {achat.id} : "
+                    f"{achat.billets_emis}/{achat.billets_demandes} billets"
+                )
+
+    def lister(self, top):
+        """
+        Liste les derniers achats groupés.
+        """
+        achats = AchatGroupe.objects.select_related("partenaire").order_by("-id")
+        for achat in achats[:top]:
+            self.stdout.write(
+                f"{achat.id:>6}  {achat.date_creation:%Y-%m-%d %H:%M}  "
+                f"{achat.partenaire.email:<30}{achat.statut:<12}"
+                f"{achat.billets_emis:>8}/{achat.billets_demandes}"
+            )
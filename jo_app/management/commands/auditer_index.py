@@ -0,0 +1,132 @@
+"""
+Ce module contient la commande d'audit des index.
+Elle exécute EXPLAIN sur les requêtes ORM des vues et signale les parcours
+complets de table, pour que la couverture des index reste vérifiée.
+"""
+
+import json
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from jo_app.models import GenerationTicket, Sport, Ticket
+
+# Motifs de parcours complet selon le moteur (SQLite, PostgreSQL).
+MOTIFS_SCAN_COMPLET = {
+    "sqlite": re.compile(r"\bSCAN (\w+)\b(?! USING)"),
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+}
+
+
+def requetes_par_vue(utilisateur_id=0, sport_nom="", billet_id=0, cle=""):
+    """
+    Retourne les requêtes ORM filtrées des vues, sous la forme (vue, requête).
+    Les agrégations globales de ventes_view et les listes complètes du
+    catalogue parcourent volontairement toute la table et ne sont pas auditées.
+    """
+    panier = Ticket.objects.filter(utilisateur_id=utilisateur_id, est_achete=False)
+    return [
+        ("ticket_create_view", Sport.objects.filter(nom=sport_nom)),
+        ("panier_view", panier),
+        ("paiement_view", panier),
+        ("maj_quantite_view", panier),
+        (
+            "mes_commandes_view",
+            Ticket.objects.filter(utilisateur_id=utilisateur_id, est_achete=True),
+        ),
+        (
+            "mes_commandes_view",
+            GenerationTicket.objects.filter(ticket__utilisateur_id=utilisateur_id),
+        ),
+        (
+            "telecharger_billet_view",
+            GenerationTicket.objects.filter(
+                id=billet_id, ticket__utilisateur_id=utilisateur_id
+            ),
+        ),
+        ("scan", GenerationTicket.objects.filter(cle_securisee_2=cle)),
+        (
+            "purger_paniers",
+            Ticket.objects.filter(est_achete=False, date_creation__lt=timezone.now()),
+        ),
+    ]
+
+
+def tables_parcourues(vendor, plan):
+    """
+    Retourne les tables parcourues entièrement d'après le plan d'exécution.
+    """
+    if vendor == "mysql":
+        tables = []
+
+        def parcourir(noeud):
+            if isinstance(noeud, dict):
+                if noeud.get("access_type") == "ALL":
+                    tables.append(noeud.get("table_name", "?"))
+                for valeur in noeud.values():
+                    parcourir(valeur)
+            elif isinstance(noeud, list):
+                for valeur in noeud:
+                    parcourir(valeur)
+
+        parcourir(json.loads(plan))
+        return tables
+
+    motif = MOTIFS_SCAN_COMPLET.get(vendor)
+    if motif is None:
+        raise CommandError(f"Moteur de base de données non supporté : {vendor}.")
+    return motif.findall(plan)
+
+
+class Command(BaseCommand):
+    """
+    Commande d'audit des index des requêtes des vues.
+    """
+
+    help = "Exécute EXPLAIN sur les requêtes des vues et signale les parcours complets."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "--strict",
+            action="store_true",
+            help="Échoue si au moins un parcours complet est détecté.",
+        )
+        parser.add_argument(
+            "--plans",
+            action="store_true",
+            help="Affiche le plan d'exécution complet de chaque requête.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Audite chaque requête et affiche un résumé.
+        """
+        vendor = connection.vendor
+        explain_options = {"format": "json"} if vendor == "mysql" else {}
+        alertes = 0
+
+        for vue, requete in requetes_par_vue():
+            plan = requete.explain(**explain_options)
+            tables = tables_parcourues(vendor, plan)
+            if tables:
+                alertes += 1
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"[SCAN COMPLET] {vue} : {', '.join(sorted(set(tables)))}"
+                    )
+                )
+            else:
+                self.stdout.write(f"[OK] {vue}")
+            if options["plans"]:
+                self.stdout.write(plan)
+
+        if alertes and options["strict"]:
+            raise CommandError(f"{alertes} requête(s) sans index adapté.")
+        self.stdout.write(
+            self.style.SUCCESS(f"Audit terminé : {alertes} parcours complet(s).")
+        )
@@ -0,0 +1,87 @@
+"""
+Ce module contient la commande de génération de données synthétiques :
+acheteurs, catalogue, commandes payées avec leurs tickets, paiements et
+billets, et paniers abandonnés, en volumes configurables (jusqu'à plusieurs
+millions de billets). Voir jo_app.donnees pour les distributions utilisées.
+
+À lancer sur une base dédiée aux mesures : les lignes générées s'ajoutent aux
+données existantes.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jo_app.donnees import GenerateurDonnees
+
+
+class Command(BaseCommand):
+    """
+    Commande de génération de données synthétiques.
+    """
+
+    help = "Génère des acheteurs, des commandes et des billets synthétiques."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "--utilisateurs",
+            type=int,
+            default=10000,
+            help="Nombre d'acheteurs à créer.",
+        )
+        parser.add_argument(
+            "--billets",
+            type=int,
+            default=100000,
+            help="Nombre de billets vendus à créer.",
+        )
+        parser.add_argument(
+            "--taux-abandon",
+            type=float,
+            default=0.15,
+            help="Paniers abandonnés par ticket vendu (0.15 = 15 %%).",
+        )
+        parser.add_argument(
+            "--graine", type=int, default=2024, help="Graine des tirages."
+        )
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=5000,
+            help="Nombre de billets insérés par transaction.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Génère les données et affiche le nombre de lignes créées.
+        """
+        if options["utilisateurs"] < 1:
+            raise CommandError("Il faut au moins un acheteur.")
+        debut = time.perf_counter()
+
+        def progression(billets):
+            """
+            Affiche l'avancement après chaque lot.
+            """
+            self.stdout.write(f"\r{billets}/{options['billets']} billets", ending="")
+            self.stdout.flush()
+
+        generateur = GenerateurDonnees(
+            graine=options["graine"],
+            taille_lot=options["taille_lot"],
+            progression=progression,
+        )
+        comptes = generateur.generer(
+            options["utilisateurs"], options["billets"], options["taux_abandon"]
+        )
+        self.stdout.write("")
+        for nom, nombre in comptes.items():
+            self.stdout.write(f"{nom:<20}{nombre:>12}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Données générées en {time.perf_counter() - debut:.1f} s."
+            )
+        )
@@ -0,0 +1,72 @@
+"""
+Ce module contient la commande de génération des QR codes manquants.
+
+Les billets des commandes et des achats groupés sont émis sans QR code ;
+celui-ci est généré au premier téléchargement du billet, ou en avance par
+cette commande (par exemple après un gros achat, avant l'envoi des billets
+au partenaire). Un billet en échec est signalé puis laissé sans QR code,
+pour un prochain passage.
+"""
+
+from django.core.management.base import BaseCommand
+
+from jo_app.models import GenerationTicket
+from jo_app.qr_codes import completer_qr_code
+
+
+class Command(BaseCommand):
+    """
+    Commande de génération des QR codes manquants.
+    """
+
+    help = "Génère et héberge les QR codes des billets qui n'en ont pas."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "--commande",
+            type=int,
+            help="Se limite aux billets de cette commande.",
+        )
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=500,
+            help="Nombre de billets lus par requête.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Parcourt les billets sans QR code par identifiant croissant.
+        """
+        billets = GenerationTicket.objects.filter(qr_code__isnull=True).select_related(
+            "ticket__utilisateur"
+        )
+        if options["commande"]:
+            billets = billets.filter(ticket__commande_id=options["commande"])
+
+        total = 0
+        echecs = 0
+        dernier = 0
+        while True:
+            lot = list(
+                billets.filter(id__gt=dernier).order_by("id")[: options["taille_lot"]]
+            )
+            if not lot:
+                break
+            for billet in lot:
+                try:
+                    completer_qr_code(billet)
+                except Exception as e:
+                    echecs += 1
+                    self.stderr.write(f"Billet {billet.id} : {e}")
+            total += len(lot)
+            dernier = lot[-1].id
+            self.stdout.write(f"{total - echecs} QR codes générés")
+        message = f"{total - echecs} QR codes générés au total."
+        if echecs:
+            self.stdout.write(self.style.WARNING(f"{message} {echecs} en échec."))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,177 @@
+"""
+Ce module contient la commande de comparaison de la concurrence WSGI et ASGI.
+Elle ajoute à chaque requête une latence d'entrée-sortie simulée (l'attente
+d'un service externe, comme Cloudinary ou la passerelle de paiement) et
+compare le débit d'un point d'accès servi par un pool de threads (worker
+WSGI à N threads) et par une boucle d'évènements (worker ASGI).
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from jo_app.middleware import MiddlewareHybride
+from jo_app.models import Sport
+
+
+class LatenceInjecteeMiddleware(MiddlewareHybride):
+    """
+    Simule l'attente d'un service externe : bloquante en WSGI, sans bloquer
+    la boucle d'évènements en ASGI.
+    """
+
+    def __call__(self, request):
+        """
+        Attend la latence simulée puis traite la requête.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        time.sleep(settings.LATENCE_INJECTEE)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        """
+        Version asynchrone de __call__.
+        """
+        await asyncio.sleep(settings.LATENCE_INJECTEE)
+        return await self.get_response(request)
+
+
+def mesurer_wsgi(chemin, threads, requetes):
+    """
+    Envoie les requêtes depuis `threads` threads et retourne la durée totale
+    et la durée de chaque requête.
+    """
+    locaux = threading.local()
+
+    def appeler(_):
+        """
+        Envoie une requête avec le client du thread.
+        """
+        if not hasattr(locaux, "client"):
+            locaux.client = Client()
+        debut = time.perf_counter()
+        reponse = locaux.client.get(chemin)
+        if reponse.status_code != 200:
+            raise CommandError(f"{chemin} : {reponse.status_code}")
+        return time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executeur:
+        durees = list(executeur.map(appeler, range(requetes)))
+    return time.perf_counter() - debut, durees
+
+
+async def mesurer_asgi(chemin, concurrence, requetes):
+    """
+    Envoie les requêtes avec au plus `concurrence` requêtes en cours et
+    retourne la durée totale et la durée de chaque requête.
+    """
+    client = AsyncClient()
+    places = asyncio.Semaphore(concurrence)
+
+    async def appeler():
+        """
+        Envoie une requête dès qu'une place se libère.
+        """
+        async with places:
+            debut = time.perf_counter()
+            reponse = await client.get(chemin)
+            if reponse.status_code != 200:
+                raise CommandError(f"{chemin} : {reponse.status_code}")
+            return time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    durees = await asyncio.gather(*(appeler() for _ in range(requetes)))
+    return time.perf_counter() - debut, durees
+
+
+def centile(durees, rang):
+    """
+    Retourne le centile demandé des durées, en millisecondes.
+    """
+    durees = sorted(durees)
+    return durees[min(len(durees) - 1, int(len(durees) * rang / 100))] * 1000
+
+
+class Command(BaseCommand):
+    """
+    Commande de comparaison de la concurrence WSGI et ASGI.
+    """
+
+    help = "Compare le débit WSGI (threads) et ASGI sous latence simulée."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "--latence",
+            type=float,
+            default=0.05,
+            help="Latence simulée par requête (en secondes).",
+        )
+        parser.add_argument(
+            "--threads", type=int, default=8, help="Threads du worker WSGI."
+        )
+        parser.add_argument(
+            "--concurrence",
+            type=int,
+            default=500,
+            help="Requêtes simultanées au plus en ASGI.",
+        )
+        parser.add_argument("--requetes", type=int, default=2000)
+        parser.add_argument(
+            "--chemin",
+            default="",
+            help="Point d'accès mesuré (date du premier sport par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Mesure les deux modes et affiche débit et latences.
+        """
+        chemin = options["chemin"]
+        if not chemin:
+            sport = Sport.objects.order_by("pk").first()
+            if sport is None:
+                raise CommandError("Aucun sport en base : préciser --chemin.")
+            chemin = reverse("get_sport_date", args=[sport.id])
+
+        reglages = override_settings(
+            MIDDLEWARE=[
+                *settings.MIDDLEWARE,
+                "jo_app.management.commands.mesurer_concurrence."
+                "LatenceInjecteeMiddleware",
+            ],
+            LATENCE_INJECTEE=options["latence"],
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+        )
+        requetes = options["requetes"]
+        with reglages:
+            resultats = {
+                f"WSGI ({options['threads']} threads)": mesurer_wsgi(
+                    chemin, options["threads"], requetes
+                ),
+                f"ASGI ({options['concurrence']} simultanées)": asyncio.run(
+                    mesurer_asgi(chemin, options["concurrence"], requetes)
+                ),
+            }
+
+        self.stdout.write(
+            f"{chemin}, latence simulée {options['latence'] * 1000:.0f} ms, "
+            f"{requetes} requêtes"
+        )
+        for mode, (duree, durees) in resultats.items():
+            self.stdout.write(
+                f"{mode:<28}{requetes / duree:>10.1f} r/s"
+                f"  p50 {centile(durees, 50):>8.1f} ms"
+                f"  p95 {centile(durees, 95):>8.1f} ms"
+            )
@@ -0,0 +1,166 @@
+"""
+Ce module contient la commande de mesure du débit selon la gestion des
+connexions à la base. Chaque configuration (connexions non persistantes,
+persistantes, pool) est mesurée dans un processus neuf, qui appelle
+l'application WSGI depuis plusieurs threads sur sport_list_view et panier_view.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import reverse
+
+CONFIGURATIONS = {
+    "sans persistance": {"DJANGO_DB_POOL": "False", "DJANGO_DB_CONN_MAX_AGE": "0"},
+    "persistantes": {"DJANGO_DB_POOL": "False", "DJANGO_DB_CONN_MAX_AGE": "60"},
+    "pool": {"DJANGO_DB_POOL": "True"},
+}
+
+VUES = ("sports_list", "panier")
+
+SCRIPT_WORKER = """
+import django, json
+django.setup()
+from jo_app.management.commands.mesurer_connexions import mesurer
+print(json.dumps(mesurer(%r, %r, %r)))
+"""
+
+
+def ouvrir_session(utilisateur):
+    """
+    Crée et retourne une session authentifiée pour l'utilisateur.
+    """
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = utilisateur._meta.pk.value_to_string(utilisateur)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = utilisateur.get_session_auth_hash()
+    session.create()
+    return session
+
+
+def mesurer_vue(application, environ, threads, requetes):
+    """
+    Appelle l'application depuis `threads` threads, `requetes` fois chacun,
+    et retourne le nombre de requêtes par seconde.
+    """
+
+    def demarrer_reponse(statut, entetes, exc_info=None):
+        """
+        Vérifie le statut de la réponse.
+        """
+        if not statut.startswith("200"):
+            raise RuntimeError(f"{environ['PATH_INFO']} : {statut}")
+
+    def travailler():
+        """
+        Enchaîne les requêtes, en fermant chaque réponse comme un serveur WSGI.
+        """
+        for _ in range(requetes):
+            reponse = application(dict(environ), demarrer_reponse)
+            for _ in reponse:
+                pass
+            reponse.close()
+
+    travailler()  # Requêtes de chauffe, hors mesure.
+    travailleurs = [threading.Thread(target=travailler) for _ in range(threads)]
+    debut = time.perf_counter()
+    for travailleur in travailleurs:
+        travailleur.start()
+    for travailleur in travailleurs:
+        travailleur.join()
+    return threads * requetes / (time.perf_counter() - debut)
+
+
+def mesurer(email, threads, requetes):
+    """
+    Mesure le débit de chaque vue dans la configuration du processus courant.
+    """
+    from django.core.wsgi import get_wsgi_application
+
+    from jo_app.models import Utilisateur
+
+    application = get_wsgi_application()
+    utilisateurs = Utilisateur.objects.order_by("pk")
+    utilisateur = utilisateurs.get(email=email) if email else utilisateurs.first()
+    if utilisateur is None:
+        raise CommandError("Aucun utilisateur en base pour mesurer le panier.")
+    session = ouvrir_session(utilisateur)
+    hote = settings.ALLOWED_HOSTS[0].lstrip("*.") or "localhost"
+    fabrique = RequestFactory(
+        HTTP_COOKIE=f"{settings.SESSION_COOKIE_NAME}={session.session_key}",
+        HTTP_HOST=hote,
+    )
+    try:
+        return {
+            vue: mesurer_vue(
+                application,
+                fabrique.get(reverse(vue), secure=True).environ,
+                threads,
+                requetes,
+            )
+            for vue in VUES
+        }
+    finally:
+        session.delete()
+
+
+class Command(BaseCommand):
+    """
+    Commande de comparaison du débit avec et sans pool de connexions.
+    """
+
+    help = "Compare le débit des vues selon la gestion des connexions à la base."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument("--threads", type=int, default=4)
+        parser.add_argument(
+            "--requetes", type=int, default=200, help="Requêtes par thread et par vue."
+        )
+        parser.add_argument(
+            "--email", default="", help="Utilisateur dont le panier est mesuré."
+        )
+        parser.add_argument(
+            "--configurations",
+            nargs="+",
+            choices=list(CONFIGURATIONS),
+            default=list(CONFIGURATIONS),
+        )
+
+    def handle(self, *args, **options):
+        """
+        Mesure chaque configuration dans un processus neuf et affiche le débit.
+        """
+        self.stdout.write(f"{'configuration':<20}" + "".join(f"{v:>16}" for v in VUES))
+        for nom in options["configurations"]:
+            env = dict(os.environ, **CONFIGURATIONS[nom])
+            processus = subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    SCRIPT_WORKER
+                    % (options["email"], options["threads"], options["requetes"]),
+                ],
+                capture_output=True,
+                text=True,
+                env=env,
+            )
+            if processus.returncode != 0:
+                raise CommandError(
+                    f"{nom} : {processus.stderr.strip().splitlines()[-1]}"
+                )
+            debits = json.loads(processus.stdout.strip().splitlines()[-1])
+            self.stdout.write(
+                f"{nom:<20}" + "".join(f"{debits[vue]:>12.1f} r/s" for vue in VUES)
+            )
@@ -0,0 +1,126 @@
+"""
+Ce module contient la commande de mesure du démarrage d'un worker.
+Elle démarre l'application WSGI dans un processus neuf lancé avec
+python -X importtime, puis rapporte la durée totale des imports, les modules
+les plus coûteux (temps propre), la mémoire résidente (RSS) et les
+bibliothèques lourdes chargées dès le démarrage.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+# Bibliothèques qui ne doivent être chargées qu'à la première utilisation.
+MODULES_DIFFERES = ("weasyprint", "fontTools", "pydyf", "qrcode", "PIL")
+
+SCRIPT_WORKER = """
+import json, resource, sys
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+from importlib import import_module
+
+application = get_wsgi_application()
+import_module(settings.ROOT_URLCONF)
+print(json.dumps({
+    "rss_ko": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules_charges": [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def analyser_importtime(sortie):
+    """
+    Retourne la liste (module, temps propre, temps cumulé, profondeur) des
+    imports, en microsecondes, à partir de la sortie de python -X importtime.
+    """
+    modules = []
+    for ligne in sortie.splitlines():
+        if not ligne.startswith("import time:"):
+            continue
+        propre, cumul, nom = ligne[len("import time:") :].split("|")
+        if not cumul.strip().isdigit():
+            continue
+        nom = nom[1:]
+        profondeur = (len(nom) - len(nom.lstrip())) // 2
+        modules.append((nom.strip(), int(propre), int(cumul), profondeur))
+    return modules
+
+
+class Command(BaseCommand):
+    """
+    Commande de mesure du temps de démarrage et de la mémoire d'un worker.
+    """
+
+    help = "Mesure le temps d'import et la mémoire d'un worker neuf."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "--top", type=int, default=15, help="Nombre de modules affichés."
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Affiche le résultat en JSON."
+        )
+        parser.add_argument(
+            "--seuil-ms",
+            type=float,
+            default=None,
+            help="Échoue si la durée totale des imports dépasse ce seuil.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Lance le worker de mesure et affiche le rapport.
+        """
+        env = dict(os.environ)
+        env.setdefault("DJANGO_SETTINGS_MODULE", "jo_projet.settings")
+        processus = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                SCRIPT_WORKER % (MODULES_DIFFERES,),
+            ],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        if processus.returncode != 0:
+            raise CommandError(processus.stderr.strip().splitlines()[-1])
+
+        worker = json.loads(processus.stdout.strip().splitlines()[-1])
+        modules = analyser_importtime(processus.stderr)
+        total_ms = sum(m[2] for m in modules if m[3] == 0) / 1000
+        plus_couteux = sorted(modules, key=lambda m: -m[1])[: options["top"]]
+        rapport = {
+            "imports_ms": round(total_ms, 1),
+            "rss_mo": round(worker["rss_ko"] / 1024, 1),
+            "modules_differes_charges": worker["modules_charges"],
+            "plus_couteux": [
+                {"module": nom, "ms": round(propre / 1000, 1)}
+                for nom, propre, _, _ in plus_couteux
+            ],
+        }
+
+        if options["json"]:
+            self.stdout.write(json.dumps(rapport, indent=2))
+        else:
+            self.stdout.write(f"Durée des imports : {rapport['imports_ms']} ms")
+            self.stdout.write(f"Mémoire résidente : {rapport['rss_mo']} Mo")
+            charges = ", ".join(worker["modules_charges"]) or "aucune"
+            self.stdout.write(
+                f"Bibliothèques lourdes chargées au démarrage : {charges}"
+            )
+            for module in rapport["plus_couteux"]:
+                self.stdout.write(f"{module['ms']:>10.1f} ms  {module['module']}")
+
+        if options["seuil_ms"] is not None and total_ms > options["seuil_ms"]:
+            raise CommandError(
+                f"Démarrage trop lent : {total_ms:.1f} ms > {options['seuil_ms']} ms."
+            )
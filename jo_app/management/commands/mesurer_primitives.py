@@ -0,0 +1,210 @@
+"""
+Ce module contient la commande de micro-mesure des primitives coûteuses :
+génération des QR codes, rendu PDF d'un billet, total du panier, construction
+de TicketForm et agrégations de ventes_view sur 10 000 à 1 000 000 de billets.
+
+Chaque primitive est chronométrée dans une base de test créée pour l'occasion
+(meilleur temps sur plusieurs répétitions). Les résultats sont comparés à une
+référence enregistrée avec --enregistrer : une primitive plus lente que sa
+référence au-delà de --seuil fait échouer la commande.
+"""
+
+import json
+import timeit
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import setup_databases, teardown_databases
+
+from jo_app.catalogue import obtenir_catalogue
+from jo_app.donnees import GenerateurDonnees
+from jo_app.forms import TicketForm
+from jo_app.models import GenerationTicket, Offre, Ticket, Utilisateur
+from jo_app.prechauffage import rendre_billet_factice
+from jo_app.qr_codes import generer_qr_code
+from jo_app.views import ventes_view
+
+REPETITIONS = 5
+TAILLE_LOT = 5000
+GRAINE = 2024
+
+
+def preparer_qr_code():
+    """
+    Génère le QR code d'un billet (qrcode puis encodage PNG).
+    """
+    cle = "a" * 128
+    return lambda: generer_qr_code(cle)
+
+
+def preparer_pdf_billet():
+    """
+    Rend billet_pdf.html puis le PDF du billet avec WeasyPrint.
+    """
+    return rendre_billet_factice
+
+
+def preparer_prix_panier():
+    """
+    Additionne get_prix_total sur un panier de 50 tickets.
+    """
+    offres = [Offre(type=f"offre {i}", prix=Decimal(f"{50 + i}.00")) for i in range(3)]
+    panier = [Ticket(offre=offres[i % 3], quantite=1 + i % 4) for i in range(50)]
+    return lambda: sum(ticket.get_prix_total() for ticket in panier)
+
+
+def preparer_ticket_form():
+    """
+    Construit un TicketForm (catalogue déjà en mémoire).
+    """
+    GenerateurDonnees(graine=GRAINE).catalogue()
+    obtenir_catalogue()
+    return TicketForm
+
+
+def peupler_ventes(volume):
+    """
+    Complète la base jusqu'à `volume` billets vendus, avec le générateur de
+    données synthétiques (200 acheteurs, graine fixe).
+    """
+    generateur = GenerateurDonnees(graine=GRAINE, taille_lot=TAILLE_LOT)
+    catalogue = generateur.catalogue()
+    acheteurs = list(Utilisateur.objects.values_list("pk", flat=True)[:200])
+    if not acheteurs:
+        acheteurs = generateur.utilisateurs(200)
+    restants = volume - GenerationTicket.objects.count()
+    if restants > 0:
+        generateur.ventes(restants, acheteurs, catalogue)
+
+
+def preparer_ventes(volume):
+    """
+    Retourne l'appel de ventes_view (agrégations et rendu) sur `volume` billets.
+    """
+    peupler_ventes(volume)
+    request = RequestFactory().get("/ventes/")
+    request.user = Utilisateur.objects.first()
+    return lambda: ventes_view(request)
+
+
+PRIMITIVES = {
+    "qr_code": preparer_qr_code,
+    "pdf_billet": preparer_pdf_billet,
+    "prix_panier": preparer_prix_panier,
+    "ticket_form": preparer_ticket_form,
+}
+
+
+def mesurer(fonction, repetitions=REPETITIONS):
+    """
+    Retourne la durée d'un appel de la fonction en secondes : le meilleur
+    temps sur `repetitions` séries d'au moins 0,2 seconde.
+    """
+    chrono = timeit.Timer(fonction)
+    nombre, _ = chrono.autorange()
+    return min(chrono.repeat(repeat=repetitions, number=nombre)) / nombre
+
+
+def regressions(resultats, reference, seuil):
+    """
+    Retourne les primitives plus lentes que leur référence au-delà du seuil,
+    sous la forme (nom, durée, référence, écart relatif).
+    """
+    return [
+        (nom, duree, reference[nom], duree / reference[nom] - 1)
+        for nom, duree in resultats.items()
+        if nom in reference and duree > reference[nom] * (1 + seuil)
+    ]
+
+
+class Command(BaseCommand):
+    """
+    Commande de micro-mesure des primitives coûteuses.
+    """
+
+    help = "Mesure les primitives coûteuses et les compare à leur référence."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "primitives",
+            nargs="*",
+            help="Primitives à mesurer (toutes par défaut) : "
+            + ", ".join([*PRIMITIVES, "ventes"]),
+        )
+        parser.add_argument(
+            "--volumes",
+            default="10000,100000",
+            help="Nombres de billets des mesures de ventes_view (ex. 10000,1000000).",
+        )
+        parser.add_argument(
+            "--reference",
+            default=str(Path(settings.BASE_DIR) / "mesures_primitives.json"),
+            help="Fichier des durées de référence.",
+        )
+        parser.add_argument(
+            "--enregistrer",
+            action="store_true",
+            help="Enregistre les durées mesurées comme référence.",
+        )
+        parser.add_argument(
+            "--seuil",
+            type=float,
+            default=0.2,
+            help="Ralentissement toléré par rapport à la référence (0.2 = 20 %%).",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        """
+        Mesure les primitives dans une base de test, puis compare ou enregistre.
+        """
+        choisies = options["primitives"] or [*PRIMITIVES, "ventes"]
+        inconnues = set(choisies) - {*PRIMITIVES, "ventes"}
+        if inconnues:
+            raise CommandError(f"Primitives inconnues : {', '.join(inconnues)}")
+        volumes = sorted(int(v) for v in options["volumes"].split(","))
+
+        preparations = [(nom, PRIMITIVES[nom]) for nom in choisies if nom != "ventes"]
+        if "ventes" in choisies:
+            preparations += [
+                (f"ventes_{volume}", lambda volume=volume: preparer_ventes(volume))
+                for volume in volumes
+            ]
+
+        bases = setup_databases(verbosity=0, interactive=False, aliases={"default"})
+        try:
+            resultats = {nom: mesurer(preparer()) for nom, preparer in preparations}
+        finally:
+            teardown_databases(bases, verbosity=0)
+
+        fichier = Path(options["reference"])
+        reference = json.loads(fichier.read_text()) if fichier.exists() else {}
+        if options["enregistrer"]:
+            fichier.write_text(json.dumps({**reference, **resultats}, indent=2))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(resultats, indent=2))
+        else:
+            for nom, duree in resultats.items():
+                ligne = f"{nom:<20}{duree * 1e6:>14.1f} µs"
+                if nom in reference:
+                    ecart = duree / reference[nom] - 1
+                    ligne += f"  {ecart:>+8.1%} / référence"
+                self.stdout.write(ligne)
+
+        lentes = (
+            []
+            if options["enregistrer"]
+            else regressions(resultats, reference, options["seuil"])
+        )
+        if lentes:
+            raise CommandError(
+                "Régressions au-delà du seuil : "
+                + ", ".join(f"{nom} ({ecart:+.0%})" for nom, _, _, ecart in lentes)
+            )
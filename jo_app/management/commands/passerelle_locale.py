@@ -0,0 +1,163 @@
+"""
+Ce module contient la commande qui lance une passerelle de paiement locale.
+Elle imite un prestataire de paiement avec une latence et des taux d'échec
+et de refus configurables, pour tester le paiement en conditions réalistes.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+from jo_app.passerelle import STATUT_ACCEPTE, STATUT_ANNULE, STATUT_REFUSE
+
+
+def creer_serveur(hote, port, latence=0.0, taux_echec=0.0, taux_refus=0.0):
+    """
+    Crée le serveur HTTP de la passerelle locale (sans le démarrer).
+    """
+    paiements = {}
+    verrou = threading.Lock()
+
+    class Gestionnaire(BaseHTTPRequestHandler):
+        """
+        Gère les routes POST /paiements, GET /paiements/<reference> et
+        POST /paiements/<reference>/annulation.
+        """
+
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            """
+            Désactive le journal de chaque requête.
+            """
+
+        def _repondre(self, code, donnees):
+            """
+            Envoie une réponse JSON.
+            """
+            corps = json.dumps(donnees).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corps)))
+            self.end_headers()
+            self.wfile.write(corps)
+
+        def _simuler(self):
+            """
+            Applique la latence et retourne False si un échec est simulé.
+            """
+            if latence:
+                time.sleep(latence)
+            if random.random() < taux_echec:
+                self._repondre(503, {"erreur": "indisponible"})
+                return False
+            return True
+
+        def do_POST(self):
+            """
+            Autorise un paiement (idempotent sur la référence), ou l'annule.
+            """
+            longueur = int(self.headers.get("Content-Length", 0))
+            donnees = json.loads(self.rfile.read(longueur) or b"{}")
+            if not self._simuler():
+                return
+            annulation = re.fullmatch(r"/paiements/([\w-]+)/annulation", self.path)
+            if annulation:
+                self._annuler(annulation.group(1))
+                return
+            reference = donnees.get("reference", "")
+            with verrou:
+                if reference not in paiements:
+                    refuse = random.random() < taux_refus
+                    paiements[reference] = STATUT_REFUSE if refuse else STATUT_ACCEPTE
+                statut = paiements[reference]
+            self._repondre(200, {"reference": reference, "statut": statut})
+
+        def _annuler(self, reference):
+            """
+            Annule un paiement autorisé.
+            """
+            with verrou:
+                if reference in paiements:
+                    paiements[reference] = STATUT_ANNULE
+                statut = paiements.get(reference)
+            if statut is None:
+                self._repondre(404, {"erreur": "introuvable"})
+            else:
+                self._repondre(200, {"reference": reference, "statut": statut})
+
+        def do_GET(self):
+            """
+            Retourne le statut d'un paiement.
+            """
+            correspondance = re.fullmatch(r"/paiements/([\w-]+)", self.path)
+            if not correspondance:
+                self._repondre(404, {"erreur": "introuvable"})
+                return
+            if not self._simuler():
+                return
+            reference = correspondance.group(1)
+            with verrou:
+                statut = paiements.get(reference)
+            if statut is None:
+                self._repondre(404, {"erreur": "introuvable"})
+            else:
+                self._repondre(200, {"reference": reference, "statut": statut})
+
+    return ThreadingHTTPServer((hote, port), Gestionnaire)
+
+
+class Command(BaseCommand):
+    """
+    Commande de lancement de la passerelle de paiement locale.
+    """
+
+    help = "Lance une passerelle de paiement locale (latence et échecs simulés)."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument("--hote", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latence", type=float, default=0.2, help="Latence en secondes."
+        )
+        parser.add_argument(
+            "--taux-echec",
+            type=float,
+            default=0.0,
+            help="Proportion de réponses 503 (entre 0 et 1).",
+        )
+        parser.add_argument(
+            "--taux-refus",
+            type=float,
+            default=0.0,
+            help="Proportion de paiements refusés (entre 0 et 1).",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Lance le serveur jusqu'à l'interruption.
+        """
+        serveur = creer_serveur(
+            options["hote"],
+            options["port"],
+            options["latence"],
+            options["taux_echec"],
+            options["taux_refus"],
+        )
+        self.stdout.write(
+            f"Passerelle locale sur http://{options['hote']}:{options['port']}"
+        )
+        try:
+            serveur.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            serveur.server_close()
@@ -0,0 +1,41 @@
+"""
+Ce module contient la commande de préchauffage.
+Elle compile les gabarits, rend un billet PDF fictif, charge le catalogue et
+ouvre les connexions à la base, et affiche la durée de chaque étape.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jo_app.prechauffage import ETAPES, prechauffer
+
+
+class Command(BaseCommand):
+    """
+    Commande de préchauffage d'un processus.
+    """
+
+    help = "Préchauffe gabarits, WeasyPrint, catalogue et connexions à la base."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "etapes",
+            nargs="*",
+            choices=list(ETAPES),
+            help="Étapes à exécuter (toutes par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Exécute le préchauffage et échoue si une étape n'a pas abouti.
+        """
+        rapport = prechauffer(options["etapes"] or tuple(ETAPES))
+        for nom, duree_ms, resultat, erreur in rapport:
+            detail = f"erreur : {erreur}" if erreur else resultat
+            self.stdout.write(f"{nom:<12}{duree_ms:>10.1f} ms  {detail}")
+
+        echecs = [nom for nom, _, _, erreur in rapport if erreur]
+        if echecs:
+            raise CommandError(f"Préchauffage incomplet : {', '.join(echecs)}.")
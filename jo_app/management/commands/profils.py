@@ -0,0 +1,123 @@
+"""
+Ce module contient la commande de consultation des profils de requêtes
+capturés par ProfilageMiddleware.
+Sans argument, elle liste les captures ; avec un nom de capture, elle en
+affiche le résumé (fonctions les plus coûteuses, piles échantillonnées et
+requêtes SQL) ; avec --jeton, elle crée un jeton de profilage.
+"""
+
+import pstats
+from collections import Counter
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from jo_app.profilage import PARAMETRE, captures, creer_jeton
+
+
+class Command(BaseCommand):
+    """
+    Commande de consultation des profils de requêtes.
+    """
+
+    help = "Liste ou résume les profils de requêtes capturés, ou crée un jeton."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les arguments de la commande.
+        """
+        parser.add_argument("nom", nargs="?", help="Capture à résumer.")
+        parser.add_argument(
+            "--jeton",
+            metavar="EMAIL",
+            help="Crée un jeton de profilage pour ce membre du personnel.",
+        )
+        parser.add_argument(
+            "--top", type=int, default=20, help="Nombre de lignes par section."
+        )
+
+    def handle(self, *args, **options):
+        """
+        Exécute l'action demandée.
+        """
+        if options["jeton"]:
+            self.creer_jeton(options["jeton"])
+        elif options["nom"]:
+            self.resumer(options["nom"], options["top"])
+        else:
+            self.lister()
+
+    def creer_jeton(self, email):
+        """
+        Affiche un jeton de profilage pour le membre du personnel.
+        """
+        utilisateur = get_user_model().objects.filter(email=email).first()
+        if utilisateur is None or not utilisateur.is_staff:
+            raise CommandError(f"{email} n'est pas membre du personnel.")
+        jeton = creer_jeton(utilisateur)
+        duree = settings.PROFILAGE_JETON_DUREE // 60
+        self.stdout.write(f"Jeton valable {duree} minutes :")
+        self.stdout.write(f"  ?{PARAMETRE}={jeton}")
+        self.stdout.write(f"  X-Profilage: {jeton}")
+
+    def lister(self):
+        """
+        Liste les captures, la plus récente en premier.
+        """
+        liste = captures()
+        if not liste:
+            self.stdout.write(f"Aucune capture dans {settings.PROFILAGE_DOSSIER}.")
+            return
+        for capture in liste:
+            self.stdout.write(
+                f"{capture['date']}  {capture['vue']:<24}"
+                f"{capture['duree_ms']:>10.1f} ms"
+                f"{len(capture['requetes_sql']):>6} SQL"
+                f"  {capture['statut']}  {capture['nom']}"
+            )
+
+    def resumer(self, nom, top):
+        """
+        Affiche le résumé d'une capture.
+        """
+        capture = next((c for c in captures() if c["nom"] == nom), None)
+        if capture is None:
+            raise CommandError(f"Capture introuvable : {nom}")
+        dossier = Path(settings.PROFILAGE_DOSSIER)
+        self.stdout.write(
+            f"{capture['chemin']} ({capture['vue']}) : {capture['duree_ms']} ms, "
+            f"statut {capture['statut']}"
+        )
+
+        self.stdout.write("\nFonctions les plus coûteuses (temps cumulé) :")
+        sortie = StringIO()
+        stats = pstats.Stats(str(dossier / f"{nom}.pstats"), stream=sortie)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(top)
+        self.stdout.write(sortie.getvalue(), ending="")
+
+        self.stdout.write("Fonctions les plus échantillonnées (temps propre) :")
+        feuilles = Counter()
+        for ligne in (
+            (dossier / f"{nom}.collapsed").read_text(encoding="utf-8").splitlines()
+        ):
+            pile, nombre = ligne.rsplit(" ", 1)
+            feuilles[pile.rsplit(";", 1)[-1]] += int(nombre)
+        total = sum(feuilles.values()) or 1
+        for fonction, nombre in feuilles.most_common(top):
+            self.stdout.write(f"{nombre / total:>7.1%}  {fonction}")
+
+        requetes = capture["requetes_sql"]
+        duree_sql = sum(r["duree_ms"] for r in requetes)
+        self.stdout.write(
+            f"\nRequêtes SQL : {len(requetes)}, {duree_sql:.1f} ms au total"
+        )
+        repetitions = Counter(r["sql"] for r in requetes)
+        for sql, nombre in repetitions.most_common(top):
+            if nombre > 1:
+                self.stdout.write(f"{nombre:>5} x  {sql[:150]}")
+        self.stdout.write("Les plus lentes :")
+        for requete in sorted(requetes, key=lambda r: -r["duree_ms"])[:top]:
+            self.stdout.write(f"{requete['duree_ms']:>9.2f} ms  {requete['sql'][:150]}")
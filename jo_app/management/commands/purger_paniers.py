@@ -0,0 +1,94 @@
+"""
+Ce module contient la commande de purge des paniers abandonnés.
+Elle supprime les tickets non achetés plus anciens qu'un âge donné,
+par tranches de clés primaires, pour ne jamais verrouiller longtemps la table.
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from jo_app.models import Ticket
+
+
+def premier_pk(queryset):
+    """
+    Retourne la plus petite clé primaire du queryset, ou None s'il est vide.
+    """
+    return queryset.aggregate(debut=Min("pk"))["debut"]
+
+
+class Command(BaseCommand):
+    """
+    Commande de purge des tickets non achetés (paniers abandonnés).
+    """
+
+    help = "Supprime les tickets non achetés plus anciens qu'un âge donné."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "--age-heures",
+            type=int,
+            default=48,
+            help="Âge minimal (en heures) d'un ticket non acheté pour être supprimé.",
+        )
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=1000,
+            help="Largeur de chaque tranche de clés primaires supprimée.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Pause (en secondes) entre deux tranches.",
+        )
+        parser.add_argument(
+            "--simulation",
+            action="store_true",
+            help="Compte les tickets concernés sans les supprimer.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Supprime les paniers abandonnés tranche par tranche.
+        """
+        if options["age_heures"] < 0:
+            raise CommandError("L'âge doit être positif.")
+        if options["taille_lot"] <= 0:
+            raise CommandError("La taille de lot doit être strictement positive.")
+
+        limite = timezone.now() - timedelta(hours=options["age_heures"])
+        perimes = Ticket.objects.filter(est_achete=False, date_creation__lt=limite)
+
+        if options["simulation"]:
+            self.stdout.write(f"{perimes.count()} ticket(s) seraient supprimés.")
+            return
+
+        taille_lot = options["taille_lot"]
+        total = 0
+        debut_chrono = time.monotonic()
+        pk = premier_pk(perimes)
+
+        while pk is not None:
+            tranche = perimes.filter(pk__gte=pk, pk__lt=pk + taille_lot)
+            _, details = tranche.delete()
+            total += details.get(Ticket._meta.label, 0)
+            pk = premier_pk(perimes.filter(pk__gte=pk + taille_lot))
+            if pk is not None and options["pause"]:
+                time.sleep(options["pause"])
+
+        duree = time.monotonic() - debut_chrono
+        debit = total / duree if duree else float(total)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} ticket(s) supprimé(s) en {duree:.2f}s ({debit:.0f} lignes/s)."
+            )
+        )
@@ -0,0 +1,53 @@
+"""
+Ce module contient la commande de purge des sessions expirées.
+Elle remplace clearsessions, qui supprime toutes les sessions expirées en une
+seule requête, par des suppressions par lots séparées par une pause.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from jo_app.sessions import supprimer_sessions_expirees
+
+
+class Command(BaseCommand):
+    """
+    Commande de purge des sessions expirées.
+    """
+
+    help = "Supprime les sessions expirées par lots."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "--taille-lot",
+            type=int,
+            default=1000,
+            help="Nombre de sessions supprimées par lot.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Pause (en secondes) entre deux lots.",
+        )
+
+    def handle(self, *args, **options):
+        """
+        Supprime les sessions expirées lot par lot.
+        """
+        if options["taille_lot"] <= 0:
+            raise CommandError("La taille de lot doit être strictement positive.")
+
+        debut_chrono = time.monotonic()
+        total = supprimer_sessions_expirees(options["taille_lot"], options["pause"])
+        duree = time.monotonic() - debut_chrono
+        debit = total / duree if duree else float(total)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{total} session(s) supprimée(s) en {duree:.2f}s ({debit:.0f} lignes/s)."
+            )
+        )
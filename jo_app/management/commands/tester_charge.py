@@ -0,0 +1,302 @@
+"""
+Ce module contient la commande de test de charge du parcours d'achat.
+
+Chaque utilisateur virtuel parcourt le tunnel complet sur un serveur en
+cours d'exécution : inscription, connexion, liste des sports, choix du
+ticket, panier, paiement, historique des commandes et téléchargement du
+billet. Les utilisateurs sont lancés par `--concurrence` à la fois ; le
+rapport donne, pour chaque étape, le débit et les centiles de latence, au
+format JSON avec --json pour comparer les versions entre elles.
+
+Le serveur visé doit utiliser la passerelle de paiement simulée et
+l'hébergement local des QR codes (QR_CODES_STOCKAGE=local). En HTTP, il doit
+aussi envoyer ses cookies sans l'attribut Secure
+(DJANGO_SESSION_COOKIE_SECURE=False, DJANGO_CSRF_COOKIE_SECURE=False), sans
+qu'il soit besoin de passer en debug : voir le README.
+"""
+
+import json
+import random
+import re
+import secrets
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+ETAPES = (
+    "inscription",
+    "connexion",
+    "sport",
+    "ticket_create",
+    "panier",
+    "paiement",
+    "mes_commandes",
+    "telecharger_billet",
+)
+MOT_DE_PASSE = "Charge@2024!"
+
+
+class EchecEtape(Exception):
+    """
+    Levée quand une étape échoue : le parcours de l'utilisateur s'arrête.
+    """
+
+
+class UtilisateurVirtuel:
+    """
+    Acheteur qui parcourt le tunnel d'achat avec sa propre session HTTP.
+    """
+
+    def __init__(self, url, email, catalogue, aleatoire, delai):
+        """
+        Prépare la session de l'acheteur.
+        """
+        self.url = url
+        self.email = email
+        self.catalogue = catalogue
+        self.aleatoire = aleatoire
+        self.delai = delai
+        self.session = requests.Session()
+        self.durees = {}
+
+    def appeler(self, methode, chemin, statut=200, **kwargs):
+        """
+        Envoie une requête (sans suivre les redirections) et vérifie son statut.
+        """
+        if methode == "POST":
+            kwargs.setdefault("data", {})["csrfmiddlewaretoken"] = (
+                self.session.cookies.get("csrftoken", "")
+            )
+            kwargs.setdefault("headers", {})["Referer"] = f"{self.url}{chemin}"
+        try:
+            reponse = self.session.request(
+                methode,
+                f"{self.url}{chemin}",
+                allow_redirects=False,
+                timeout=self.delai,
+                **kwargs,
+            )
+        except requests.RequestException as e:
+            raise EchecEtape(str(e)) from e
+        if reponse.status_code != statut:
+            raise EchecEtape(f"{methode} {chemin} : {reponse.status_code}")
+        return reponse
+
+    def etape(self, nom, *appels):
+        """
+        Exécute les requêtes d'une étape et note sa durée totale.
+        """
+        debut = time.perf_counter()
+        reponses = [self.appeler(*appel[:-1], **appel[-1]) for appel in appels]
+        self.durees[nom] = time.perf_counter() - debut
+        return reponses[-1]
+
+    def parcourir(self):
+        """
+        Parcourt le tunnel d'achat ; lève EchecEtape à la première erreur.
+        """
+        sport = self.aleatoire.choice(self.catalogue["sports"])
+        offre = self.aleatoire.choice(self.catalogue["offres"])
+        inscription = {
+            "nom": "Charge",
+            "prenom": "Virtuel",
+            "sexe": "H",
+            "email": self.email,
+            "adresse": "1 rue de Rivoli",
+            "code_postal": "75001",
+            "ville": "Paris",
+            "date_de_naissance": "1990-01-01",
+            "password1": MOT_DE_PASSE,
+            "password2": MOT_DE_PASSE,
+        }
+        connexion = {"username": self.email, "password": MOT_DE_PASSE}
+
+        self.etape(
+            "inscription",
+            ("GET", "/inscription/", {}),
+            ("POST", "/inscription/", 302, {"data": inscription}),
+        )
+        self.etape(
+            "connexion",
+            ("GET", "/connexion/", {}),
+            ("POST", "/connexion/", 302, {"data": connexion}),
+        )
+        self.etape("sport", ("GET", "/sport/", {}))
+        self.etape(
+            "ticket_create",
+            ("GET", "/ticket/create/", {"params": {"sport": sport["nom"]}}),
+            (
+                "POST",
+                "/ticket/create/",
+                302,
+                {"data": {"sport": sport["id"], "offre": offre["id"]}},
+            ),
+        )
+        self.etape("panier", ("GET", "/panier/", {}))
+
+        debut = time.perf_counter()
+        page = self.appeler("GET", "/paiement/")
+        cle = re.search(r'name="cle_idempotence" value="(\w+)"', page.text)
+        if cle is None:
+            raise EchecEtape("Clé d'idempotence absente de la page de paiement.")
+        carte = {
+            "cle_idempotence": cle.group(1),
+            "cardNumber": "4242424242424242",
+            "expiryDate": "12/30",
+            "cvv": "123",
+        }
+        self.appeler("POST", "/paiement/", 302, data=carte)
+        self.durees["paiement"] = time.perf_counter() - debut
+
+        commandes = self.etape("mes_commandes", ("GET", "/mes-commandes/", {}))
+        billet = re.search(r"/telecharger-billet/(\d+)/", commandes.text)
+        if billet is None:
+            raise EchecEtape("Aucun billet dans l'historique des commandes.")
+        self.etape("telecharger_billet", ("GET", billet.group(0), {}))
+
+
+def centile(durees, rang):
+    """
+    Retourne le centile demandé des durées, en millisecondes.
+    """
+    if not durees:
+        return None
+    durees = sorted(durees)
+    indice = min(len(durees) - 1, int(len(durees) * rang / 100))
+    return round(durees[indice] * 1000, 1)
+
+
+class Command(BaseCommand):
+    """
+    Commande de test de charge du parcours d'achat.
+    """
+
+    help = "Fait parcourir le tunnel d'achat à des utilisateurs virtuels."
+
+    def add_arguments(self, parser):
+        """
+        Ajoute les options de la commande.
+        """
+        parser.add_argument(
+            "--url", default="http://127.0.0.1:8000", help="Serveur visé."
+        )
+        parser.add_argument(
+            "--utilisateurs",
+            type=int,
+            default=1000,
+            help="Nombre d'utilisateurs virtuels.",
+        )
+        parser.add_argument(
+            "--concurrence",
+            type=int,
+            default=50,
+            help="Utilisateurs virtuels simultanés.",
+        )
+        parser.add_argument(
+            "--graine", type=int, default=2024, help="Graine des choix de billets."
+        )
+        parser.add_argument(
+            "--delai",
+            type=float,
+            default=30.0,
+            help="Délai maximal d'une requête (en secondes).",
+        )
+        parser.add_argument(
+            "--json", action="store_true", help="Affiche le rapport en JSON."
+        )
+
+    def handle(self, *args, **options):
+        """
+        Lance les utilisateurs virtuels et affiche le rapport.
+        """
+        url = options["url"].rstrip("/")
+        try:
+            catalogue = requests.get(
+                f"{url}/catalogue.json", timeout=options["delai"]
+            ).json()
+        except (requests.RequestException, ValueError) as e:
+            raise CommandError(f"Catalogue inaccessible sur {url} : {e}")
+        if not catalogue["sports"] or not catalogue["offres"]:
+            raise CommandError("Le catalogue du serveur ne contient aucun billet.")
+
+        campagne = secrets.token_hex(4)
+        durees = defaultdict(list)
+        erreurs = defaultdict(int)
+        exemples = {}
+        verrou = threading.Lock()
+
+        def lancer(numero):
+            """
+            Fait parcourir le tunnel à l'utilisateur virtuel `numero`.
+            """
+            utilisateur = UtilisateurVirtuel(
+                url,
+                f"charge-{campagne}-{numero}@exemple.fr",
+                catalogue,
+                random.Random(options["graine"] + numero),
+                options["delai"],
+            )
+            try:
+                utilisateur.parcourir()
+                echec = None
+            except EchecEtape as e:
+                echec = (ETAPES[len(utilisateur.durees)], str(e))
+            with verrou:
+                for etape, duree in utilisateur.durees.items():
+                    durees[etape].append(duree)
+                if echec is not None:
+                    erreurs[echec[0]] += 1
+                    exemples.setdefault(echec[0], echec[1])
+            return echec is None
+
+        debut = time.perf_counter()
+        with ThreadPoolExecutor(options["concurrence"]) as executeur:
+            reussis = sum(executeur.map(lancer, range(options["utilisateurs"])))
+        duree = time.perf_counter() - debut
+
+        rapport = {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "url": url,
+            "utilisateurs": options["utilisateurs"],
+            "concurrence": options["concurrence"],
+            "duree_s": round(duree, 2),
+            "parcours_reussis": reussis,
+            "parcours_par_seconde": round(reussis / duree, 2),
+            "etapes": {
+                etape: {
+                    "reussites": len(durees[etape]),
+                    "erreurs": erreurs[etape],
+                    "par_seconde": round(len(durees[etape]) / duree, 2),
+                    "p50_ms": centile(durees[etape], 50),
+                    "p95_ms": centile(durees[etape], 95),
+                    "p99_ms": centile(durees[etape], 99),
+                    "exemple_erreur": exemples.get(etape),
+                }
+                for etape in ETAPES
+            },
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(rapport, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(
+            f"{reussis}/{options['utilisateurs']} parcours réussis en "
+            f"{duree:.1f} s ({rapport['parcours_par_seconde']} acheteurs/s)"
+        )
+        self.stdout.write(
+            f"{'étape':<20}{'/s':>8}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'erreurs':>9}"
+        )
+        for etape, resultat in rapport["etapes"].items():
+            self.stdout.write(
+                f"{etape:<20}{resultat['par_seconde']:>8}"
+                f"{resultat['p50_ms'] or '-':>10}{resultat['p95_ms'] or '-':>10}"
+                f"{resultat['p99_ms'] or '-':>10}{resultat['erreurs']:>9}"
+            )
+            if resultat["exemple_erreur"]:
+                self.stdout.write(f"    {resultat['exemple_erreur']}")
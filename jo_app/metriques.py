@@ -0,0 +1,103 @@
+"""
+Ce module contient les métriques de l'application, exposées au format
+Prometheus sur /metrics.
+
+Les compteurs et histogrammes sont tenus en mémoire par chaque processus :
+les incrémenter ne coûte que quelques microsecondes et aucune requête SQL.
+Sous gunicorn, PROMETHEUS_MULTIPROC_DIR (défini par gunicorn.conf.py) fait
+écrire chaque worker dans ses propres fichiers, que la collecte agrège.
+Les jauges d'état ne sont calculées qu'au moment de la collecte, par des
+requêtes bon marché : les billets sans QR code sont comptés sur l'index de
+qr_code, où ils sont les seuls à valoir NULL.
+"""
+
+import os
+from collections import Counter as Comptes
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+BILLETS_EMIS = Counter(
+    "jo_billets_emis", "Billets émis, par sport et par offre.", ["sport", "offre"]
+)
+PAIEMENTS = Counter(
+    "jo_paiements",
+    "Paiements par résultat (accepte, refuse, en_attente, indisponible, annule, "
+    "annulation_en_echec).",
+    ["resultat"],
+)
+TELEVERSEMENT_QR = Histogram(
+    "jo_televersement_qr_secondes",
+    "Durée du téléversement des QR codes sur Cloudinary.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+ECHECS_TELEVERSEMENT_QR = Counter(
+    "jo_televersement_qr_echecs", "Téléversements de QR codes en échec."
+)
+RENDU_PDF = Histogram(
+    "jo_rendu_pdf_secondes",
+    "Durée du rendu PDF des billets téléchargés.",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+
+def compter_billets(tickets):
+    """
+    Compte les billets émis pour les tickets donnés (sport et offre chargés).
+    """
+    comptes = Comptes()
+    for ticket in tickets:
+        comptes[ticket.sport.nom, ticket.offre.type] += ticket.quantite
+    for (sport, offre), nombre in comptes.items():
+        BILLETS_EMIS.labels(sport=sport, offre=offre).inc(nombre)
+
+
+class CollecteurEtat:
+    """
+    Jauges lues en base à chaque collecte, jamais pendant les requêtes.
+    """
+
+    def collect(self):
+        """
+        Retourne la taille des paniers et le nombre de billets sans QR code.
+        """
+        from .models import GenerationTicket, Ticket
+
+        yield GaugeMetricFamily(
+            "jo_paniers_tickets",
+            "Tickets dans les paniers (non achetés).",
+            value=Ticket.objects.filter(est_achete=False).count(),
+        )
+        yield GaugeMetricFamily(
+            "jo_billets_sans_qr_code",
+            "Billets dont le QR code n'est pas encore hébergé.",
+            value=GenerationTicket.objects.filter(qr_code__isnull=True).count(),
+        )
+
+
+_registre_etat = CollectorRegistry()
+_registre_etat.register(CollecteurEtat())
+
+
+def exposer():
+    """
+    Retourne les métriques au format texte de Prometheus, agrégées entre les
+    workers en mode multiprocessus.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registre = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registre)
+    else:
+        registre = REGISTRY
+    return generate_latest(registre) + generate_latest(_registre_etat)
+
+
+FORMAT = CONTENT_TYPE_LATEST
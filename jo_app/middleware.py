@@ -0,0 +1,318 @@
+"""
+Ce module contient les middlewares de l'application.
+Il contient les middlewares FileAttenteMiddleware, InstrumentationMiddleware,
+ProfilageMiddleware, RouteurReplicasMiddleware et WhiteNoiseAsyncMiddleware.
+
+Tous acceptent les chaînes synchrones (WSGI) et asynchrones (ASGI) : en ASGI,
+un seul middleware synchrone ferait passer chaque requête par un thread bloqué
+pendant toute la durée de la vue.
+"""
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import render
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import file_attente, instrumentation, profilage, routeur
+
+COOKIE_PRIMAIRE = "jo_primaire"
+
+
+class MiddlewareHybride:
+    """
+    Base des middlewares synchrones et asynchrones : __call__ est utilisé en
+    WSGI, __acall__ en ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        Initialise le middleware dans le mode de la chaîne qui le suit.
+        """
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """
+        Traite la requête, ou retourne la coroutine qui la traite en ASGI.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.traiter(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        """
+        Version asynchrone de __call__.
+        """
+        return self.traiter(request, await self.get_response(request))
+
+    def traiter(self, request, response):
+        """
+        Traite la réponse ; à redéfinir.
+        """
+        return response
+
+
+class FileAttenteMiddleware(MiddlewareHybride):
+    """
+    Admet les visiteurs dans le parcours d'achat au débit configuré.
+    Les pages de consultation (accueil, sports) ne sont jamais limitées, et
+    un visiteur sans session est laissé à la vue, qui le renvoie vers la
+    connexion.
+    """
+
+    def traiter(self, request, response):
+        """
+        Pose le jeton d'admission sur la réponse d'un visiteur tout juste admis.
+        """
+        numero = getattr(request, "file_attente_admis", None)
+        if numero is not None:
+            file_attente.poser_cookies(response, request, numero, admis=True)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Laisse passer les visiteurs admis, place les autres dans la file.
+        """
+        if not settings.FILE_ATTENTE_ACTIVE:
+            return None
+        if request.resolver_match.url_name not in settings.FILE_ATTENTE_VUES:
+            return None
+        if file_attente.liaison(request) is None:
+            return None
+        if file_attente.admission_valide(request):
+            return None
+
+        numero, position = file_attente.position(request)
+        if position == 0:
+            request.file_attente_admis = numero
+            return None
+
+        intervalle = settings.FILE_ATTENTE_INTERVALLE_SONDAGE
+        if file_attente.demande_json(request):
+            response = JsonResponse(
+                {
+                    "success": False,
+                    "position": position,
+                    "message": "Forte affluence, vous êtes en position "
+                    f"{position} dans la file d'attente. Réessayez dans "
+                    "quelques instants.",
+                },
+                status=503,
+            )
+        else:
+            response = render(
+                request,
+                "file_attente.html",
+                {
+                    "position": position,
+                    "suivant": request.get_full_path(),
+                    "intervalle": intervalle,
+                },
+                status=503,
+            )
+        response["Retry-After"] = str(intervalle)
+        return file_attente.poser_cookies(response, request, numero, admis=False)
+
+
+class InstrumentationMiddleware(MiddlewareHybride):
+    """
+    Mesure chaque requête (durée totale, base, gabarits, appels externes),
+    l'agrège dans l'histogramme de sa vue et la renvoie au personnel dans
+    l'en-tête Server-Timing. L'utilisateur n'est consulté, après la mesure,
+    que si la requête porte un cookie de session : un visiteur anonyme ne
+    charge ni session ni utilisateur.
+    """
+
+    def __call__(self, request):
+        """
+        Mesure la requête.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.INSTRUMENTATION_ACTIVE:
+            return self.get_response(request)
+        jeton = instrumentation.demarrer()
+        response = self.get_response(request)
+        mesure, total = instrumentation.terminer(jeton, self.vue(request))
+        if self.session_ouverte(request) and request.user.is_staff:
+            response["Server-Timing"] = instrumentation.server_timing(mesure, total)
+        return response
+
+    async def __acall__(self, request):
+        """
+        Version asynchrone de __call__.
+        """
+        if not settings.INSTRUMENTATION_ACTIVE:
+            return await self.get_response(request)
+        jeton = instrumentation.demarrer()
+        response = await self.get_response(request)
+        mesure, total = instrumentation.terminer(jeton, self.vue(request))
+        if self.session_ouverte(request) and (await request.auser()).is_staff:
+            response["Server-Timing"] = instrumentation.server_timing(mesure, total)
+        return response
+
+    @staticmethod
+    def session_ouverte(request):
+        """
+        Indique si la requête porte un cookie de session et passe par
+        l'authentification.
+        """
+        return settings.SESSION_COOKIE_NAME in request.COOKIES and hasattr(
+            request, "auser"
+        )
+
+    @staticmethod
+    def vue(request):
+        """
+        Retourne le nom de la vue de la requête (celui de son URL).
+        """
+        if request.resolver_match is None:
+            return "non_resolue"
+        return request.resolver_match.view_name
+
+
+class ProfilageMiddleware(MiddlewareHybride):
+    """
+    Exécute sous le profileur la vue d'une requête du personnel qui porte un
+    jeton de profilage. Placé en dernier, après les autres process_view.
+    """
+
+    def __init__(self, get_response):
+        """
+        Initialise le middleware ; en ASGI, process_view est asynchrone pour
+        que les requêtes sans jeton ne passent pas par un thread.
+        """
+        super().__init__(get_response)
+        if iscoroutinefunction(self):
+            self.process_view = self.aprocess_view
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Profile la vue si la requête porte un jeton valide.
+        """
+        jeton = profilage.jeton_requete(request)
+        if jeton is None or iscoroutinefunction(view_func):
+            return None
+        if not profilage.jeton_valide(jeton, request.user):
+            return None
+        return profilage.profiler(request, view_func, view_args, view_kwargs)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        """
+        Version asynchrone de process_view ; la vue profilée s'exécute dans un
+        thread.
+        """
+        jeton = profilage.jeton_requete(request)
+        if jeton is None or iscoroutinefunction(view_func):
+            return None
+        if not profilage.jeton_valide(jeton, await request.auser()):
+            return None
+        return await sync_to_async(profilage.profiler)(
+            request, view_func, view_args, view_kwargs
+        )
+
+
+class RouteurReplicasMiddleware(MiddlewareHybride):
+    """
+    Ouvre l'état de routage de chaque requête. Après une écriture, le visiteur
+    lit sur le primaire pendant REPLIQUE_EPINGLAGE secondes (cookie signé).
+    """
+
+    def __call__(self, request):
+        """
+        Route la requête et épingle le visiteur au primaire s'il a écrit.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.REPLIQUES_LECTURE:
+            return self.get_response(request)
+        with routeur.routage(epingle=self.epingle(request)) as etat:
+            response = self.get_response(request)
+        return self.epingler(response, etat)
+
+    async def __acall__(self, request):
+        """
+        Version asynchrone de __call__.
+        """
+        if not settings.REPLIQUES_LECTURE:
+            return await self.get_response(request)
+        with routeur.routage(epingle=self.epingle(request)) as etat:
+            response = await self.get_response(request)
+        return self.epingler(response, etat)
+
+    @staticmethod
+    def epingle(request):
+        """
+        Indique si le visiteur a écrit récemment.
+        """
+        cookie = request.get_signed_cookie(
+            COOKIE_PRIMAIRE,
+            default=None,
+            salt=COOKIE_PRIMAIRE,
+            max_age=settings.REPLIQUE_EPINGLAGE,
+        )
+        return cookie is not None
+
+    @staticmethod
+    def epingler(response, etat):
+        """
+        Épingle au primaire le visiteur qui vient d'écrire.
+        """
+        if etat.ecriture:
+            response.set_signed_cookie(
+                COOKIE_PRIMAIRE,
+                "1",
+                salt=COOKIE_PRIMAIRE,
+                max_age=settings.REPLIQUE_EPINGLAGE,
+                httponly=True,
+                samesite="Lax",
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
+
+
+class WhiteNoiseAsyncMiddleware(MiddlewareHybride, WhiteNoiseMiddleware):
+    """
+    WhiteNoiseMiddleware utilisable en ASGI : seule la lecture d'un fichier
+    statique passe par un thread, les autres requêtes continuent sans attendre.
+    """
+
+    def __init__(self, get_response):
+        """
+        Initialise WhiteNoise, puis le mode de la chaîne.
+        """
+        WhiteNoiseMiddleware.__init__(self, get_response)
+        MiddlewareHybride.__init__(self, get_response)
+
+    def fichier_statique(self, request):
+        """
+        Retourne le fichier statique demandé, ou None.
+        """
+        if self.autorefresh:
+            return self.find_file(request.path_info)
+        return self.files.get(request.path_info)
+
+    def __call__(self, request):
+        """
+        Sert le fichier statique demandé, ou passe la requête à la suite.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        static_file = self.fichier_statique(request)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        """
+        Version asynchrone de __call__.
+        """
+        static_file = self.fichier_statique(request)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
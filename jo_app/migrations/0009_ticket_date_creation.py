@@ -0,0 +1,19 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jo_app", "0008_alter_generationticket_qr_code"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="date_creation",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jo_app", "0009_ticket_date_creation"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="generationticket",
+            name="cle_securisee_2",
+            field=models.CharField(
+                blank=True, editable=False, max_length=64, unique=True
+            ),
+        ),
+        migrations.AlterField(
+            model_name="sport",
+            name="nom",
+            field=models.CharField(db_index=True, max_length=100),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["utilisateur", "est_achete"],
+                name="ticket_utilisateur_achete_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ticket",
+            index=models.Index(
+                fields=["est_achete", "date_creation"],
+                name="ticket_achete_creation_idx",
+            ),
+        ),
+    ]
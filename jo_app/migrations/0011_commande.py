@@ -0,0 +1,59 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jo_app", "0010_index_panier_commandes_billets"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Commande",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cle_idempotence", models.CharField(max_length=64, unique=True)),
+                (
+                    "montant",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=10),
+                ),
+                ("nombre_billets", models.PositiveIntegerField(default=0)),
+                (
+                    "date_commande",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                (
+                    "utilisateur",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="commandes",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="ticket",
+            name="commande",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="tickets",
+                to="jo_app.commande",
+            ),
+        ),
+    ]
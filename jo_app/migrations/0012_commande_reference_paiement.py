@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 15:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jo_app", "0011_commande"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="commande",
+            name="reference_paiement",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
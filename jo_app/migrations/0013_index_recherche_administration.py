@@ -0,0 +1,45 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jo_app", "0012_commande_reference_paiement"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="commande",
+            name="date_commande",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+        migrations.AlterField(
+            model_name="commande",
+            name="reference_paiement",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name="generationticket",
+            name="date_generation",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="paiement",
+            name="date_paiement",
+            field=models.DateTimeField(
+                db_index=True, default=django.utils.timezone.now
+            ),
+        ),
+        migrations.AlterField(
+            model_name="utilisateur",
+            name="cle_securisee_1",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=64
+            ),
+        ),
+    ]
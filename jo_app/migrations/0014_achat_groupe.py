@@ -0,0 +1,78 @@
+# Generated by Django 5.1.1 on 2026-10-19 16:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jo_app", "0013_index_recherche_administration"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ticket",
+            name="titulaire",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.CreateModel(
+            name="AchatGroupe",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "statut",
+                    models.CharField(
+                        choices=[
+                            ("en_attente", "En attente"),
+                            ("en_cours", "En cours"),
+                            ("termine", "Terminé"),
+                            ("echoue", "Échoué"),
+                        ],
+                        db_index=True,
+                        default="en_attente",
+                        max_length=20,
+                    ),
+                ),
+                ("billets_demandes", models.PositiveIntegerField()),
+                ("billets_emis", models.PositiveIntegerField(default=0)),
+                ("erreur", models.TextField(blank=True)),
+                (
+                    "date_creation",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+                ("date_fin", models.DateTimeField(blank=True, null=True)),
+                (
+                    "commande",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="achat_groupe",
+                        to="jo_app.commande",
+                    ),
+                ),
+                (
+                    "partenaire",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="achats_groupes",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "permissions": [
+                    ("acheter_en_gros", "Peut acheter des billets en gros (partenaire)")
+                ],
+            },
+        ),
+    ]
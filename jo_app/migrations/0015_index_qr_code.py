@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-19 17:13
+
+from django.db import migrations, models
+
+
+def qr_codes_vides_a_null(apps, schema_editor):
+    """
+    Remplace les QR codes vides par NULL, seule valeur d'un billet en attente.
+    """
+    GenerationTicket = apps.get_model("jo_app", "GenerationTicket")
+    GenerationTicket.objects.filter(qr_code="").update(qr_code=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jo_app", "0014_achat_groupe"),
+    ]
+
+    operations = [
+        migrations.RunPython(qr_codes_vides_a_null, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="generationticket",
+            name="qr_code",
+            field=models.URLField(blank=True, db_index=True, max_length=500, null=True),
+        ),
+    ]
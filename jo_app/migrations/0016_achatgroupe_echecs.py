@@ -0,0 +1,18 @@
+# Generated by Django 5.1.1 on 2026-10-19 17:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jo_app", "0015_index_qr_code"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="achatgroupe",
+            name="echecs",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,6 +1,7 @@
 """
 Ce module contient les modèles de données de l'application.
-Il contient les classes Utilisateur, Sport, Offre, Ticket, Paiement et GenerationTicket.
+Il contient les classes Utilisateur, Sport, Offre, Commande, Ticket, Paiement,
+GenerationTicket et AchatGroupe.
 """
 
 import logging
@@ -8,19 +9,19 @@ import os
 import re
 import secrets
 import traceback
-from io import BytesIO
 
-import cloudinary.uploader
-import qrcode
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
     PermissionsMixin,
 )
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
+from .metriques import compter_billets
+from .qr_codes import generer_qr_code, televerser_qr_code
+
 logger = logging.getLogger(__name__)
 
 SEXE_CHOICES = [
@@ -87,7 +88,9 @@ class Utilisateur(AbstractBaseUser, PermissionsMixin):
     ville = models.CharField(max_length=50)
     date_de_naissance = models.DateField(null=False, blank=False, default="2000-01-01")
     date_d_inscription = models.DateField(auto_now_add=True)
-    cle_securisee_1 = models.CharField(max_length=64, blank=True, editable=False)
+    cle_securisee_1 = models.CharField(
+        max_length=64, blank=True, editable=False, db_index=True
+    )
 
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
@@ -117,7 +120,7 @@ class Sport(models.Model):
     Ce modèle représente un événement sportif.
     """
 
-    nom = models.CharField(max_length=100)
+    nom = models.CharField(max_length=100, db_index=True)
     date_evenement = models.DateField()
     image = models.ImageField(upload_to="images/sports/", blank=True)
     description = models.TextField(blank=True)
@@ -144,6 +147,107 @@ class Offre(models.Model):
         return f"{self.type} - {self.prix}€"
 
 
+class PanierInvalide(Exception):
+    """
+    Levée quand le panier verrouillé ne peut pas être validé : il est vide,
+    ou son montant diffère du montant autorisé par la passerelle.
+    """
+
+
+class CommandeManager(models.Manager):
+    def creer_depuis_panier(
+        self,
+        utilisateur,
+        cle_idempotence,
+        reference_paiement="",
+        methode_paiement="carte",
+        montant_autorise=None,
+    ):
+        """
+        Valide le panier de l'utilisateur en une transaction : crée la commande,
+        émet un billet par place, enregistre les paiements en une seule requête
+        et marque les tickets comme achetés. Les billets sont insérés sans QR
+        code, comme ceux des achats groupés : il est généré au premier
+        téléchargement du billet ou par la commande generer_qr_codes, et le
+        paiement ne fait aucun appel réseau.
+        Lève PanierInvalide si le panier est vide ou si son montant diffère de
+        montant_autorise, et IntegrityError si une commande existe déjà pour
+        cette clé.
+        """
+        with transaction.atomic():
+            commande = self.create(
+                utilisateur=utilisateur,
+                cle_idempotence=cle_idempotence,
+                reference_paiement=reference_paiement,
+            )
+            ids = list(
+                Ticket.objects.select_for_update()
+                .filter(utilisateur=utilisateur, est_achete=False)
+                .values_list("pk", flat=True)
+            )
+            if not ids:
+                raise PanierInvalide("Le panier est vide.")
+            tickets = list(
+                Ticket.objects.filter(pk__in=ids).select_related(
+                    "offre", "sport", "utilisateur"
+                )
+            )
+            montant = sum(ticket.get_prix_total() for ticket in tickets)
+            if montant_autorise is not None and montant != montant_autorise:
+                raise PanierInvalide(
+                    f"Le panier ({montant}€) ne correspond pas au montant "
+                    f"autorisé ({montant_autorise}€)."
+                )
+
+            GenerationTicket.objects.bulk_create(
+                GenerationTicket(ticket=ticket, cle_securisee_2=secrets.token_hex(32))
+                for ticket in tickets
+                for _ in range(ticket.quantite)
+            )
+            paiements = []
+            for ticket in tickets:
+                paiements.append(
+                    Paiement(
+                        ticket=ticket,
+                        montant=ticket.get_prix_total(),
+                        methode_paiement=methode_paiement,
+                        statut_paiement=True,
+                    )
+                )
+                commande.montant += ticket.get_prix_total()
+                commande.nombre_billets += ticket.quantite
+
+            Paiement.objects.bulk_create(paiements)
+            Ticket.objects.filter(pk__in=ids).update(est_achete=True, commande=commande)
+            commande.save(update_fields=["montant", "nombre_billets"])
+            transaction.on_commit(lambda: compter_billets(tickets))
+        return commande
+
+
+class Commande(models.Model):
+    """
+    Ce modèle représente une commande validée lors du paiement du panier.
+    La clé d'idempotence permet de rejouer un paiement sans doubler les billets.
+    """
+
+    utilisateur = models.ForeignKey(
+        Utilisateur, on_delete=models.CASCADE, related_name="commandes"
+    )
+    cle_idempotence = models.CharField(max_length=64, unique=True)
+    reference_paiement = models.CharField(max_length=64, blank=True, db_index=True)
+    montant = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    nombre_billets = models.PositiveIntegerField(default=0)
+    date_commande = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = CommandeManager()
+
+    def __str__(self):
+        """
+        Retourne une chaîne de caractères représentant la commande.
+        """
+        return f"Commande {self.pk} - {self.montant}€ - {self.date_commande}"
+
+
 class Ticket(models.Model):
     """
     Ce modèle représente un ticket acheté par un utilisateur.
@@ -156,6 +260,31 @@ class Ticket(models.Model):
     sport = models.ForeignKey(Sport, on_delete=models.CASCADE, default=1)
     quantite = models.PositiveIntegerField(default=1)
     est_achete = models.BooleanField(default=False)
+    date_creation = models.DateTimeField(default=timezone.now)
+    titulaire = models.CharField(max_length=100, blank=True)
+    commande = models.ForeignKey(
+        Commande,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="tickets",
+    )
+
+    class Meta:
+        """
+        Index des requêtes du panier, des commandes et de la purge des paniers.
+        """
+
+        indexes = [
+            models.Index(
+                fields=["utilisateur", "est_achete"],
+                name="ticket_utilisateur_achete_idx",
+            ),
+            models.Index(
+                fields=["est_achete", "date_creation"],
+                name="ticket_achete_creation_idx",
+            ),
+        ]
 
     def get_prix_total(self):
         """
@@ -181,7 +310,7 @@ class Paiement(models.Model):
     montant = models.DecimalField(max_digits=10, decimal_places=2)
     methode_paiement = models.CharField(max_length=50)
     statut_paiement = models.BooleanField(default=False)
-    date_paiement = models.DateTimeField(default=timezone.now)
+    date_paiement = models.DateTimeField(default=timezone.now, db_index=True)
 
     def __str__(self):
         """
@@ -198,10 +327,14 @@ class GenerationTicket(models.Model):
     ticket = models.ForeignKey(
         "Ticket", on_delete=models.CASCADE, related_name="generation_tickets"
     )
-    cle_securisee_2 = models.CharField(max_length=64, blank=True, editable=False)
+    cle_securisee_2 = models.CharField(
+        max_length=64, blank=True, editable=False, unique=True
+    )
     quantite_vendue = models.IntegerField(default=0)
-    date_generation = models.DateTimeField(auto_now_add=True)
-    qr_code = models.URLField(max_length=500, blank=True, null=True)
+    date_generation = models.DateTimeField(auto_now_add=True, db_index=True)
+    # NULL tant que le QR code n'est pas hébergé, jamais "" : l'index permet
+    # de compter et de parcourir les billets en attente sans lire la table.
+    qr_code = models.URLField(max_length=500, blank=True, null=True, db_index=True)
 
     def save(self, *args, **kwargs):
         """
@@ -214,26 +347,67 @@ class GenerationTicket(models.Model):
             self.ticket.utilisateur.cle_securisee_1}{
             self.cle_securisee_2}"
 
-        qr = qrcode.QRCode(version=1, box_size=10, border=5)
-        qr.add_data(cle_finale)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill="black", back_color="white")
-        buffer = BytesIO()
-        img.save(buffer, format="PNG")
-        buffer.seek(0)
+        buffer = generer_qr_code(cle_finale)
 
         try:
-            result = cloudinary.uploader.upload(
+            self.qr_code = televerser_qr_code(
                 buffer,
-                folder="qr_codes",
                 public_id=f"qr_code_{
                     self.ticket.id}",
             )
-            self.qr_code = result["secure_url"]
         except Exception as e:
             logger.error(f"Error uploading QR code to Cloudinary: {str(e)}")
             traceback.print_exc()
             raise e
 
         super().save(*args, **kwargs)
+
+
+class AchatGroupe(models.Model):
+    """
+    Ce modèle représente l'achat groupé d'un partenaire : la commande et ses
+    tickets sont enregistrés à la soumission, les billets sont émis ensuite
+    par lots (voir achats_groupes.py).
+    """
+
+    EN_ATTENTE = "en_attente"
+    EN_COURS = "en_cours"
+    TERMINE = "termine"
+    ECHOUE = "echoue"
+    STATUTS = [
+        (EN_ATTENTE, "En attente"),
+        (EN_COURS, "En cours"),
+        (TERMINE, "Terminé"),
+        (ECHOUE, "Échoué"),
+    ]
+
+    partenaire = models.ForeignKey(
+        Utilisateur, on_delete=models.CASCADE, related_name="achats_groupes"
+    )
+    commande = models.OneToOneField(
+        Commande, on_delete=models.CASCADE, related_name="achat_groupe"
+    )
+    statut = models.CharField(
+        max_length=20, choices=STATUTS, default=EN_ATTENTE, db_index=True
+    )
+    billets_demandes = models.PositiveIntegerField()
+    billets_emis = models.PositiveIntegerField(default=0)
+    erreur = models.TextField(blank=True)
+    echecs = models.PositiveIntegerField(default=0)
+    date_creation = models.DateTimeField(default=timezone.now)
+    date_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        """
+        Permission des partenaires autorisés à acheter en gros.
+        """
+
+        permissions = [
+            ("acheter_en_gros", "Peut acheter des billets en gros (partenaire)")
+        ]
+
+    def __str__(self):
+        """
+        Retourne une chaîne de caractères représentant l'achat groupé.
+        """
+        return f"Achat groupé {self.pk} - {self.billets_emis}/{self.billets_demandes}"
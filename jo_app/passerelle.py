@@ -0,0 +1,259 @@
+"""
+Ce module gère les passerelles de paiement.
+Il contient l'interface PasserellePaiement, la passerelle simulée utilisée par
+défaut, la passerelle HTTP (connexions réutilisées, délais stricts et
+disjoncteur) et la fonction obtenir_passerelle qui charge celle configurée.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+from .instrumentation import chronometrer
+
+logger = logging.getLogger(__name__)
+
+STATUT_ACCEPTE = "accepte"
+STATUT_REFUSE = "refuse"
+STATUT_EN_ATTENTE = "en_attente"
+STATUT_ANNULE = "annule"
+
+
+class PasserelleIndisponible(Exception):
+    """
+    La passerelle ne répond pas à temps, répond en erreur, ou le disjoncteur est ouvert.
+    """
+
+
+@dataclass(frozen=True)
+class ResultatPaiement:
+    """
+    Résultat d'une demande de paiement auprès de la passerelle.
+    """
+
+    reference: str
+    statut: str
+
+    @property
+    def accepte(self):
+        """
+        Indique si le paiement est accepté.
+        """
+        return self.statut == STATUT_ACCEPTE
+
+
+class Disjoncteur:
+    """
+    Coupe les appels à la passerelle après un nombre d'échecs consécutifs,
+    puis laisse passer un appel d'essai une fois le délai de réouverture écoulé.
+    """
+
+    def __init__(self, seuil=5, delai_reouverture=30.0):
+        """
+        Initialise le disjoncteur, fermé.
+        """
+        self.seuil = seuil
+        self.delai_reouverture = delai_reouverture
+        self._echecs = 0
+        self._ouvert_depuis = None
+        self._verrou = threading.Lock()
+
+    @property
+    def ouvert(self):
+        """
+        Indique si le disjoncteur coupe actuellement les appels.
+        """
+        return self._ouvert_depuis is not None
+
+    def autoriser_appel(self):
+        """
+        Indique si un appel peut être tenté.
+        """
+        with self._verrou:
+            if self._ouvert_depuis is None:
+                return True
+            if time.monotonic() - self._ouvert_depuis >= self.delai_reouverture:
+                # Semi-ouvert : un seul appel d'essai avant le prochain délai.
+                self._ouvert_depuis = time.monotonic()
+                return True
+            return False
+
+    def succes(self):
+        """
+        Referme le disjoncteur après un appel réussi.
+        """
+        with self._verrou:
+            self._echecs = 0
+            self._ouvert_depuis = None
+
+    def echec(self):
+        """
+        Compte un échec et ouvre le disjoncteur au-delà du seuil.
+        """
+        with self._verrou:
+            self._echecs += 1
+            if self._echecs >= self.seuil:
+                self._ouvert_depuis = time.monotonic()
+
+
+class PasserellePaiement:
+    """
+    Interface commune des passerelles de paiement.
+    """
+
+    def autoriser(self, montant, carte, reference):
+        """
+        Demande l'autorisation d'un paiement et retourne un ResultatPaiement.
+        La référence sert de clé d'idempotence auprès de la passerelle.
+        """
+        raise NotImplementedError
+
+    def statut(self, reference):
+        """
+        Retourne le ResultatPaiement courant d'un paiement.
+        """
+        raise NotImplementedError
+
+    def annuler(self, reference):
+        """
+        Annule l'autorisation d'un paiement (sans débit) et retourne son
+        ResultatPaiement.
+        """
+        raise NotImplementedError
+
+
+class PasserelleSimulee(PasserellePaiement):
+    """
+    Passerelle locale : accepte tout paiement dont la carte est renseignée.
+    """
+
+    def __init__(self, **options):
+        """
+        Initialise la passerelle ; les options sont ignorées.
+        """
+
+    def autoriser(self, montant, carte, reference):
+        """
+        Accepte le paiement si tous les champs de la carte sont renseignés.
+        """
+        statut = STATUT_ACCEPTE if all(carte.values()) else STATUT_REFUSE
+        return ResultatPaiement(reference, statut)
+
+    def statut(self, reference):
+        """
+        Retourne un paiement accepté.
+        """
+        return ResultatPaiement(reference, STATUT_ACCEPTE)
+
+    def annuler(self, reference):
+        """
+        Retourne un paiement annulé.
+        """
+        return ResultatPaiement(reference, STATUT_ANNULE)
+
+
+class PasserelleHttp(PasserellePaiement):
+    """
+    Passerelle distante appelée en HTTP avec un pool de connexions persistantes,
+    des délais de connexion et de lecture stricts et un disjoncteur.
+    """
+
+    def __init__(
+        self,
+        url,
+        delai_connexion=2.0,
+        delai_lecture=5.0,
+        taille_pool=10,
+        seuil_disjoncteur=5,
+        delai_reouverture=30.0,
+    ):
+        """
+        Initialise la session HTTP partagée entre les threads du worker.
+        """
+        self.url = url.rstrip("/")
+        self.delais = (delai_connexion, delai_lecture)
+        self.disjoncteur = Disjoncteur(seuil_disjoncteur, delai_reouverture)
+        self.session = requests.Session()
+        adaptateur = HTTPAdapter(
+            pool_connections=1, pool_maxsize=taille_pool, max_retries=0
+        )
+        self.session.mount("http://", adaptateur)
+        self.session.mount("https://", adaptateur)
+
+    def _appeler(self, methode, chemin, **kwargs):
+        """
+        Appelle la passerelle et convertit sa réponse en ResultatPaiement.
+        """
+        if not self.disjoncteur.autoriser_appel():
+            raise PasserelleIndisponible("Disjoncteur ouvert.")
+        try:
+            with chronometrer("passerelle"):
+                reponse = self.session.request(
+                    methode, f"{self.url}{chemin}", timeout=self.delais, **kwargs
+                )
+            if reponse.status_code >= 500:
+                raise requests.HTTPError(f"Erreur {reponse.status_code}")
+            donnees = reponse.json()
+            resultat = ResultatPaiement(donnees["reference"], donnees["statut"])
+        except (requests.RequestException, ValueError, KeyError) as e:
+            self.disjoncteur.echec()
+            logger.warning(f"Passerelle de paiement indisponible : {e}")
+            raise PasserelleIndisponible(str(e)) from e
+        self.disjoncteur.succes()
+        return resultat
+
+    def autoriser(self, montant, carte, reference):
+        """
+        Demande l'autorisation du paiement à la passerelle distante.
+        """
+        return self._appeler(
+            "POST",
+            "/paiements",
+            json={"montant": str(montant), "carte": carte, "reference": reference},
+            headers={"Idempotency-Key": reference},
+        )
+
+    def statut(self, reference):
+        """
+        Interroge la passerelle distante sur le statut d'un paiement.
+        """
+        return self._appeler("GET", f"/paiements/{reference}")
+
+    def annuler(self, reference):
+        """
+        Demande à la passerelle distante d'annuler l'autorisation du paiement
+        (idempotent sur la référence).
+        """
+        return self._appeler(
+            "POST",
+            f"/paiements/{reference}/annulation",
+            headers={"Idempotency-Key": f"annulation-{reference}"},
+        )
+
+
+@lru_cache(maxsize=None)
+def obtenir_passerelle():
+    """
+    Retourne la passerelle configurée, partagée par tout le processus
+    pour réutiliser son pool de connexions.
+    """
+    classe = import_string(settings.PASSERELLE_PAIEMENT_CLASSE)
+    return classe(**settings.PASSERELLE_PAIEMENT_OPTIONS)
+
+
+@receiver(setting_changed)
+def reinitialiser_passerelle(setting, **kwargs):
+    """
+    Recharge la passerelle lorsque sa configuration change (tests).
+    """
+    if setting.startswith("PASSERELLE_PAIEMENT"):
+        obtenir_passerelle.cache_clear()
@@ -0,0 +1,18 @@
+"""
+Ce module gère le rendu PDF des billets.
+WeasyPrint (et ses dépendances fontTools, pydyf, Pango) n'est importé qu'au
+premier rendu, pas au démarrage de chaque worker.
+"""
+
+from .instrumentation import chronometrer
+
+
+def rendre_pdf(html_string, cible=None):
+    """
+    Rend le HTML en PDF dans la cible (fichier ou réponse HTTP), ou retourne
+    les octets du PDF si aucune cible n'est donnée.
+    """
+    with chronometrer("pdf"):
+        from weasyprint import HTML
+
+        return HTML(string=html_string).write_pdf(cible)
@@ -0,0 +1,4 @@
+"""
+Ce paquet contient le moteur MySQL avec pool de connexions partagé par les
+threads d'un worker (ENGINE = "jo_app.pool_mysql").
+"""
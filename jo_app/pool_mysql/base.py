@@ -0,0 +1,52 @@
+"""
+Ce module contient le moteur MySQL dont les connexions sont empruntées à un
+pool partagé par les threads du worker au lieu d'être ouvertes à chaque requête.
+
+Options (clé "POOL" de la base dans DATABASES) : taille, delai, duree_vie,
+controle_apres. CONN_MAX_AGE doit valoir 0 : la connexion est rendue au pool
+à la fin de chaque requête.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.mysql import base as mysql
+from django.utils.functional import cached_property
+
+from .pool import obtenir_pool
+
+
+class DatabaseWrapper(mysql.DatabaseWrapper):
+    """
+    Connexion MySQL empruntée au pool du processus.
+    """
+
+    @cached_property
+    def pool(self):
+        """
+        Retourne le pool de connexions de cette base.
+        """
+        return obtenir_pool(self.alias, self.settings_dict.get("POOL", {}))
+
+    def check_settings(self):
+        """
+        Refuse les connexions persistantes, incompatibles avec le pool.
+        """
+        super().check_settings()
+        if self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured(
+                "Le moteur jo_app.pool_mysql requiert CONN_MAX_AGE = 0."
+            )
+
+    def get_new_connection(self, conn_params):
+        """
+        Emprunte une connexion au pool, ouverte au besoin.
+        """
+        ouvrir = super().get_new_connection
+        return self.pool.emprunter(lambda: ouvrir(conn_params))
+
+    def _close(self):
+        """
+        Rend la connexion au pool au lieu de la fermer.
+        """
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.rendre(self.connection, reutilisable=not self.errors_occurred)
@@ -0,0 +1,175 @@
+"""
+Ce module gère le pool de connexions à la base, indépendant du pilote.
+
+Chaque worker garde au plus `taille` connexions ouvertes, prêtées aux threads
+le temps d'une requête puis rendues. Une connexion restée inactive plus de
+`controle_apres` secondes est vérifiée avant d'être prêtée, et une connexion
+plus vieille que `duree_vie` secondes est remplacée.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+
+_pools = {}
+_verrou_pools = threading.Lock()
+
+# Connexions héritées d'un processus parent, gardées en vie pour que leur
+# destruction n'envoie pas de déconnexion sur le socket du parent.
+_heritees = []
+
+
+class PoolEpuise(OperationalError):
+    """
+    Aucune connexion n'a pu être empruntée avant l'expiration du délai.
+    """
+
+
+class PoolConnexions:
+    """
+    Pool de connexions borné et sûr entre threads.
+    """
+
+    def __init__(self, taille=10, delai=5.0, duree_vie=600.0, controle_apres=30.0):
+        """
+        Initialise un pool vide ; les connexions sont ouvertes à la demande.
+        """
+        self.taille = taille
+        self.delai = delai
+        self.duree_vie = duree_vie
+        self.controle_apres = controle_apres
+        self._places = threading.BoundedSemaphore(taille)
+        self._libres = deque()
+        self._creations = {}
+        self._verrou = threading.Lock()
+        self._pid = os.getpid()
+
+    def _apres_fork(self):
+        """
+        Oublie les connexions héritées du processus parent : leurs sockets
+        appartiennent au parent et ne doivent être ni utilisées ni fermées ici.
+        """
+        if self._pid != os.getpid():
+            with self._verrou:
+                _heritees.extend(connexion for connexion, _ in self._libres)
+                self._libres.clear()
+                self._creations.clear()
+                self._places = threading.BoundedSemaphore(self.taille)
+                self._pid = os.getpid()
+
+    def _expiree(self, connexion):
+        """
+        Indique si une connexion a dépassé sa durée de vie.
+        """
+        return time.monotonic() - self._creations[id(connexion)] >= self.duree_vie
+
+    def _fermer(self, connexion):
+        """
+        Ferme une connexion sans propager d'erreur.
+        """
+        self._creations.pop(id(connexion), None)
+        try:
+            connexion.close()
+        except Exception:
+            pass
+
+    def emprunter(self, connecter):
+        """
+        Prête une connexion libre et saine, ou en ouvre une avec connecter().
+        Lève PoolEpuise si toutes les connexions restent prêtées pendant `delai`.
+        """
+        self._apres_fork()
+        if not self._places.acquire(timeout=self.delai):
+            raise PoolEpuise(
+                f"Aucune connexion libre parmi {self.taille} après {self.delai} s."
+            )
+        try:
+            while True:
+                with self._verrou:
+                    libre = self._libres.pop() if self._libres else None
+                if libre is None:
+                    connexion = connecter()
+                    self._creations[id(connexion)] = time.monotonic()
+                    return connexion
+                connexion, rendue_le = libre
+                if self._expiree(connexion):
+                    self._fermer(connexion)
+                elif time.monotonic() - rendue_le >= self.controle_apres and not (
+                    self._saine(connexion)
+                ):
+                    self._fermer(connexion)
+                else:
+                    return connexion
+        except BaseException:
+            self._places.release()
+            raise
+
+    def rendre(self, connexion, reutilisable=True):
+        """
+        Rend une connexion au pool, après annulation de toute transaction
+        ouverte, ou la ferme si elle n'est plus réutilisable.
+        """
+        try:
+            if reutilisable and self._pid == os.getpid():
+                connexion.rollback()
+                if not self._expiree(connexion):
+                    with self._verrou:
+                        self._libres.append((connexion, time.monotonic()))
+                    return
+            self._fermer(connexion)
+        except Exception:
+            self._fermer(connexion)
+        finally:
+            if self._pid == os.getpid():
+                self._places.release()
+
+    @staticmethod
+    def _saine(connexion):
+        """
+        Vérifie qu'une connexion répond encore.
+        """
+        try:
+            connexion.ping()
+        except Exception:
+            return False
+        return True
+
+    def fermer(self):
+        """
+        Ferme toutes les connexions libres du pool.
+        """
+        with self._verrou:
+            libres = list(self._libres)
+            self._libres.clear()
+        for connexion, _ in libres:
+            self._fermer(connexion)
+
+    @property
+    def nombre_libres(self):
+        """
+        Nombre de connexions ouvertes en attente d'emprunt.
+        """
+        return len(self._libres)
+
+
+def obtenir_pool(alias, options):
+    """
+    Retourne le pool de la base `alias`, créé au premier appel du processus.
+    """
+    with _verrou_pools:
+        if alias not in _pools:
+            _pools[alias] = PoolConnexions(**options)
+        return _pools[alias]
+
+
+def fermer_pools():
+    """
+    Ferme les connexions libres de tous les pools (avant un fork, par exemple).
+    """
+    with _verrou_pools:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.fermer()
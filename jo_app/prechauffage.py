@@ -0,0 +1,123 @@
+"""
+Ce module gère le préchauffage des workers avant qu'ils ne reçoivent du trafic.
+
+Sans préchauffage, la première requête de chaque worker compile ses gabarits,
+charge le catalogue et ouvre sa connexion à la base, et le premier billet PDF
+paie la découverte des polices de WeasyPrint. Après un redéploiement ou un
+recyclage de workers, ces coûts se traduisent par des pics de latence.
+"""
+
+import base64
+import logging
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from django.db import connections
+from django.template import TemplateSyntaxError, engines
+from django.template.loader import render_to_string
+
+from .catalogue import obtenir_catalogue
+from .formatage import formater_prix
+from .models import GenerationTicket, Offre, Sport, Ticket, Utilisateur
+from .pdf import rendre_pdf
+from .qr_codes import generer_qr_code
+
+logger = logging.getLogger(__name__)
+
+
+def compiler_gabarits():
+    """
+    Compile tous les gabarits des moteurs Django et retourne leur nombre.
+    Avec le chargeur en cache (DEBUG désactivé), ils restent compilés en mémoire.
+    """
+    nombre = 0
+    for moteur in engines.all():
+        noms = {
+            chemin.relative_to(dossier).as_posix()
+            for dossier in moteur.template_dirs
+            for chemin in Path(dossier).rglob("*.html")
+        }
+        for nom in sorted(noms):
+            try:
+                moteur.get_template(nom)
+            except TemplateSyntaxError as e:
+                logger.warning(f"Gabarit {nom} non compilé : {e}")
+            else:
+                nombre += 1
+    return nombre
+
+
+def rendre_billet_factice():
+    """
+    Rend un billet PDF fictif, sans accès à la base ni au réseau, pour charger
+    WeasyPrint, ses polices et le CSS de billet_pdf.html. Retourne la taille du PDF.
+    """
+    qr_code = base64.b64encode(generer_qr_code("prechauffage").getvalue()).decode()
+    offre = Offre(type="solo", prix=Decimal("50.00"))
+    billet = GenerationTicket(
+        ticket=Ticket(
+            utilisateur=Utilisateur(prenom="Préchauffage", nom="Worker"),
+            sport=Sport(nom="Préchauffage", date_evenement=date.today()),
+            offre=offre,
+        ),
+        qr_code=f"data:image/png;base64,{qr_code}",
+    )
+    html_string = render_to_string(
+        "billet_pdf.html",
+        {
+            "billet": billet,
+            "qr_code_url": billet.qr_code,
+            "offre_formate": f"{offre.type} - {formater_prix(offre.prix)} €",
+        },
+    )
+    return len(rendre_pdf(html_string))
+
+
+def charger_catalogue():
+    """
+    Charge l'instantané du catalogue et retourne le nombre de sports.
+    """
+    return len(obtenir_catalogue().sports)
+
+
+def ouvrir_connexions():
+    """
+    Ouvre les connexions à toutes les bases configurées et retourne leur nombre.
+    Une connexion non persistante (CONN_MAX_AGE = 0) est aussitôt rendue : avec
+    le moteur jo_app.pool_mysql, elle reste ouverte dans le pool du worker.
+    """
+    for connexion in connections.all():
+        connexion.ensure_connection()
+        if connexion.settings_dict["CONN_MAX_AGE"] == 0:
+            connexion.close()
+    return len(connections.all())
+
+
+ETAPES = {
+    "gabarits": compiler_gabarits,
+    "billet": rendre_billet_factice,
+    "catalogue": charger_catalogue,
+    "connexions": ouvrir_connexions,
+}
+
+
+def prechauffer(etapes=tuple(ETAPES)):
+    """
+    Exécute les étapes de préchauffage demandées et retourne, pour chacune,
+    un tuple (nom, durée en ms, résultat, erreur). Une étape en échec est
+    journalisée sans interrompre les suivantes.
+    """
+    rapport = []
+    for nom in etapes:
+        debut = time.perf_counter()
+        resultat, erreur = None, None
+        try:
+            resultat = ETAPES[nom]()
+        except Exception as e:
+            erreur = str(e)
+            logger.warning(f"Préchauffage {nom} en échec : {e}")
+        duree_ms = (time.perf_counter() - debut) * 1000
+        rapport.append((nom, duree_ms, resultat, erreur))
+    return rapport
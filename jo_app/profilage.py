@@ -0,0 +1,184 @@
+"""
+Ce module contient le profilage à la demande des requêtes du personnel.
+
+Une requête qui porte un jeton de profilage valide (paramètre ?profiler= ou
+en-tête X-Profilage, voir la commande profils --jeton) exécute sa vue sous
+cProfile, pendant qu'un thread échantillonne sa pile toutes les
+PROFILAGE_INTERVALLE secondes. La capture est enregistrée dans
+PROFILAGE_DOSSIER : statistiques pstats, piles repliées (format de
+flamegraph.pl et speedscope) et description JSON avec la liste des requêtes
+SQL. Les requêtes sans jeton ne sont pas touchées.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+SEL = "jo_app.profilage"
+PARAMETRE = "profiler"
+ENTETE = "HTTP_X_PROFILAGE"
+
+
+def creer_jeton(utilisateur):
+    """
+    Retourne un jeton de profilage signé, valable PROFILAGE_JETON_DUREE
+    secondes pour cet utilisateur.
+    """
+    return signing.TimestampSigner(salt=SEL).sign(str(utilisateur.pk))
+
+
+def jeton_valide(jeton, utilisateur):
+    """
+    Indique si le jeton est valide pour cet utilisateur, membre du personnel.
+    """
+    if not utilisateur.is_staff:
+        return False
+    try:
+        valeur = signing.TimestampSigner(salt=SEL).unsign(
+            jeton, max_age=settings.PROFILAGE_JETON_DUREE
+        )
+    except signing.BadSignature:
+        return False
+    return valeur == str(utilisateur.pk)
+
+
+def jeton_requete(request):
+    """
+    Retourne le jeton de profilage de la requête, ou None. La chaîne de
+    requête n'est analysée que si elle contient le paramètre.
+    """
+    jeton = request.META.get(ENTETE)
+    if jeton is None and f"{PARAMETRE}=" in request.META.get("QUERY_STRING", ""):
+        jeton = request.GET.get(PARAMETRE)
+    return jeton
+
+
+class Echantillonneur(threading.Thread):
+    """
+    Thread qui relève la pile d'un autre thread à intervalle régulier.
+    """
+
+    def __init__(self, ident, intervalle):
+        """
+        Prépare l'échantillonnage du thread `ident`.
+        """
+        super().__init__(daemon=True)
+        self.cible = ident
+        self.intervalle = intervalle
+        self.piles = Counter()
+        self.arret = threading.Event()
+
+    def run(self):
+        """
+        Relève la pile jusqu'à l'arrêt.
+        """
+        while not self.arret.wait(self.intervalle):
+            frame = sys._current_frames().get(self.cible)
+            pile = []
+            while frame is not None:
+                code = frame.f_code
+                pile.append(f"{frame.f_globals.get('__name__')}.{code.co_qualname}")
+                frame = frame.f_back
+            if pile:
+                self.piles[";".join(reversed(pile))] += 1
+
+    def arreter(self):
+        """
+        Arrête l'échantillonnage et retourne les piles repliées.
+        """
+        self.arret.set()
+        self.join()
+        return "".join(f"{pile} {n}\n" for pile, n in self.piles.most_common())
+
+
+def profiler(request, vue, args, kwargs):
+    """
+    Exécute la vue sous le profileur, enregistre la capture et retourne la
+    réponse, qui indique le nom de la capture dans l'en-tête X-Profilage.
+    """
+    requetes_sql = []
+
+    def collecter(execute, sql, params, many, context):
+        """
+        Note chaque requête SQL et sa durée.
+        """
+        debut = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duree = (time.perf_counter() - debut) * 1000
+            requetes_sql.append({"sql": sql, "duree_ms": round(duree, 3)})
+
+    profil = cProfile.Profile()
+    echantillonneur = Echantillonneur(
+        threading.get_ident(), settings.PROFILAGE_INTERVALLE
+    )
+    with ExitStack() as pile:
+        for connexion in connections.all():
+            pile.enter_context(connexion.execute_wrapper(collecter))
+        echantillonneur.start()
+        debut = time.perf_counter()
+        profil.enable()
+        try:
+            response = vue(request, *args, **kwargs)
+            if hasattr(response, "render") and callable(response.render):
+                response = response.render()
+        finally:
+            profil.disable()
+            duree = time.perf_counter() - debut
+            piles = echantillonneur.arreter()
+
+    nom = enregistrer(request, profil, piles, requetes_sql, duree, response)
+    response["X-Profilage"] = nom
+    return response
+
+
+def enregistrer(request, profil, piles, requetes_sql, duree, response):
+    """
+    Enregistre la capture dans PROFILAGE_DOSSIER et retourne son nom.
+    """
+    dossier = Path(settings.PROFILAGE_DOSSIER)
+    dossier.mkdir(parents=True, exist_ok=True)
+    vue = request.resolver_match.view_name.replace(":", "-")
+    nom = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{vue}-{os.getpid()}"
+
+    profil.dump_stats(dossier / f"{nom}.pstats")
+    (dossier / f"{nom}.collapsed").write_text(piles, encoding="utf-8")
+    description = {
+        "nom": nom,
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "vue": request.resolver_match.view_name,
+        "chemin": request.path,
+        "utilisateur": request.user.pk,
+        "statut": response.status_code,
+        "duree_ms": round(duree * 1000, 1),
+        "requetes_sql": requetes_sql,
+    }
+    (dossier / f"{nom}.json").write_text(
+        json.dumps(description, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    return nom
+
+
+def captures():
+    """
+    Retourne la description des captures enregistrées, la plus récente en premier.
+    """
+    dossier = Path(settings.PROFILAGE_DOSSIER)
+    if not dossier.is_dir():
+        return []
+    return [
+        json.loads(chemin.read_text(encoding="utf-8"))
+        for chemin in sorted(dossier.glob("*.json"), reverse=True)
+    ]
@@ -0,0 +1,77 @@
+"""
+Ce module gère la génération et l'hébergement des QR codes des billets.
+qrcode (avec Pillow) et cloudinary.uploader ne sont importés qu'à la première
+génération : les workers et les commandes qui n'émettent aucun billet ne
+chargent jamais ces bibliothèques.
+Avec QR_CODES_STOCKAGE = "local" (tests de charge), les images sont écrites
+dans QR_CODES_DOSSIER au lieu d'être envoyées sur Cloudinary.
+"""
+
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+
+from .instrumentation import chronometrer
+from .metriques import ECHECS_TELEVERSEMENT_QR, TELEVERSEMENT_QR
+
+
+def generer_qr_code(donnees):
+    """
+    Retourne l'image PNG du QR code des données dans un tampon mémoire.
+    """
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(donnees)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill="black", back_color="white")
+    buffer = BytesIO()
+    img.save(buffer, format="PNG")
+    buffer.seek(0)
+    return buffer
+
+
+def televerser_qr_code(buffer, public_id):
+    """
+    Héberge l'image du QR code sur Cloudinary et retourne son URL sécurisée.
+    """
+    if settings.QR_CODES_STOCKAGE == "local":
+        return enregistrer_qr_code(buffer, public_id)
+
+    with chronometrer("cloudinary"):
+        import cloudinary.uploader
+
+        with ECHECS_TELEVERSEMENT_QR.count_exceptions(), TELEVERSEMENT_QR.time():
+            result = cloudinary.uploader.upload(
+                buffer, folder="qr_codes", public_id=public_id
+            )
+    return result["secure_url"]
+
+
+def enregistrer_qr_code(buffer, public_id):
+    """
+    Écrit l'image du QR code dans QR_CODES_DOSSIER et retourne son URL file://,
+    que WeasyPrint sait lire pour le rendu du billet.
+    """
+    dossier = Path(settings.QR_CODES_DOSSIER)
+    dossier.mkdir(parents=True, exist_ok=True)
+    chemin = dossier / f"{public_id}.png"
+    with ECHECS_TELEVERSEMENT_QR.count_exceptions(), TELEVERSEMENT_QR.time():
+        chemin.write_bytes(buffer.getvalue())
+    return chemin.resolve().as_uri()
+
+
+def completer_qr_code(billet):
+    """
+    Génère et héberge le QR code d'un billet émis sans (commandes, achats
+    groupés), puis l'enregistre sans passer par GenerationTicket.save. Le
+    ticket et son utilisateur doivent être chargés. Retourne l'URL du QR code.
+    """
+    contenu = f"{billet.ticket.utilisateur.cle_securisee_1}{billet.cle_securisee_2}"
+    billet.qr_code = televerser_qr_code(
+        generer_qr_code(contenu), public_id=f"qr_code_billet_{billet.id}"
+    )
+    type(billet).objects.filter(pk=billet.pk).update(qr_code=billet.qr_code)
+    return billet.qr_code
@@ -0,0 +1,177 @@
+"""
+Ce module gère le routage des lectures vers les réplicas de la base.
+
+Seules les vues décorées par lectures_sur_replique (rapports, historique des
+commandes) lisent sur un réplica, et seulement pour les modèles de
+MODELES_REPLIQUES. Un visiteur qui vient d'écrire est épinglé au primaire
+pendant REPLIQUE_EPINGLAGE secondes (voir RouteurReplicasMiddleware) pour
+relire ses propres écritures. Un réplica en retard de plus de
+REPLIQUE_RETARD_MAX secondes, ou injoignable, est écarté au profit du primaire.
+"""
+
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+MODELES_REPLIQUES = {
+    "jo_app.sport",
+    "jo_app.offre",
+    "jo_app.ticket",
+    "jo_app.generationticket",
+    "jo_app.commande",
+    "jo_app.paiement",
+}
+
+_sante = {}
+_verrou = threading.Lock()
+
+
+@dataclass
+class EtatRoutage:
+    """
+    État de routage de la requête en cours.
+    """
+
+    epingle: bool = False
+    replique: bool = False
+    ecriture: bool = False
+
+
+_etat = ContextVar("jo_routage", default=None)
+
+
+@contextmanager
+def routage(epingle=False):
+    """
+    Ouvre l'état de routage d'une requête, épinglée au primaire ou non.
+    """
+    etat = EtatRoutage(epingle=epingle)
+    jeton = _etat.set(etat)
+    try:
+        yield etat
+    finally:
+        _etat.reset(jeton)
+
+
+def lectures_sur_replique(vue):
+    """
+    Autorise la vue à lire sur un réplica.
+    """
+
+    @wraps(vue)
+    def enveloppe(request, *args, **kwargs):
+        """
+        Marque la requête comme autorisée à lire sur un réplica.
+        """
+        etat = _etat.get()
+        if etat is None:
+            return vue(request, *args, **kwargs)
+        etat.replique = True
+        try:
+            return vue(request, *args, **kwargs)
+        finally:
+            etat.replique = False
+
+    return enveloppe
+
+
+def retard_replique(alias):
+    """
+    Retourne le retard de réplication du réplica en secondes, ou None si la
+    réplication est arrêtée. Les bases autres que MySQL n'ont pas de retard :
+    leur connexion est seulement vérifiée. Lève DatabaseError si le réplica
+    est injoignable.
+    """
+    connexion = connections[alias]
+    with connexion.cursor() as curseur:
+        if connexion.vendor != "mysql":
+            curseur.execute("SELECT 1")
+            return 0
+        curseur.execute("SHOW REPLICA STATUS")
+        ligne = curseur.fetchone()
+        if ligne is None:
+            return None
+        statut = dict(zip([colonne[0] for colonne in curseur.description], ligne))
+    return statut.get("Seconds_Behind_Source", statut.get("Seconds_Behind_Master"))
+
+
+def replique_disponible(alias):
+    """
+    Indique si le réplica répond avec un retard acceptable. Le résultat est
+    gardé REPLIQUE_CONTROLE_INTERVALLE secondes par processus.
+    """
+    maintenant = time.monotonic()
+    with _verrou:
+        controle = _sante.get(alias)
+    if controle is not None and maintenant - controle[1] < (
+        settings.REPLIQUE_CONTROLE_INTERVALLE
+    ):
+        return controle[0]
+
+    try:
+        retard = retard_replique(alias)
+    except DatabaseError as e:
+        logger.warning(f"Réplica {alias} injoignable : {e}")
+        retard = None
+    disponible = retard is not None and retard <= settings.REPLIQUE_RETARD_MAX
+    if retard is not None and not disponible:
+        logger.warning(f"Réplica {alias} en retard de {retard} s.")
+    with _verrou:
+        _sante[alias] = (disponible, maintenant)
+    return disponible
+
+
+class RouteurReplicas:
+    """
+    Routeur de base : lectures autorisées sur un réplica disponible,
+    écritures et tout le reste sur le primaire.
+    """
+
+    def db_for_read(self, model, **hints):
+        """
+        Choisit un réplica disponible si la requête et le modèle le permettent.
+        """
+        etat = _etat.get()
+        if (
+            etat is None
+            or not etat.replique
+            or etat.epingle
+            or etat.ecriture
+            or model._meta.label_lower not in MODELES_REPLIQUES
+        ):
+            return DEFAULT_DB_ALIAS
+        repliques = [
+            alias for alias in settings.REPLIQUES_LECTURE if replique_disponible(alias)
+        ]
+        return random.choice(repliques) if repliques else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        """
+        Écrit sur le primaire et note l'écriture pour épingler le visiteur.
+        """
+        etat = _etat.get()
+        if etat is not None and model._meta.label_lower in MODELES_REPLIQUES:
+            etat.ecriture = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """
+        Le primaire et ses réplicas contiennent les mêmes données.
+        """
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """
+        Les réplicas reçoivent le schéma par réplication, jamais par migration.
+        """
+        return db not in settings.REPLIQUES_LECTURE
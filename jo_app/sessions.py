@@ -0,0 +1,174 @@
+"""
+Ce module contient le moteur de sessions de l'application
+(SESSION_ENGINE = "jo_app.sessions").
+
+La base reste le stockage durable des sessions, mais la ligne django_session
+n'est réécrite que si les données de la session changent ou si son
+expiration avance de plus de SESSION_SEUIL_PROLONGATION secondes : avec
+SESSION_SAVE_EVERY_REQUEST, la plupart des requêtes n'écrivent plus rien.
+Les lectures sont servies par le cache lorsqu'il est partagé entre les
+workers ; un cache local au processus n'est pas utilisé, car un worker
+pourrait y relire une session modifiée ou supprimée par un autre.
+"""
+
+import time
+from copy import deepcopy
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends import db
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils import timezone
+
+KEY_PREFIX = "jo_app.sessions"
+
+
+def cache_partage():
+    """
+    Retourne le cache des sessions s'il est partagé entre les workers, sinon None.
+    """
+    cache = caches[settings.SESSION_CACHE_ALIAS]
+    return None if isinstance(cache, LocMemCache) else cache
+
+
+def supprimer_sessions_expirees(taille_lot=1000, pause=0.0):
+    """
+    Supprime les sessions expirées par lots de `taille_lot` clés (via l'index
+    sur expire_date) et retourne le nombre de sessions supprimées.
+    """
+    modele = SessionStore.get_model_class()
+    expirees = modele.objects.filter(expire_date__lt=timezone.now())
+    total = 0
+    while True:
+        cles = list(
+            expirees.order_by("expire_date").values_list("pk", flat=True)[:taille_lot]
+        )
+        if not cles:
+            return total
+        total += modele.objects.filter(pk__in=cles).delete()[0]
+        if len(cles) < taille_lot:
+            return total
+        if pause:
+            time.sleep(pause)
+
+
+class SessionStore(db.SessionStore):
+    """
+    Session en base, lue depuis le cache partagé et écrite seulement si nécessaire.
+    """
+
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        """
+        Initialise la session ; aucune version enregistrée n'est encore connue.
+        """
+        super().__init__(session_key)
+        self._enregistre = None
+
+    @property
+    def cache_key(self):
+        """
+        Retourne la clé de la session dans le cache.
+        """
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def _mettre_en_cache(self, donnees, expiration):
+        """
+        Garde les données et l'expiration enregistrées dans le cache partagé.
+        """
+        cache = cache_partage()
+        if cache is None:
+            return
+        duree = int((expiration - timezone.now()).total_seconds())
+        try:
+            cache.set(self.cache_key, (donnees, expiration), max(duree, 0))
+        except Exception:
+            pass
+
+    def load(self):
+        """
+        Charge la session depuis le cache partagé, ou depuis la base à défaut,
+        et retient la version enregistrée pour la comparer à l'enregistrement.
+        """
+        cache = cache_partage()
+        entree = None
+        if cache is not None and self.session_key is not None:
+            try:
+                entree = cache.get(self.cache_key)
+            except Exception:
+                entree = None
+        if entree is None:
+            session = self._get_session_from_db()
+            if session is None:
+                self._enregistre = None
+                return {}
+            entree = (self.decode(session.session_data), session.expire_date)
+            self._mettre_en_cache(*entree)
+
+        donnees, expiration = entree
+        self._enregistre = (deepcopy(donnees), expiration)
+        return donnees
+
+    def doit_enregistrer(self):
+        """
+        Indique si les données ont changé ou si l'expiration avance au-delà du seuil.
+        """
+        if self._enregistre is None:
+            return True
+        donnees, expiration = self._enregistre
+        return self._get_session() != donnees or (
+            self.get_expiry_date() - expiration
+        ) >= timedelta(seconds=settings.SESSION_SEUIL_PROLONGATION)
+
+    def save(self, must_create=False):
+        """
+        Écrit la session en base uniquement si nécessaire, puis met le cache à jour.
+        """
+        if not must_create and self.session_key is not None:
+            if not self.doit_enregistrer():
+                return
+        super().save(must_create=must_create)
+        donnees = self._get_session(no_load=must_create)
+        self._enregistre = (deepcopy(donnees), self.get_expiry_date())
+        self._mettre_en_cache(*self._enregistre)
+
+    def delete(self, session_key=None):
+        """
+        Supprime la session de la base et du cache.
+        """
+        super().delete(session_key)
+        session_key = session_key or self.session_key
+        cache = cache_partage()
+        if cache is not None and session_key is not None:
+            try:
+                cache.delete(self.cache_key_prefix + session_key)
+            except Exception:
+                pass
+
+    async def aload(self):
+        """
+        Version asynchrone de load.
+        """
+        return await sync_to_async(self.load)()
+
+    async def asave(self, must_create=False):
+        """
+        Version asynchrone de save.
+        """
+        return await sync_to_async(self.save)(must_create)
+
+    async def adelete(self, session_key=None):
+        """
+        Version asynchrone de delete.
+        """
+        return await sync_to_async(self.delete)(session_key)
+
+    @classmethod
+    def clear_expired(cls):
+        """
+        Supprime les sessions expirées par lots (commande clearsessions).
+        """
+        supprimer_sessions_expirees()
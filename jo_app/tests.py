@@ -2,15 +2,49 @@
 Ce module gère les tests unitaires de l'application.
 """
 
+import json
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
 from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.messages import get_messages
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection, connections
+from django.test import LiveServerTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-
+from django.utils import timezone
+from prometheus_client import REGISTRY
+
+from jo_app import catalogue, file_attente, instrumentation, profilage, routeur
+from jo_app.authentification import CacheUtilisateurBackend
+from jo_app.achats_groupes import (
+    accorder_permission,
+    billets_a_emettre,
+    creer_jeton,
+    traiter,
+)
+from jo_app.catalogue import obtenir_catalogue
+from jo_app.donnees import GenerateurDonnees
+from jo_app.formatage import formater_date, formater_euros, formater_prix
+from jo_app.management.commands.mesurer_demarrage import analyser_importtime
+from jo_app.management.commands.mesurer_primitives import (
+    mesurer,
+    preparer_ventes,
+    regressions,
+)
+from jo_app.management.commands.passerelle_locale import creer_serveur
 from jo_app.models import (
+    AchatGroupe,
+    Commande,
     GenerationTicket,
     Offre,
     Paiement,
@@ -19,6 +53,17 @@ from jo_app.models import (
     Utilisateur,
     validate_password,
 )
+from jo_app.passerelle import (
+    STATUT_ANNULE,
+    STATUT_EN_ATTENTE,
+    Disjoncteur,
+    PasserelleHttp,
+    PasserelleIndisponible,
+    ResultatPaiement,
+)
+from jo_app.pool_mysql.pool import PoolConnexions, PoolEpuise
+from jo_app.prechauffage import ETAPES, prechauffer
+from jo_app.sessions import SessionStore
 
 from .forms import ConnexionForm, PaiementForm, TicketForm, UtilisateurForm
 
@@ -488,6 +533,70 @@ class TicketListViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Football")
 
+    def test_liste_limitee_a_l_utilisateur(self):
+        """
+        Test que la liste ne contient que les tickets de l'utilisateur, en un
+        nombre de requêtes indépendant du nombre de tickets.
+        """
+        autre = Utilisateur.objects.create_user(
+            email="autre@exemple.com", password="Test@123", nom="Autre", prenom="A"
+        )
+        natation = Sport.objects.create(nom="Natation", date_evenement="2024-07-28")
+        Ticket.objects.create(utilisateur=autre, sport=natation, offre=self.offre)
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(reverse("ticket_list"))
+        self.assertNotContains(response, "Natation")
+
+        for _ in range(5):
+            Ticket.objects.create(
+                utilisateur=self.utilisateur, sport=natation, offre=self.offre
+            )
+        with self.assertNumQueries(len(requetes)):
+            self.client.get(reverse("ticket_list"))
+
+    @override_settings(TICKETS_PAR_PAGE=2)
+    def test_pagination_par_curseur(self):
+        """
+        Test que le curseur parcourt toutes les pages sans doublon.
+        """
+        for _ in range(4):
+            Ticket.objects.create(
+                utilisateur=self.utilisateur, sport=self.sport, offre=self.offre
+            )
+        vus = []
+        apres = ""
+        while apres is not None:
+            page = self.client.get(
+                reverse("ticket_list"), {"format": "json", "apres": apres}
+            ).json()
+            self.assertLessEqual(len(page["tickets"]), 2)
+            vus += [ticket["id"] for ticket in page["tickets"]]
+            apres = page["suivant"]
+        self.assertEqual(
+            vus, list(Ticket.objects.order_by("-id").values_list("id", flat=True))
+        )
+
+    @override_settings(TICKETS_EXPORT_LOT=2)
+    def test_export_csv_en_flux(self):
+        """
+        Test que l'export CSV est diffusé en flux et contient tous les tickets
+        du personnel.
+        """
+        autre = Utilisateur.objects.create_user(
+            email="autre@exemple.com", password="Test@123", nom="Autre", prenom="A"
+        )
+        for _ in range(4):
+            Ticket.objects.create(utilisateur=autre, sport=self.sport, offre=self.offre)
+        self.utilisateur.is_staff = True
+        self.utilisateur.save()
+
+        response = self.client.get(reverse("ticket_export"))
+        self.assertTrue(response.streaming)
+        lignes = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lignes[0].split(";")[:3], ["id", "email", "sport"])
+        self.assertEqual(len(lignes), 1 + Ticket.objects.count())
+        self.assertIn("autre@exemple.com", lignes[-1])
+
 
 class PanierViewTest(TestCase):
     """
@@ -577,7 +686,7 @@ class TelechargerBilletViewTest(TestCase):
             utilisateur=self.utilisateur, offre=self.offre, sport=self.sport, quantite=1
         )
 
-        with patch("jo_app.models.cloudinary.uploader.upload") as mock_upload:
+        with patch("cloudinary.uploader.upload") as mock_upload:
             mock_upload.return_value = {"secure_url": "http://test.com/qr_code.png"}
             self.billet = GenerationTicket.objects.create(ticket=self.ticket)
 
@@ -827,3 +936,1813 @@ class ConnexionFormTest(TestCase):
         form = ConnexionForm(data=form_data)
         self.assertFalse(form.is_valid())
         self.assertIn("__all__", form.errors)
+
+
+class PurgerPaniersCommandTest(TestCase):
+    """
+    Test de la commande de purge des paniers abandonnés.
+    """
+
+    def setUp(self):
+        """
+        Création de tickets récents, anciens et achetés pour les tests.
+        """
+        self.utilisateur = Utilisateur.objects.create_user(
+            email="gilles.dupont@exemple.com",
+            password="Test@123",
+            nom="Dupont",
+            prenom="Gilles",
+        )
+        self.sport = Sport.objects.create(nom="Natation", date_evenement="2024-07-25")
+        self.offre = Offre.objects.create(type="Solo", prix=50.0)
+        ancien = timezone.now() - timedelta(days=5)
+        self.abandonnes = [
+            Ticket.objects.create(
+                utilisateur=self.utilisateur,
+                sport=self.sport,
+                offre=self.offre,
+                date_creation=ancien,
+            )
+            for _ in range(5)
+        ]
+        self.achete = Ticket.objects.create(
+            utilisateur=self.utilisateur,
+            sport=self.sport,
+            offre=self.offre,
+            est_achete=True,
+            date_creation=ancien,
+        )
+        self.recent = Ticket.objects.create(
+            utilisateur=self.utilisateur, sport=self.sport, offre=self.offre
+        )
+
+    def test_purge_par_tranches(self):
+        """
+        Test de la suppression des seuls paniers abandonnés, par petites tranches.
+        """
+        sortie = StringIO()
+        call_command(
+            "purger_paniers", "--taille-lot", "2", "--pause", "0", stdout=sortie
+        )
+        self.assertIn("5 ticket(s) supprimé(s)", sortie.getvalue())
+        self.assertEqual(
+            set(Ticket.objects.values_list("id", flat=True)),
+            {self.achete.id, self.recent.id},
+        )
+
+    def test_simulation(self):
+        """
+        Test du mode simulation, qui ne supprime rien.
+        """
+        sortie = StringIO()
+        call_command("purger_paniers", "--simulation", stdout=sortie)
+        self.assertIn("5 ticket(s) seraient supprimés", sortie.getvalue())
+        self.assertEqual(Ticket.objects.count(), 7)
+
+
+class AuditerIndexCommandTest(TestCase):
+    """
+    Test de la commande d'audit des index.
+    """
+
+    def test_requetes_des_vues_indexees(self):
+        """
+        Test que les requêtes du panier, des commandes et du scan utilisent un index.
+        """
+        sortie = StringIO()
+        call_command("auditer_index", stdout=sortie)
+        for vue in (
+            "ticket_create_view",
+            "panier_view",
+            "mes_commandes_view",
+            "telecharger_billet_view",
+            "scan",
+        ):
+            self.assertIn(f"[OK] {vue}", sortie.getvalue())
+        self.assertNotIn("[SCAN COMPLET] panier_view", sortie.getvalue())
+
+
+@override_settings(
+    FILE_ATTENTE_ACTIVE=True, FILE_ATTENTE_RAFALE=1, FILE_ATTENTE_DEBIT=0
+)
+class FileAttenteMiddlewareTest(TestCase):
+    """
+    Test de la file d'attente virtuelle du parcours d'achat.
+    """
+
+    def setUp(self):
+        """
+        Création de deux utilisateurs connectés sur deux clients distincts.
+        """
+        cache.clear()
+        self.clients = []
+        for email in ("gilles.dupont@exemple.com", "jean.dupont@exemple.com"):
+            Utilisateur.objects.create_user(
+                email=email, password="Test@123", nom="Dupont", prenom="Test"
+            )
+            client = self.client_class()
+            client.login(email=email, password="Test@123")
+            self.clients.append(client)
+
+    def test_admission_puis_attente(self):
+        """
+        Test que le premier visiteur est admis et que le suivant est placé en file.
+        """
+        premier, second = self.clients
+        response = premier.get(reverse("panier"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("jo_admission", response.cookies)
+
+        response = second.get(reverse("panier"))
+        self.assertEqual(response.status_code, 503)
+        self.assertTemplateUsed(response, "file_attente.html")
+        self.assertEqual(response.context["position"], 1)
+
+        statut = second.get(reverse("file_attente_statut")).json()
+        self.assertEqual(statut, {"admis": False, "position": 1})
+
+        self.assertEqual(premier.get(reverse("panier")).status_code, 200)
+
+    def test_pages_de_consultation_non_limitees(self):
+        """
+        Test que l'accueil et la liste des sports ne passent jamais par la file.
+        """
+        self.clients[0].get(reverse("panier"))
+        self.assertEqual(self.clients[1].get(reverse("home")).status_code, 200)
+        self.assertEqual(self.clients[1].get(reverse("sports_list")).status_code, 200)
+
+    def test_jeton_falsifie_refuse(self):
+        """
+        Test qu'un jeton d'admission non signé est refusé.
+        """
+        self.clients[0].get(reverse("panier"))
+        self.clients[1].cookies["jo_admission"] = "1:faux:jeton"
+        self.assertEqual(self.clients[1].get(reverse("panier")).status_code, 503)
+
+    def test_jeton_lie_a_la_session(self):
+        """
+        Test qu'un jeton d'admission copié dans une autre session est refusé.
+        """
+        premier, second = self.clients
+        jeton = premier.get(reverse("panier")).cookies["jo_admission"].value
+        second.cookies["jo_admission"] = jeton
+        self.assertEqual(second.get(reverse("panier")).status_code, 503)
+        self.assertEqual(premier.get(reverse("panier")).status_code, 200)
+
+    def test_requete_script_en_json(self):
+        """
+        Test qu'une requête de script mise en attente reçoit du JSON.
+        """
+        self.clients[0].get(reverse("panier"))
+        response = self.clients[1].post(
+            reverse("maj_quantite"),
+            {"ticket_id": 1, "quantite": 2},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "5")
+        self.assertFalse(response.json()["success"])
+        self.assertEqual(response.json()["position"], 1)
+
+    def test_verification_du_cache(self):
+        """
+        Test que la file d'attente sur un cache propre au processus est signalée.
+        """
+        self.assertEqual(
+            [alerte.id for alerte in file_attente.verifier_cache(None)],
+            ["jo_app.W001"],
+        )
+        partage = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": "redis://127.0.0.1:6379",
+            }
+        }
+        with override_settings(CACHES=partage):
+            self.assertEqual(file_attente.verifier_cache(None), [])
+
+
+class PaiementIdempotenceViewTest(TestCase):
+    """
+    Test de l'idempotence de la vue de paiement.
+    """
+
+    def setUp(self):
+        """
+        Création d'un utilisateur connecté avec un panier de deux places.
+        """
+        self.utilisateur = Utilisateur.objects.create_user(
+            email="gilles.dupont@exemple.com",
+            password="Test@123",
+            nom="Dupont",
+            prenom="Gilles",
+        )
+        self.sport = Sport.objects.create(nom="Natation", date_evenement="2024-07-25")
+        self.offre = Offre.objects.create(type="Duo", prix=80.0)
+        self.ticket = Ticket.objects.create(
+            utilisateur=self.utilisateur, offre=self.offre, sport=self.sport, quantite=2
+        )
+        self.client.login(email="gilles.dupont@exemple.com", password="Test@123")
+        self.donnees = {
+            "cardNumber": "1234567891011122",
+            "expiryDate": "12/27",
+            "cvv": "123",
+            "cle_idempotence": "cle-test",
+        }
+
+    @patch("cloudinary.uploader.upload")
+    def test_paiement_rejoue(self, mock_upload):
+        """
+        Test qu'un paiement soumis deux fois ne génère les billets qu'une fois.
+        """
+        mock_upload.return_value = {"secure_url": "http://test.com/qr_code.png"}
+
+        with self.captureOnCommitCallbacks(execute=True):
+            premiere = self.client.post(reverse("paiement"), self.donnees)
+        seconde = self.client.post(reverse("paiement"), self.donnees)
+
+        self.assertRedirects(premiere, reverse("confirmation"))
+        self.assertRedirects(seconde, reverse("confirmation"))
+        self.assertEqual(premiere["Idempotency-Key"], "cle-test")
+        self.assertEqual(seconde["Idempotency-Key"], "cle-test")
+        self.assertFalse(mock_upload.called)
+        self.assertEqual(GenerationTicket.objects.filter(qr_code=None).count(), 2)
+
+        commande = Commande.objects.get()
+        self.assertEqual(commande.nombre_billets, 2)
+        self.assertEqual(commande.montant, Decimal("160.00"))
+        self.ticket.refresh_from_db()
+        self.assertTrue(self.ticket.est_achete)
+        self.assertEqual(self.ticket.commande, commande)
+        self.assertEqual(Paiement.objects.get().montant, Decimal("160.00"))
+
+    @override_settings(
+        PASSERELLE_PAIEMENT_CLASSE="jo_app.passerelle.PasserelleHttp",
+        PASSERELLE_PAIEMENT_OPTIONS={
+            "url": "http://127.0.0.1:9",
+            "delai_connexion": 0.2,
+        },
+    )
+    def test_passerelle_indisponible(self):
+        """
+        Test qu'aucun billet n'est généré si la passerelle ne répond pas.
+        """
+        response = self.client.post(reverse("paiement"), self.donnees)
+        self.assertEqual(response.status_code, 200)
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn("momentanément indisponible", messages[0])
+        self.assertEqual(response.context["cle_idempotence"], "cle-test")
+        self.assertFalse(Commande.objects.exists())
+        self.assertFalse(GenerationTicket.objects.exists())
+
+    @patch("cloudinary.uploader.upload")
+    def test_paiement_en_attente(self, mock_upload):
+        """
+        Test qu'un paiement en attente est signalé comme tel, sans commande, et
+        que la nouvelle soumission avec la même clé crée la commande.
+        """
+        mock_upload.return_value = {"secure_url": "http://test.com/qr_code.png"}
+        en_attente = ResultatPaiement("cle-test", STATUT_EN_ATTENTE)
+        with patch(
+            "jo_app.passerelle.PasserelleSimulee.autoriser", return_value=en_attente
+        ) as autoriser:
+            response = self.client.post(reverse("paiement"), self.donnees)
+        autoriser.assert_called_once()
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "en cours de validation")
+        self.assertEqual(response.context["cle_idempotence"], "cle-test")
+        self.assertFalse(Commande.objects.exists())
+
+        response = self.client.post(reverse("paiement"), self.donnees)
+        self.assertRedirects(response, reverse("confirmation"))
+        self.assertEqual(Commande.objects.get().cle_idempotence, "cle-test")
+
+    def test_panier_vide(self):
+        """
+        Test qu'un panier vide n'est ni débité ni transformé en commande.
+        """
+        self.ticket.delete()
+        with patch("jo_app.passerelle.PasserelleSimulee.autoriser") as autoriser:
+            response = self.client.post(reverse("paiement"), self.donnees)
+        autoriser.assert_not_called()
+        self.assertContains(response, "Votre panier est vide.")
+        self.assertFalse(Commande.objects.exists())
+
+    def test_panier_modifie_pendant_le_paiement(self):
+        """
+        Test qu'aucune commande n'est créée si le panier verrouillé ne
+        correspond plus au montant autorisé.
+        """
+
+        def ajouter_ticket(montant, carte, reference):
+            Ticket.objects.create(
+                utilisateur=self.utilisateur,
+                offre=self.offre,
+                sport=self.sport,
+                quantite=1,
+            )
+            return ResultatPaiement(reference, "accepte")
+
+        with patch(
+            "jo_app.passerelle.PasserelleSimulee.autoriser", side_effect=ajouter_ticket
+        ), patch(
+            "jo_app.passerelle.PasserelleSimulee.annuler",
+            return_value=ResultatPaiement("cle-test", STATUT_ANNULE),
+        ) as annuler:
+            response = self.client.post(reverse("paiement"), self.donnees)
+        annuler.assert_called_once_with("cle-test")
+        self.assertRedirects(
+            response, reverse("paiement"), fetch_redirect_response=False
+        )
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn("le paiement a été annulé", messages[0])
+        self.assertFalse(Commande.objects.exists())
+        self.assertFalse(GenerationTicket.objects.exists())
+        self.assertFalse(Ticket.objects.filter(est_achete=True).exists())
+
+        Ticket.objects.exclude(pk=self.ticket.pk).delete()
+        with patch(
+            "jo_app.passerelle.PasserelleSimulee.autoriser", side_effect=ajouter_ticket
+        ), patch(
+            "jo_app.passerelle.PasserelleSimulee.annuler",
+            side_effect=PasserelleIndisponible("délai dépassé"),
+        ):
+            response = self.client.post(reverse("paiement"), self.donnees)
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn("le paiement sera annulé", messages[-1])
+        self.assertFalse(Commande.objects.exists())
+
+    def test_formulaire_porte_une_cle(self):
+        """
+        Test que le formulaire de paiement contient une clé d'idempotence.
+        """
+        response = self.client.get(reverse("paiement"))
+        self.assertEqual(len(response.context["cle_idempotence"]), 64)
+        self.assertContains(response, 'name="cle_idempotence"')
+
+
+class PasserellePaiementTest(TestCase):
+    """
+    Test des passerelles de paiement.
+    """
+
+    def setUp(self):
+        """
+        Démarrage d'une passerelle locale sur un port libre.
+        """
+        self.serveur = creer_serveur("127.0.0.1", 0, taux_refus=0.0)
+        threading.Thread(target=self.serveur.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.serveur.server_address[1]}"
+
+    def tearDown(self):
+        """
+        Arrêt de la passerelle locale.
+        """
+        self.serveur.shutdown()
+        self.serveur.server_close()
+
+    def test_autorisation_et_statut(self):
+        """
+        Test d'une autorisation puis de la consultation de son statut.
+        """
+        passerelle = PasserelleHttp(self.url)
+        carte = {"numero": "1234", "expiration": "12/27", "cvv": "123"}
+        resultat = passerelle.autoriser(Decimal("50.00"), carte, "ref-1")
+        self.assertTrue(resultat.accepte)
+        self.assertEqual(passerelle.statut("ref-1").statut, "accepte")
+
+    def test_annulation(self):
+        """
+        Test de l'annulation d'une autorisation, puis d'une référence inconnue.
+        """
+        passerelle = PasserelleHttp(self.url)
+        carte = {"numero": "1234", "expiration": "12/27", "cvv": "123"}
+        passerelle.autoriser(Decimal("50.00"), carte, "ref-2")
+        self.assertEqual(passerelle.annuler("ref-2").statut, STATUT_ANNULE)
+        self.assertEqual(passerelle.statut("ref-2").statut, STATUT_ANNULE)
+        with self.assertRaises(PasserelleIndisponible):
+            passerelle.annuler("ref-inconnue")
+
+    def test_disjoncteur(self):
+        """
+        Test que le disjoncteur s'ouvre après des échecs consécutifs.
+        """
+        passerelle = PasserelleHttp(
+            "http://127.0.0.1:9", delai_connexion=0.2, seuil_disjoncteur=2
+        )
+        for _ in range(2):
+            with self.assertRaises(PasserelleIndisponible):
+                passerelle.statut("ref-1")
+        self.assertTrue(passerelle.disjoncteur.ouvert)
+        with self.assertRaisesMessage(PasserelleIndisponible, "Disjoncteur ouvert"):
+            passerelle.statut("ref-1")
+
+    def test_disjoncteur_appel_essai(self):
+        """
+        Test qu'un appel d'essai est autorisé après le délai de réouverture.
+        """
+        disjoncteur = Disjoncteur(seuil=1, delai_reouverture=0)
+        disjoncteur.echec()
+        self.assertTrue(disjoncteur.autoriser_appel())
+        disjoncteur.succes()
+        self.assertFalse(disjoncteur.ouvert)
+
+
+class CatalogueCacheTest(TestCase):
+    """
+    Test du cache du catalogue des sports et des offres.
+    """
+
+    def setUp(self):
+        """
+        Création d'un sport et d'une offre, puis chargement du catalogue.
+        """
+        self.sport = Sport.objects.create(nom="Escrime", date_evenement="2024-07-27")
+        self.offre = Offre.objects.create(type="Solo", prix=50.0)
+        obtenir_catalogue()
+
+    def test_aucune_requete_en_regime_etabli(self):
+        """
+        Test que la liste des sports et le formulaire de ticket n'interrogent pas le catalogue.
+        """
+        with self.assertNumQueries(0):
+            form = TicketForm(data={"sport": self.sport.id, "offre": self.offre.id})
+            self.assertTrue(form.is_valid())
+            self.assertEqual(form.cleaned_data["sport"], self.sport)
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("sports_list"))
+        self.assertContains(response, "Escrime")
+
+    def test_invalidation_par_signal(self):
+        """
+        Test qu'une modification d'un sport est visible immédiatement.
+        """
+        self.sport.nom = "Escrime artistique"
+        self.sport.save()
+        self.assertIn("Escrime artistique", obtenir_catalogue().sports_par_nom)
+        self.offre.delete()
+        self.assertEqual(obtenir_catalogue().offres, [])
+
+    def test_choix_invalide(self):
+        """
+        Test qu'un identifiant absent du catalogue est refusé.
+        """
+        form = TicketForm(data={"sport": 9999, "offre": self.offre.id})
+        self.assertFalse(form.is_valid())
+        self.assertIn("sport", form.errors)
+
+    def test_cache_local_expire(self):
+        """
+        Test qu'avec un cache local, une modification faite par un autre
+        processus (sans signal ici) est vue après CATALOGUE_DUREE_LOCALE et
+        change la version.
+        """
+        version = obtenir_catalogue().version
+        Sport.objects.filter(pk=self.sport.pk).update(nom="Escrime fauteuil")
+        self.assertIn("Escrime", obtenir_catalogue().sports_par_nom)
+
+        plus_tard = time.monotonic() + settings.CATALOGUE_DUREE_LOCALE + 1
+        with patch("jo_app.catalogue.time.monotonic", return_value=plus_tard):
+            self.assertIn("Escrime fauteuil", obtenir_catalogue().sports_par_nom)
+            self.assertNotEqual(obtenir_catalogue().version, version)
+            self.assertEqual(catalogue.version_catalogue(), obtenir_catalogue().version)
+
+    @override_settings(DEBUG=False)
+    def test_verification_du_cache(self):
+        """
+        Test que le catalogue versionné dans un cache local est signalé.
+        """
+        self.assertEqual(
+            [alerte.id for alerte in catalogue.verifier_cache(None)],
+            ["jo_app.W002"],
+        )
+
+
+class CatalogueJsonViewTest(TestCase):
+    """
+    Test des réponses JSON conditionnelles du catalogue.
+    """
+
+    def setUp(self):
+        """
+        Création d'un sport et d'une offre pour les tests.
+        """
+        self.sport = Sport.objects.create(nom="Judo", date_evenement="2024-07-27")
+        self.offre = Offre.objects.create(type="Famille", prix=120.0)
+
+    def test_catalogue_et_304(self):
+        """
+        Test du catalogue complet puis d'une requête conditionnelle inchangée.
+        """
+        response = self.client.get(reverse("catalogue_json"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("public", response["Cache-Control"])
+        donnees = response.json()
+        self.assertEqual(donnees["sports"][0]["nom"], "Judo")
+        self.assertEqual(donnees["offres"][0]["prix"], "120.00")
+
+        etag = response["ETag"]
+        response = self.client.get(reverse("catalogue_json"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Sport.objects.create(nom="Boxe", date_evenement="2024-07-27")
+        response = self.client.get(reverse("catalogue_json"), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_get_sport_date(self):
+        """
+        Test de la date d'un sport et d'un sport inexistant.
+        """
+        response = self.client.get(reverse("get_sport_date", args=[self.sport.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("ETag", response)
+        self.assertIn("2024", response.json()["date_evenement"])
+        response = self.client.get(reverse("get_sport_date", args=[9999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_dates_integrees_au_formulaire(self):
+        """
+        Test que les pages de création et de modification d'un ticket intègrent
+        les dates des sports.
+        """
+        utilisateur = Utilisateur.objects.create_user(
+            email="gilles.dupont@exemple.com",
+            password="Test@123",
+            nom="Dupont",
+            prenom="Gilles",
+        )
+        self.client.login(email="gilles.dupont@exemple.com", password="Test@123")
+        response = self.client.get(reverse("ticket_create"))
+        self.assertContains(response, 'id="dates-sports"')
+
+        ticket = Ticket.objects.create(
+            utilisateur=utilisateur, sport=self.sport, offre=self.offre, quantite=1
+        )
+        response = self.client.get(reverse("ticket_update", args=[ticket.id]))
+        self.assertEqual(
+            response.context["dates_sports"][self.sport.id],
+            response.context["date_evenement"],
+        )
+        self.assertNotContains(
+            response, '<script id="dates-sports" type="application/json">null'
+        )
+
+
+class FormatageTest(TestCase):
+    """
+    Test du formatage français des dates et des prix.
+    """
+
+    def test_formater_date(self):
+        """
+        Test du format "%d %B %Y" en français, indépendant de la locale du système.
+        """
+        self.assertEqual(formater_date(date(2024, 8, 1)), "01 août 2024")
+        self.assertEqual(formater_date(date(2024, 12, 25)), "25 décembre 2024")
+
+    def test_formater_prix(self):
+        """
+        Test des séparateurs de milliers et de décimales.
+        """
+        self.assertEqual(formater_prix(Decimal("1234.5")), "1 234,50")
+        self.assertEqual(formater_prix(Decimal("50")), "50,00")
+        self.assertEqual(formater_euros(Decimal("1234567.891")), "1 234 567,89€")
+
+
+class MesurerDemarrageCommandTest(TestCase):
+    """
+    Test de l'analyse des temps d'import et du chargement différé.
+    """
+
+    def test_analyser_importtime(self):
+        """
+        Test de la lecture des temps propres, cumulés et de la profondeur.
+        """
+        sortie = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     _io\n"
+            "import time:        40 |       2040 | django.core.wsgi\n"
+            "import time:      2000 |       2000 |   django.core.handlers\n"
+        )
+        self.assertEqual(
+            analyser_importtime(sortie),
+            [
+                ("_io", 120, 120, 2),
+                ("django.core.wsgi", 40, 2040, 0),
+                ("django.core.handlers", 2000, 2000, 1),
+            ],
+        )
+
+    def test_bibliotheques_lourdes_differees(self):
+        """
+        Test que les vues et les modèles n'importent ni WeasyPrint ni qrcode.
+        """
+        from jo_app import models, views
+
+        for module in (models, views):
+            self.assertNotIn("weasyprint", vars(module))
+            self.assertNotIn("qrcode", vars(module))
+
+
+class PrechauffageTest(TestCase):
+    """
+    Test du préchauffage des workers.
+    """
+
+    def test_prechauffer_toutes_les_etapes(self):
+        """
+        Test que chaque étape aboutit : gabarits compilés, billet rendu,
+        catalogue chargé et connexions ouvertes.
+        """
+        Sport.objects.create(nom="Judo", date_evenement=date(2024, 7, 27))
+        rapport = {
+            nom: (resultat, erreur) for nom, _, resultat, erreur in prechauffer()
+        }
+
+        self.assertEqual(list(rapport), list(ETAPES))
+        self.assertTrue(all(erreur is None for _, erreur in rapport.values()))
+        self.assertGreater(rapport["gabarits"][0], 0)
+        self.assertGreater(rapport["billet"][0], 0)
+        self.assertEqual(rapport["catalogue"][0], 1)
+        with self.assertNumQueries(0):
+            obtenir_catalogue()
+
+    def test_etape_en_echec(self):
+        """
+        Test qu'une étape en échec est signalée sans interrompre les suivantes.
+        """
+
+        def echouer():
+            raise RuntimeError("base indisponible")
+
+        with patch.dict(ETAPES, {"catalogue": echouer}):
+            rapport = prechauffer(("catalogue", "gabarits"))
+
+        self.assertEqual(rapport[0][3], "base indisponible")
+        self.assertIsNone(rapport[1][3])
+
+
+class ConnexionFactice:
+    """
+    Connexion de base factice pour les tests du pool.
+    """
+
+    def __init__(self, saine=True):
+        """
+        Initialise une connexion ouverte.
+        """
+        self.saine = saine
+        self.fermee = False
+        self.annulations = 0
+
+    def ping(self):
+        """
+        Simule la vérification de la connexion.
+        """
+        if not self.saine:
+            raise OSError("connexion perdue")
+
+    def rollback(self):
+        """
+        Compte les annulations de transaction.
+        """
+        self.annulations += 1
+
+    def close(self):
+        """
+        Marque la connexion comme fermée.
+        """
+        self.fermee = True
+
+
+class PoolConnexionsTest(TestCase):
+    """
+    Test du pool de connexions du moteur jo_app.pool_mysql.
+    """
+
+    def test_connexion_reutilisee(self):
+        """
+        Test qu'une connexion rendue est annulée puis prêtée à nouveau.
+        """
+        pool = PoolConnexions(taille=2)
+        connexion = pool.emprunter(ConnexionFactice)
+        pool.rendre(connexion)
+
+        self.assertIs(pool.emprunter(ConnexionFactice), connexion)
+        self.assertEqual(connexion.annulations, 1)
+
+    def test_taille_bornee(self):
+        """
+        Test que l'emprunt échoue après le délai quand toutes les connexions
+        sont prêtées, puis réussit une fois une connexion rendue.
+        """
+        pool = PoolConnexions(taille=1, delai=0.01)
+        connexion = pool.emprunter(ConnexionFactice)
+        with self.assertRaises(PoolEpuise):
+            pool.emprunter(ConnexionFactice)
+        pool.rendre(connexion)
+        self.assertIs(pool.emprunter(ConnexionFactice), connexion)
+
+    def test_connexion_defaillante_remplacee(self):
+        """
+        Test qu'une connexion qui ne répond plus, ou rendue après une erreur,
+        est fermée et remplacée.
+        """
+        pool = PoolConnexions(taille=2, controle_apres=0)
+        connexion = pool.emprunter(ConnexionFactice)
+        connexion.saine = False
+        pool.rendre(connexion)
+
+        nouvelle = pool.emprunter(ConnexionFactice)
+        self.assertIsNot(nouvelle, connexion)
+        self.assertTrue(connexion.fermee)
+
+        pool.rendre(nouvelle, reutilisable=False)
+        self.assertTrue(nouvelle.fermee)
+        self.assertEqual(pool.nombre_libres, 0)
+
+
+@override_settings(REPLIQUES_LECTURE=["replique_1"])
+class RouteurReplicasTest(TestCase):
+    """
+    Test du routage des lectures vers les réplicas.
+    """
+
+    def setUp(self):
+        """
+        Vide l'état de santé des réplicas et prépare le routeur.
+        """
+        routeur._sante.clear()
+        self.routeur = routeur.RouteurReplicas()
+
+    @patch("jo_app.routeur.replique_disponible", return_value=True)
+    def test_lectures_routees(self, disponible):
+        """
+        Test que seules les vues autorisées lisent les modèles répliqués sur
+        un réplica, et jamais après une écriture.
+        """
+        vue = routeur.lectures_sur_replique(
+            lambda request: (
+                self.routeur.db_for_read(Sport),
+                self.routeur.db_for_read(Utilisateur),
+            )
+        )
+        with routeur.routage():
+            self.assertEqual(self.routeur.db_for_read(Sport), "default")
+            self.assertEqual(vue(None), ("replique_1", "default"))
+        with routeur.routage(epingle=True):
+            self.assertEqual(vue(None), ("default", "default"))
+        with routeur.routage() as etat:
+            self.routeur.db_for_write(Ticket)
+            self.assertTrue(etat.ecriture)
+            self.assertEqual(vue(None), ("default", "default"))
+
+    def test_replique_en_retard_ou_injoignable(self):
+        """
+        Test qu'un réplica en retard ou injoignable est écarté.
+        """
+        self.assertTrue(routeur.replique_disponible("default"))
+        with patch("jo_app.routeur.retard_replique", return_value=60):
+            self.assertFalse(routeur.replique_disponible("replique_1"))
+        routeur._sante.clear()
+        with patch(
+            "jo_app.routeur.retard_replique", side_effect=OperationalError("hors ligne")
+        ):
+            self.assertFalse(routeur.replique_disponible("replique_1"))
+        with routeur.routage() as etat:
+            etat.replique = True
+            self.assertEqual(self.routeur.db_for_read(Sport), "default")
+
+    def test_replique_hors_ligne_sans_mysql(self):
+        """
+        Test qu'un réplica SQLite injoignable est écarté : sa connexion est
+        vérifiée même sans retard de réplication à lire.
+        """
+        primaire = connections["default"]
+        reglages = {**primaire.settings_dict, "NAME": "/inexistant/db.sqlite3"}
+        connections["replique_hs"] = type(primaire)(reglages, "replique_hs")
+        self.addCleanup(connections.__delitem__, "replique_hs")
+        with self.assertRaises(OperationalError):
+            routeur.retard_replique("replique_hs")
+        self.assertFalse(routeur.replique_disponible("replique_hs"))
+        self.assertEqual(routeur.retard_replique("default"), 0)
+
+    @patch("jo_app.routeur.replique_disponible", return_value=True)
+    def test_epinglage_apres_ecriture(self, disponible):
+        """
+        Test qu'après l'ajout d'un ticket, le visiteur relit ses commandes
+        sur le primaire.
+        """
+        Utilisateur.objects.create_user(
+            email="lea.martin@exemple.com",
+            nom="Martin",
+            prenom="Léa",
+            password="Test@1234",
+        )
+        self.client.login(email="lea.martin@exemple.com", password="Test@1234")
+        sport = Sport.objects.create(nom="Escrime", date_evenement="2024-07-28")
+        offre = Offre.objects.create(type="Solo", prix=50.00)
+
+        response = self.client.post(
+            reverse("ticket_create"), {"sport": sport.id, "offre": offre.id}
+        )
+        self.assertIn("jo_primaire", response.cookies)
+
+        response = self.client.get(reverse("mes_commandes"))
+        self.assertEqual(response.status_code, 200)
+
+
+class SessionStoreTest(TestCase):
+    """
+    Test du moteur de sessions à écritures regroupées.
+    """
+
+    def setUp(self):
+        """
+        Création d'une session enregistrée en base.
+        """
+        session = SessionStore()
+        session["panier"] = [1, 2]
+        session.save()
+        self.cle = session.session_key
+
+    def ecritures(self, modifier=None):
+        """
+        Recharge la session, la modifie éventuellement, l'enregistre et
+        retourne les requêtes d'écriture exécutées.
+        """
+        session = SessionStore(self.cle)
+        session["panier"]
+        if modifier:
+            modifier(session)
+        with CaptureQueriesContext(connection) as requetes:
+            session.save()
+        return [q["sql"] for q in requetes if q["sql"].startswith("UPDATE")]
+
+    def test_session_inchangee_non_reecrite(self):
+        """
+        Test qu'une session relue sans modification n'est pas réécrite,
+        contrairement à une session modifiée, même en place.
+        """
+        self.assertEqual(self.ecritures(), [])
+        self.assertEqual(len(self.ecritures(lambda s: s["panier"].append(3))), 1)
+        self.assertEqual(SessionStore(self.cle)["panier"], [1, 2, 3])
+
+    @override_settings(SESSION_SEUIL_PROLONGATION=0)
+    def test_prolongation_au_dela_du_seuil(self):
+        """
+        Test que la session est réécrite quand son expiration avance
+        au-delà du seuil.
+        """
+        self.assertEqual(len(self.ecritures()), 1)
+
+    def test_lecture_depuis_le_cache_partage(self):
+        """
+        Test qu'avec un cache partagé, la session est relue sans requête.
+        """
+        with tempfile.TemporaryDirectory() as dossier:
+            cache_fichiers = {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": dossier,
+            }
+            with override_settings(CACHES={"default": cache_fichiers}):
+                session = SessionStore(self.cle)
+                session["panier"] = [3]
+                session.save()
+                with self.assertNumQueries(0):
+                    self.assertEqual(SessionStore(self.cle)["panier"], [3])
+
+    def test_purger_sessions(self):
+        """
+        Test de la suppression par lots des seules sessions expirées.
+        """
+        for _ in range(5):
+            session = SessionStore()
+            session.set_expiry(-60)
+            session.save()
+        sortie = StringIO()
+        call_command(
+            "purger_sessions", "--taille-lot", "2", "--pause", "0", stdout=sortie
+        )
+        self.assertIn("5 session(s) supprimée(s)", sortie.getvalue())
+        self.assertTrue(SessionStore().exists(self.cle))
+
+
+class CacheUtilisateurBackendTest(TestCase):
+    """
+    Test du chargement de l'utilisateur connecté depuis le cache partagé.
+    """
+
+    def setUp(self):
+        """
+        Active un cache partagé (fichiers) et crée un utilisateur.
+        """
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        reglages = override_settings(
+            CACHES={
+                "default": {
+                    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                    "LOCATION": dossier.name,
+                }
+            }
+        )
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.utilisateur = Utilisateur.objects.create_user(
+            email="ines.petit@exemple.com",
+            nom="Petit",
+            prenom="Inès",
+            password="Test@1234",
+        )
+        self.backend = CacheUtilisateurBackend()
+
+    def test_utilisateur_en_cache(self):
+        """
+        Test que l'utilisateur n'est lu en base qu'une fois.
+        """
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.utilisateur.pk)
+        with self.assertNumQueries(0):
+            utilisateur = self.backend.get_user(self.utilisateur.pk)
+        self.assertEqual(utilisateur.email, "ines.petit@exemple.com")
+
+    def test_invalidation(self):
+        """
+        Test que les changements de droits et la désactivation sont vus aussitôt.
+        """
+        self.backend.get_user(self.utilisateur.pk)
+        self.utilisateur.is_staff = True
+        self.utilisateur.save()
+        self.assertTrue(self.backend.get_user(self.utilisateur.pk).is_staff)
+
+        self.utilisateur.is_active = False
+        self.utilisateur.save()
+        self.assertIsNone(self.backend.get_user(self.utilisateur.pk))
+
+    def test_page_sans_requete_d_authentification(self):
+        """
+        Test qu'une page vue par un utilisateur connecté ne lit ni la session
+        ni l'utilisateur en base une fois les caches remplis.
+        """
+        self.client.login(email="ines.petit@exemple.com", password="Test@1234")
+        self.client.get(reverse("sports_list"))
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(reverse("sports_list"))
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+        tables = " ".join(q["sql"] for q in requetes)
+        self.assertNotIn("jo_app_utilisateur", tables)
+        self.assertNotIn("django_session", tables)
+
+
+class VuesAsynchronesTest(TestCase):
+    """
+    Test des vues asynchrones (panier et contrôle des billets).
+    """
+
+    def setUp(self):
+        """
+        Création d'un acheteur, d'un agent de contrôle et d'un billet.
+        """
+        self.utilisateur = Utilisateur.objects.create_user(
+            email="lea.roux@exemple.com",
+            password="Test@123",
+            nom="Roux",
+            prenom="Léa",
+        )
+        self.agent = Utilisateur.objects.create_user(
+            email="agent@exemple.com",
+            password="Test@123",
+            nom="Agent",
+            prenom="Paul",
+            is_staff=True,
+        )
+        self.sport = Sport.objects.create(nom="Escrime", date_evenement="2024-07-27")
+        self.offre = Offre.objects.create(type="Duo", prix=Decimal("90.00"))
+        self.ticket = Ticket.objects.create(
+            utilisateur=self.utilisateur, offre=self.offre, sport=self.sport, quantite=1
+        )
+        with patch("cloudinary.uploader.upload") as mock_upload:
+            mock_upload.return_value = {"secure_url": "http://test.com/qr_code.png"}
+            self.billet = GenerationTicket.objects.create(ticket=self.ticket)
+        self.qr_code = self.utilisateur.cle_securisee_1 + self.billet.cle_securisee_2
+
+    async def test_maj_quantite_asynchrone(self):
+        """
+        Test que la mise à jour de la quantité retourne le nouveau total.
+        """
+        await self.async_client.aforce_login(self.utilisateur)
+        response = await self.async_client.post(
+            reverse("maj_quantite"), {"ticket_id": self.ticket.id, "quantite": "2"}
+        )
+        self.assertEqual(response.json()["success"], True)
+        self.assertEqual(response.json()["total"], formater_euros(Decimal("180.00")))
+
+    def test_scan_billet_valide(self):
+        """
+        Test qu'un QR code correct est accepté et décrit le billet.
+        """
+        self.client.force_login(self.agent)
+        response = self.client.post(reverse("scan"), {"qr_code": self.qr_code})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["valide"])
+        self.assertEqual(response.json()["sport"], "Escrime")
+
+    def test_scan_billet_invalide(self):
+        """
+        Test qu'un QR code falsifié est refusé.
+        """
+        self.client.force_login(self.agent)
+        faux = "0" * 64 + self.billet.cle_securisee_2
+        response = self.client.post(reverse("scan"), {"qr_code": faux})
+        self.assertEqual(response.status_code, 404)
+        self.assertFalse(response.json()["valide"])
+
+    def test_scan_reserve_au_personnel(self):
+        """
+        Test qu'un visiteur non membre du personnel est redirigé vers la connexion.
+        """
+        self.client.force_login(self.utilisateur)
+        response = self.client.post(reverse("scan"), {"qr_code": self.qr_code})
+        self.assertEqual(response.status_code, 302)
+
+
+class InstrumentationTest(TestCase):
+    """
+    Test de la mesure des requêtes (Server-Timing et histogrammes par vue).
+    """
+
+    def setUp(self):
+        """
+        Vide les histogrammes et crée un membre du personnel et un visiteur.
+        """
+        instrumentation.reinitialiser()
+        self.addCleanup(instrumentation.reinitialiser)
+        self.agent = Utilisateur.objects.create_user(
+            email="agent@exemple.com",
+            password="Test@123",
+            nom="Agent",
+            prenom="Paul",
+            is_staff=True,
+        )
+        self.visiteur = Utilisateur.objects.create_user(
+            email="visiteur@exemple.com",
+            password="Test@123",
+            nom="Martin",
+            prenom="Zoé",
+        )
+        Sport.objects.create(nom="Voile", date_evenement="2024-07-28")
+
+    def test_server_timing_pour_le_personnel(self):
+        """
+        Test que l'en-tête Server-Timing détaille la base et les gabarits pour
+        le personnel, et qu'il n'est pas envoyé aux visiteurs.
+        """
+        self.client.force_login(self.agent)
+        response = self.client.get(reverse("sports_list"))
+        self.assertRegex(response["Server-Timing"], r"^total;dur=[\d.]+")
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="\d+ SQL"')
+        self.assertIn("gabarits;dur=", response["Server-Timing"])
+
+        self.client.force_login(self.visiteur)
+        response = self.client.get(reverse("sports_list"))
+        self.assertNotIn("Server-Timing", response)
+
+    def test_visiteur_anonyme_sans_chargement(self):
+        """
+        Test que la mesure ne charge pas l'utilisateur d'une requête sans
+        cookie de session.
+        """
+        with patch("django.contrib.auth.get_user") as get_user:
+            response = self.client.get(reverse("catalogue_json"))
+        self.assertEqual(response.status_code, 200)
+        get_user.assert_not_called()
+        self.assertNotIn("Server-Timing", response)
+
+    def test_histogramme_par_vue(self):
+        """
+        Test que les requêtes sont agrégées dans l'histogramme de leur vue.
+        """
+        self.client.force_login(self.visiteur)
+        for _ in range(3):
+            self.client.get(reverse("sports_list"))
+        vue = instrumentation.instantane()["vues"]["sports_list"]
+        self.assertEqual(vue["nombre"], 3)
+        self.assertEqual(sum(vue["compartiments"].values()), 3)
+        self.assertGreater(vue["requetes_sql"], 0)
+
+    def test_chronometrage_imbrique(self):
+        """
+        Test qu'un bloc imbriqué dans la même catégorie n'est compté qu'une fois.
+        """
+        jeton = instrumentation.demarrer()
+        with instrumentation.chronometrer("pdf"):
+            with instrumentation.chronometrer("pdf"):
+                pass
+        mesure, total = instrumentation.terminer(jeton, "essai")
+        self.assertLessEqual(mesure.durees["pdf"], total)
+        self.assertEqual(instrumentation.instantane()["vues"]["essai"]["nombre"], 1)
+
+    def test_vue_reservee_au_personnel(self):
+        """
+        Test que les histogrammes ne sont visibles que du personnel.
+        """
+        self.client.force_login(self.visiteur)
+        self.assertEqual(self.client.get(reverse("instrumentation")).status_code, 302)
+
+        self.client.force_login(self.agent)
+        response = self.client.get(reverse("instrumentation"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("pid", response.json())
+
+
+class AdministrationTest(TestCase):
+    """
+    Test des listes de l'administration sur de grandes tables.
+    """
+
+    def setUp(self):
+        """
+        Création de ventes synthétiques et connexion d'un superutilisateur.
+        """
+        self.generateur = GenerateurDonnees(graine=3)
+        self.generateur.generer(utilisateurs=5, billets=20)
+        Utilisateur.objects.create_superuser(
+            "admin@exemple.com", "Admin", "Jo", password="Test@123"
+        )
+        self.client.login(email="admin@exemple.com", password="Test@123")
+
+    def test_requetes_independantes_du_nombre_de_lignes(self):
+        """
+        Test que les listes font le même nombre de requêtes quel que soit le
+        nombre de lignes affichées.
+        """
+        for modele in ("generationticket", "paiement", "ticket", "commande"):
+            url = reverse(f"admin:jo_app_{modele}_changelist")
+            with CaptureQueriesContext(connection) as requetes:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            self.generateur.ventes(
+                40,
+                list(Utilisateur.objects.values_list("pk", flat=True)),
+                self.generateur.catalogue(),
+            )
+            with self.assertNumQueries(len(requetes)):
+                self.client.get(url)
+
+    def test_recherche_par_cle_securisee(self):
+        """
+        Test que la recherche par clé sécurisée retrouve le billet.
+        """
+        billet = GenerationTicket.objects.select_related("ticket__utilisateur").last()
+        response = self.client.get(
+            reverse("admin:jo_app_generationticket_changelist"),
+            {"q": billet.cle_securisee_2},
+        )
+        self.assertContains(response, billet.ticket.utilisateur.email)
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+    @override_settings(ADMIN_COMPTE_ESTIME_SEUIL=1000)
+    def test_total_estime_sans_filtre(self):
+        """
+        Test que le total d'une liste non filtrée est estimé au-delà du seuil,
+        et exact dès qu'elle est filtrée.
+        """
+        url = reverse("admin:jo_app_paiement_changelist")
+        with patch("jo_app.admin.estimer_lignes", return_value=2_000_000):
+            self.assertEqual(self.client.get(url).context["cl"].result_count, 2_000_000)
+            filtree = self.client.get(url, {"statut_paiement__exact": "1"})
+        self.assertEqual(filtree.context["cl"].result_count, Paiement.objects.count())
+
+
+class ApiTest(TestCase):
+    """
+    Test de l'API JSON en lecture seule.
+    """
+
+    def setUp(self):
+        """
+        Création de ventes synthétiques et connexion d'un acheteur.
+        """
+        self.generateur = GenerateurDonnees(graine=4)
+        self.generateur.generer(utilisateurs=2, billets=30)
+        self.acheteur = Utilisateur.objects.order_by("pk").first()
+        self.client.force_login(self.acheteur)
+
+    def ajouter_ventes(self, billets):
+        """
+        Ajoute des ventes à l'acheteur connecté.
+        """
+        self.generateur.ventes(billets, [self.acheteur.pk], self.generateur.catalogue())
+
+    def test_catalogue_pagine_et_conditionnel(self):
+        """
+        Test que le catalogue est paginé par curseur, restreint aux champs
+        demandés et servi sans requête SQL, 304 compris.
+        """
+        self.client.logout()
+        obtenir_catalogue()
+        url = reverse("api_v1:sports")
+        with self.assertNumQueries(0):
+            premiere = self.client.get(url, {"limite": 10, "champs": "nom"})
+            self.assertEqual(
+                self.client.get(
+                    url,
+                    {"limite": 10, "champs": "nom"},
+                    HTTP_IF_NONE_MATCH=premiere["ETag"],
+                ).status_code,
+                304,
+            )
+        donnees = premiere.json()
+        self.assertEqual(len(donnees["donnees"]), 10)
+        self.assertEqual(set(donnees["donnees"][0]), {"id", "nom"})
+        suite = self.client.get(url, {"limite": 10, "apres": donnees["suivant"]})
+        self.assertGreater(suite.json()["donnees"][0]["id"], donnees["suivant"])
+        self.assertEqual(self.client.get(url, {"champs": "inconnu"}).status_code, 400)
+
+    def test_billets_budget_de_requetes(self):
+        """
+        Test que la liste des billets fait le même nombre de requêtes quel que
+        soit le nombre de billets, et une de moins pour un 304.
+        """
+        url = reverse("api_v1:billets")
+        obtenir_catalogue()
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(url, {"limite": 200})
+        self.ajouter_ventes(100)
+        with self.assertNumQueries(len(requetes)):
+            response = self.client.get(url, {"limite": 200})
+        with self.assertNumQueries(len(requetes) - 1):
+            inchange = self.client.get(
+                url, {"limite": 200}, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(inchange.status_code, 304)
+        self.assertEqual(
+            len(response.json()["donnees"]),
+            GenerationTicket.objects.filter(ticket__utilisateur=self.acheteur).count(),
+        )
+
+    def test_billets_etag_suit_le_catalogue(self):
+        """
+        Test qu'un sport renommé change l'ETag de la liste des billets, qui
+        en affiche le nom.
+        """
+        url = reverse("api_v1:billets")
+        response = self.client.get(url, {"champs": "sport"})
+        billet = GenerationTicket.objects.filter(
+            ticket__utilisateur=self.acheteur
+        ).first()
+        sport = billet.ticket.sport
+        sport.nom = "Sport renommé"
+        sport.save()
+        response = self.client.get(
+            url, {"champs": "sport"}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Sport renommé", [b["sport"] for b in response.json()["donnees"]])
+
+    def test_commandes_de_l_utilisateur(self):
+        """
+        Test que les commandes listées sont celles de l'utilisateur et que
+        l'ETag change avec une nouvelle commande.
+        """
+        url = reverse("api_v1:commandes")
+        response = self.client.get(url, {"champs": "montant"})
+        ids = [c["id"] for c in response.json()["donnees"]]
+        self.assertEqual(
+            ids,
+            list(self.acheteur.commandes.order_by("-id").values_list("id", flat=True)),
+        )
+        self.ajouter_ventes(1)
+        self.assertEqual(
+            self.client.get(
+                url, {"champs": "montant"}, HTTP_IF_NONE_MATCH=response["ETag"]
+            ).status_code,
+            200,
+        )
+        self.client.logout()
+        self.assertEqual(self.client.get(url).status_code, 401)
+
+    def test_contenu_qr_code(self):
+        """
+        Test que le contenu du QR code est celui vérifié par scan_view, et
+        qu'un billet d'un autre utilisateur est introuvable.
+        """
+        billet = GenerationTicket.objects.filter(
+            ticket__utilisateur=self.acheteur
+        ).first()
+        autre = GenerationTicket.objects.exclude(
+            ticket__utilisateur=self.acheteur
+        ).first()
+        response = self.client.get(reverse("api_v1:qr_code_billet", args=[billet.id]))
+        self.assertEqual(
+            response.json()["contenu"],
+            self.acheteur.cle_securisee_1 + billet.cle_securisee_2,
+        )
+        self.assertEqual(
+            self.client.get(
+                reverse("api_v1:qr_code_billet", args=[autre.id])
+            ).status_code,
+            404,
+        )
+
+
+@override_settings(ACHATS_GROUPES_EXECUTION="commande", ACHATS_GROUPES_LOT=7)
+class AchatsGroupesTest(TestCase):
+    """
+    Test des achats groupés des partenaires.
+    """
+
+    def setUp(self):
+        """
+        Création du catalogue et d'un partenaire autorisé.
+        """
+        self.sports, _, self.offres = GenerateurDonnees(graine=5).catalogue()
+        self.partenaire = Utilisateur.objects.create_user(
+            email="partenaire@exemple.com",
+            password="Test@123",
+            nom="Hospitalité",
+            prenom="Partenaire",
+        )
+        accorder_permission(self.partenaire)
+        self.entetes = {"HTTP_AUTHORIZATION": f"Bearer {creer_jeton(self.partenaire)}"}
+        self.corps = {
+            "cle_idempotence": "lot-1",
+            "lignes": [
+                {
+                    "sport": self.sports[0].id,
+                    "offre": self.offres[0].id,
+                    "quantite": 12,
+                },
+                {
+                    "sport": self.sports[1].id,
+                    "offre": self.offres[2].id,
+                    "quantite": 5,
+                    "titulaire": "Hôtel de Paris",
+                },
+            ],
+        }
+
+    def soumettre(self, corps, **entetes):
+        """
+        Envoie une soumission d'achat groupé.
+        """
+        return self.client.post(
+            reverse("api_v1:achats_groupes"),
+            json.dumps(corps),
+            content_type="application/json",
+            **(entetes or self.entetes),
+        )
+
+    def test_reservation_puis_emission_par_lots(self):
+        """
+        Test que la soumission enregistre commande, tickets et paiements, et que
+        les billets sont émis ensuite par lots, sans QR code.
+        """
+        response = self.soumettre(self.corps)
+        self.assertEqual(response.status_code, 202)
+        commande = Commande.objects.get(pk=response.json()["commande"])
+        self.assertEqual(commande.nombre_billets, 17)
+        self.assertEqual(
+            commande.montant, 12 * self.offres[0].prix + 5 * self.offres[2].prix
+        )
+        self.assertEqual(Paiement.objects.filter(ticket__commande=commande).count(), 2)
+        self.assertFalse(GenerationTicket.objects.exists())
+
+        call_command("achats_groupes", "--traiter", stdout=StringIO())
+        suivi = self.client.get(response["Location"], **self.entetes).json()
+        self.assertEqual(suivi["statut"], "termine")
+        self.assertEqual(suivi["progression"], 1.0)
+        for ticket in commande.tickets.all():
+            self.assertEqual(ticket.generation_tickets.count(), ticket.quantite)
+        self.assertFalse(GenerationTicket.objects.exclude(qr_code=None).exists())
+
+    def test_reprise_et_idempotence(self):
+        """
+        Test qu'une soumission répétée retourne le même achat et qu'un second
+        traitement n'émet aucun billet de plus.
+        """
+        premiere = self.soumettre(self.corps).json()
+        repetee = self.soumettre(self.corps)
+        self.assertEqual(repetee.status_code, 200)
+        self.assertEqual(repetee.json()["id"], premiere["id"])
+
+        self.assertEqual(
+            billets_a_emettre([(1, 3), (2, 2), (3, 4)], 2, 4), [1, 2, 2, 3]
+        )
+        traiter(premiere["id"])
+        traiter(premiere["id"])
+        self.assertEqual(GenerationTicket.objects.count(), 17)
+
+    def test_authentification_et_validation(self):
+        """
+        Test que seuls les partenaires autorisés peuvent acheter et que les
+        lignes hors catalogue sont refusées sans rien enregistrer.
+        """
+        self.assertEqual(
+            self.soumettre(self.corps, HTTP_AUTHORIZATION="Bearer faux").status_code,
+            401,
+        )
+        self.partenaire.user_permissions.clear()
+        self.assertEqual(self.soumettre(self.corps).status_code, 403)
+        accorder_permission(self.partenaire)
+
+        self.corps["lignes"][1]["offre"] = 9999
+        response = self.soumettre(self.corps)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["lignes"], {"1": "Offre inconnue."})
+        self.corps["lignes"][0]["sport"] = [self.sports[0].id]
+        self.corps["lignes"][1]["offre"] = {"id": self.offres[2].id}
+        response = self.soumettre(self.corps)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()["lignes"],
+            {
+                "0": "sport et offre doivent être des identifiants entiers.",
+                "1": "sport et offre doivent être des identifiants entiers.",
+            },
+        )
+        self.assertFalse(Commande.objects.exists())
+
+    @override_settings(ACHATS_GROUPES_TENTATIVES_MAX=2)
+    def test_echecs_limites_puis_relance(self):
+        """
+        Test qu'un achat en échec n'est plus repris au-delà du nombre de
+        tentatives, sauf avec --relancer-echecs.
+        """
+        achat_id = self.soumettre(self.corps).json()["id"]
+        with patch.object(
+            GenerationTicket.objects, "bulk_create", side_effect=OSError("disque")
+        ) as emission:
+            erreurs = StringIO()
+            for _ in range(3):
+                call_command(
+                    "achats_groupes", "--traiter", stdout=StringIO(), stderr=erreurs
+                )
+        self.assertEqual(emission.call_count, 2)
+        self.assertIn("abandonné après 2 échecs", erreurs.getvalue())
+        achat = AchatGroupe.objects.get(pk=achat_id)
+        self.assertEqual((achat.statut, achat.echecs), (AchatGroupe.ECHOUE, 2))
+        suivi = self.client.get(
+            reverse("api_v1:achat_groupe", args=[achat_id]), **self.entetes
+        )
+        self.assertEqual(suivi.json()["echecs"], 2)
+
+        call_command(
+            "achats_groupes", "--traiter", "--relancer-echecs", stdout=StringIO()
+        )
+        achat.refresh_from_db()
+        self.assertEqual((achat.statut, achat.echecs), (AchatGroupe.TERMINE, 0))
+        self.assertEqual(GenerationTicket.objects.count(), 17)
+
+    def test_catalogue_modifie_pendant_la_soumission(self):
+        """
+        Test qu'une contrainte violée sans achat concurrent (sport ou offre
+        supprimé depuis l'instantané du catalogue) est refusée en 400.
+        """
+        with patch.object(
+            Ticket.objects, "bulk_create", side_effect=IntegrityError("FOREIGN KEY")
+        ):
+            response = self.soumettre(self.corps)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("Le catalogue a changé", response.json()["lignes"]["lignes"])
+        self.assertFalse(Commande.objects.exists())
+
+    def test_qr_code_genere_au_telechargement(self):
+        """
+        Test que le QR code d'un billet émis sans est généré à son téléchargement.
+        """
+        achat = self.soumettre(self.corps).json()
+        traiter(achat["id"])
+        billet = GenerationTicket.objects.first()
+        self.client.force_login(self.partenaire)
+        with tempfile.TemporaryDirectory() as dossier, override_settings(
+            QR_CODES_STOCKAGE="local", QR_CODES_DOSSIER=dossier
+        ):
+            response = self.client.get(reverse("telecharger_billet", args=[billet.id]))
+        self.assertEqual(response.status_code, 200)
+        billet.refresh_from_db()
+        self.assertTrue(billet.qr_code.startswith("file://"))
+
+    def test_billet_sans_qr_code_affiche(self):
+        """
+        Test qu'un billet sans QR code n'affiche pas d'image vide et que l'API
+        renvoie une URL nulle.
+        """
+        traiter(self.soumettre(self.corps).json()["id"])
+        billet = GenerationTicket.objects.first()
+        self.client.force_login(self.partenaire)
+        response = self.client.get(reverse("mes_commandes"))
+        self.assertNotContains(response, 'src=""')
+        self.assertContains(response, "Le QR code figure sur le billet téléchargé.")
+        response = self.client.get(reverse("api_v1:qr_code_billet", args=[billet.id]))
+        self.assertIsNone(response.json()["qr_code"])
+        self.assertTrue(response.json()["contenu"].endswith(billet.cle_securisee_2))
+
+
+class MetriquesTest(TestCase):
+    """
+    Test des métriques exposées au format Prometheus.
+    """
+
+    def setUp(self):
+        """
+        Création d'un utilisateur avec un panier de deux places.
+        """
+        self.utilisateur = Utilisateur.objects.create_user(
+            email="hugo.blanc@exemple.com",
+            password="Test@123",
+            nom="Blanc",
+            prenom="Hugo",
+        )
+        self.sport = Sport.objects.create(nom="Aviron", date_evenement="2024-07-29")
+        self.offre = Offre.objects.create(type="Famille", prix=Decimal("150.00"))
+        Ticket.objects.create(
+            utilisateur=self.utilisateur, offre=self.offre, sport=self.sport, quantite=2
+        )
+
+    def valeur(self, nom, **labels):
+        """
+        Retourne la valeur courante d'une métrique du processus.
+        """
+        return REGISTRY.get_sample_value(nom, labels) or 0
+
+    @patch("cloudinary.uploader.upload")
+    def test_billets_emis_par_sport_et_offre(self, mock_upload):
+        """
+        Test que les billets émis sont comptés une fois la commande validée, et
+        que leurs QR codes ne sont téléversés qu'à leur génération.
+        """
+        mock_upload.return_value = {"secure_url": "http://test.com/qr_code.png"}
+        labels = {"sport": "Aviron", "offre": "Famille"}
+        avant = self.valeur("jo_billets_emis_total", **labels)
+        televersements = self.valeur("jo_televersement_qr_secondes_count")
+        with self.captureOnCommitCallbacks(execute=True) as rappels:
+            Commande.objects.creer_depuis_panier(self.utilisateur, "cle-metriques")
+        self.assertEqual(len(rappels), 1)
+        self.assertEqual(self.valeur("jo_billets_emis_total", **labels), avant + 2)
+        self.assertFalse(mock_upload.called)
+        self.assertFalse(GenerationTicket.objects.exclude(qr_code=None).exists())
+
+        call_command("generer_qr_codes", stdout=StringIO())
+        self.assertEqual(
+            self.valeur("jo_televersement_qr_secondes_count"), televersements + 2
+        )
+        self.assertFalse(GenerationTicket.objects.filter(qr_code=None).exists())
+
+    @patch("cloudinary.uploader.upload", side_effect=OSError("hors ligne"))
+    def test_echec_televersement_compte(self, mock_upload):
+        """
+        Test qu'un téléversement de QR code en échec est compté sans
+        interrompre la génération, et que les billets restent sans QR code.
+        """
+        avant = self.valeur("jo_televersement_qr_echecs_total")
+        commande = Commande.objects.creer_depuis_panier(self.utilisateur, "cle-echec")
+        sortie = StringIO()
+        call_command("generer_qr_codes", stdout=sortie, stderr=StringIO())
+        self.assertIn("2 en échec", sortie.getvalue())
+        self.assertEqual(self.valeur("jo_televersement_qr_echecs_total"), avant + 2)
+        self.assertEqual(commande.nombre_billets, 2)
+        self.assertEqual(
+            GenerationTicket.objects.filter(qr_code__isnull=True).count(), 2
+        )
+
+    @override_settings(METRIQUES_JETON="jeton-test")
+    def test_exposition_avec_jeton(self):
+        """
+        Test que /metrics exige le jeton et expose les jauges d'état.
+        """
+        self.assertEqual(self.client.get(reverse("metriques")).status_code, 403)
+        response = self.client.get(
+            reverse("metriques"), HTTP_AUTHORIZATION="Bearer jeton-test"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"jo_paniers_tickets 1.0", response.content)
+        self.assertIn(b"# TYPE jo_paiements_total counter", response.content)
+
+    @override_settings(METRIQUES_JETON="jeton-test")
+    def test_collecte_en_une_requete(self):
+        """
+        Test que la collecte compte les paniers et les billets sans QR code,
+        ces derniers sur le seul critère indexé qr_code IS NULL.
+        """
+        Commande.objects.creer_depuis_panier(self.utilisateur, "cle-collecte")
+        with CaptureQueriesContext(connection) as requetes:
+            response = self.client.get(
+                reverse("metriques"), HTTP_AUTHORIZATION="Bearer jeton-test"
+            )
+        self.assertEqual(len(requetes), 2)
+        self.assertIn("generationticket", requetes[1]["sql"])
+        self.assertIn('"qr_code" IS NULL', requetes[1]["sql"])
+        self.assertNotIn("''", requetes[1]["sql"])
+        self.assertIn(b"jo_billets_sans_qr_code 2.0", response.content)
+
+
+class ProfilageTest(TestCase):
+    """
+    Test du profilage à la demande des requêtes du personnel.
+    """
+
+    def setUp(self):
+        """
+        Utilise un dossier de captures temporaire et crée un membre du personnel.
+        """
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        reglages = override_settings(PROFILAGE_DOSSIER=dossier.name)
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        self.agent = Utilisateur.objects.create_user(
+            email="agent@exemple.com",
+            password="Test@123",
+            nom="Agent",
+            prenom="Paul",
+            is_staff=True,
+        )
+        self.client.force_login(self.agent)
+
+    def test_capture_avec_jeton(self):
+        """
+        Test qu'une requête avec un jeton valide est profilée et enregistrée
+        avec ses requêtes SQL.
+        """
+        jeton = profilage.creer_jeton(self.agent)
+        response = self.client.get(reverse("ventes"), {"profiler": jeton})
+        self.assertEqual(response.status_code, 200)
+        nom = response["X-Profilage"]
+
+        capture = profilage.captures()[0]
+        self.assertEqual(capture["nom"], nom)
+        self.assertEqual(capture["vue"], "ventes")
+        self.assertTrue(capture["requetes_sql"])
+
+        sortie = StringIO()
+        call_command("profils", nom, "--top", "5", stdout=sortie)
+        self.assertIn("Requêtes SQL", sortie.getvalue())
+
+    def test_sans_jeton_ou_jeton_invalide(self):
+        """
+        Test qu'une requête sans jeton, ou avec un jeton falsifié ou d'un
+        autre utilisateur, n'est pas profilée.
+        """
+        self.assertNotIn("X-Profilage", self.client.get(reverse("ventes")))
+        response = self.client.get(reverse("ventes"), HTTP_X_PROFILAGE="1:faux:faux")
+        self.assertNotIn("X-Profilage", response)
+
+        visiteur = Utilisateur.objects.create_user(
+            email="visiteur@exemple.com",
+            password="Test@123",
+            nom="Martin",
+            prenom="Zoé",
+        )
+        jeton = profilage.creer_jeton(self.agent)
+        self.client.force_login(visiteur)
+        response = self.client.get(reverse("ventes"), {"profiler": jeton})
+        self.assertNotIn("X-Profilage", response)
+        self.assertEqual(profilage.captures(), [])
+
+    def test_commande_jeton_reservee_au_personnel(self):
+        """
+        Test que la commande ne crée de jeton que pour le personnel.
+        """
+        sortie = StringIO()
+        call_command("profils", "--jeton", "agent@exemple.com", stdout=sortie)
+        self.assertIn("?profiler=", sortie.getvalue())
+        with self.assertRaises(CommandError):
+            call_command("profils", "--jeton", "inconnu@exemple.com")
+
+
+class TesterChargeCommandTest(LiveServerTestCase):
+    """
+    Test de la commande de test de charge du parcours d'achat.
+    """
+
+    def setUp(self):
+        """
+        Héberge les QR codes localement et crée un sport et une offre.
+        """
+        dossier = tempfile.TemporaryDirectory()
+        self.addCleanup(dossier.cleanup)
+        reglages = override_settings(
+            QR_CODES_STOCKAGE="local", QR_CODES_DOSSIER=dossier.name
+        )
+        reglages.enable()
+        self.addCleanup(reglages.disable)
+        Sport.objects.create(nom="Judo", date_evenement="2024-07-27")
+        Offre.objects.create(type="Solo", prix=Decimal("50.00"))
+
+    def test_parcours_complet(self):
+        """
+        Test que chaque utilisateur virtuel achète et télécharge son billet.
+        """
+        sortie = StringIO()
+        call_command(
+            "tester_charge",
+            "--url",
+            self.live_server_url,
+            "--utilisateurs",
+            "2",
+            "--concurrence",
+            "1",
+            "--json",
+            stdout=sortie,
+        )
+        rapport = json.loads(sortie.getvalue())
+        self.assertEqual(rapport["parcours_reussis"], 2)
+        self.assertEqual(rapport["etapes"]["telecharger_billet"]["reussites"], 2)
+        self.assertTrue(
+            GenerationTicket.objects.filter(qr_code__startswith="file://").exists()
+        )
+
+
+class MesurerPrimitivesCommandTest(TestCase):
+    """
+    Test des micro-mesures des primitives et de leur comparaison à la référence.
+    """
+
+    def test_regressions_au_dela_du_seuil(self):
+        """
+        Test que seules les primitives ralenties au-delà du seuil sont signalées.
+        """
+        reference = {"qr_code": 0.010, "prix_panier": 0.001}
+        resultats = {"qr_code": 0.013, "prix_panier": 0.0011, "nouvelle": 1.0}
+        lentes = regressions(resultats, reference, seuil=0.2)
+        self.assertEqual([nom for nom, *_ in lentes], ["qr_code"])
+        self.assertAlmostEqual(lentes[0][3], 0.3)
+
+    def test_ventes_sur_volume_genere(self):
+        """
+        Test que la mesure de ventes_view porte sur le volume de billets demandé.
+        """
+        appel = preparer_ventes(100)
+        self.assertEqual(GenerationTicket.objects.count(), 100)
+        self.assertEqual(appel().status_code, 200)
+        self.assertGreater(mesurer(lambda: None, repetitions=1), 0)
+
+
+class GenererDonneesCommandTest(TestCase):
+    """
+    Test du générateur de données synthétiques.
+    """
+
+    def test_volumes_et_coherence(self):
+        """
+        Test que le générateur crée exactement les volumes demandés, avec des
+        commandes cohérentes avec leurs tickets et des paniers abandonnés.
+        """
+        comptes = GenerateurDonnees(graine=1, taille_lot=50).generer(
+            utilisateurs=20, billets=300, taux_abandon=0.5
+        )
+        self.assertEqual(Utilisateur.objects.count(), 20)
+        self.assertEqual(GenerationTicket.objects.count(), 300)
+        self.assertFalse(GenerationTicket.objects.exclude(qr_code=None).exists())
+        vendus = Ticket.objects.filter(est_achete=True)
+        self.assertEqual(sum(t.quantite for t in vendus), 300)
+        self.assertEqual(Paiement.objects.count(), vendus.count())
+        self.assertEqual(
+            Ticket.objects.filter(est_achete=False, commande=None).count(),
+            comptes["paniers_abandonnes"],
+        )
+        for commande in Commande.objects.prefetch_related("tickets"):
+            self.assertEqual(
+                commande.nombre_billets,
+                sum(t.quantite for t in commande.tickets.all()),
+            )
+        self.assertTrue(Utilisateur.objects.first().check_password("Synthetique@2024!"))
+
+    def test_deterministe_selon_la_graine(self):
+        """
+        Test que la même graine produit les mêmes ventes.
+        """
+
+        def generer(graine):
+            """
+            Génère un petit jeu de données et retourne ses ventes, puis vide la base.
+            """
+            GenerateurDonnees(graine=graine).generer(utilisateurs=5, billets=40)
+            ventes = list(
+                Ticket.objects.order_by("pk").values_list(
+                    "utilisateur_id", "sport__nom", "offre__type", "quantite"
+                )
+            )
+            cles = list(
+                GenerationTicket.objects.order_by("pk").values_list(
+                    "cle_securisee_2", flat=True
+                )
+            )
+            Utilisateur.objects.all().delete()
+            return ventes, cles
+
+        self.assertEqual(generer(7), generer(7))
+        self.assertNotEqual(generer(7)[1], generer(8)[1])
+
+    def test_commande(self):
+        """
+        Test que la commande affiche le nombre de lignes créées.
+        """
+        sortie = StringIO()
+        call_command(
+            "generer_donnees", "--utilisateurs", "3", "--billets", "10", stdout=sortie
+        )
+        self.assertEqual(GenerationTicket.objects.count(), 10)
+        self.assertIn("billets", sortie.getvalue())
@@ -1,8 +1,8 @@
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib.auth.views import LogoutView
-from django.urls import path
-from . import views
+from django.urls import include, path
+from . import api, views
 from .views import ConnexionView, telecharger_billet_view, ticket_delete_view
 
 urlpatterns = [
@@ -13,6 +13,7 @@ urlpatterns = [
     path("ticket/create/", views.ticket_create_view, name="ticket_create"),
     path("ticket/delete/<int:ticket_id>/", ticket_delete_view, name="ticket_delete"),
     path("tickets/", views.ticket_list_view, name="ticket_list"),
+    path("tickets/export/", views.ticket_export_view, name="ticket_export"),
     path(
         "ticket/<int:ticket_id>/update/", views.ticket_update_view, name="ticket_update"
     ),
@@ -21,6 +22,8 @@ urlpatterns = [
     ),
     path("sport/", views.sport_list_view, name="sports_list"),
     path("get-sport-date/<int:sport_id>/", views.get_sport_date, name="get_sport_date"),
+    path("catalogue.json", views.catalogue_json_view, name="catalogue_json"),
+    path("api/v1/", include(api)),
     path("panier/", views.panier_view, name="panier"),
     path("maj_quantite/", views.maj_quantite_view, name="maj_quantite"),
     path("paiement/", views.paiement_view, name="paiement"),
@@ -32,4 +35,12 @@ urlpatterns = [
         name="telecharger_billet",
     ),
     path("ventes/", views.ventes_view, name="ventes"),
+    path("scan/", views.scan_view, name="scan"),
+    path("instrumentation/", views.instrumentation_view, name="instrumentation"),
+    path("metrics", views.metriques_view, name="metriques"),
+    path(
+        "file-attente/statut/",
+        views.file_attente_statut_view,
+        name="file_attente_statut",
+    ),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -1,30 +1,48 @@
 """
 Ce module contient les vues de l'application.
 Il contient les vues home, inscription, ticket_create_view,
-ticket_list_view, ticket_update_view, ticket_delete_view,
+ticket_list_view, ticket_export_view, ticket_update_view, ticket_delete_view,
 get_sport_date, sport_list_view, panier_view, ConnexionView,
 DeconnexionView, paiement_view, maj_quantite_view, confirmation_view,
-mes_commandes_view, telecharger_billet_view, ventes_view.
+mes_commandes_view, telecharger_billet_view, ventes_view,
+file_attente_statut_view, catalogue_json_view, scan_view,
+instrumentation_view, metriques_view.
+Les vues JSON légères (get_sport_date, maj_quantite_view, scan_view) sont
+asynchrones : servies en ASGI, elles n'occupent pas de thread pendant leurs
+entrées-sorties.
 """
 
-import locale
+import csv
+import logging
+import secrets
 
+from django.conf import settings
 from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView, LogoutView
+from django.db import IntegrityError
 from django.db.models import Count, F, Sum
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse_lazy
-from weasyprint import HTML
-
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import etag, require_POST
+
+from . import file_attente, instrumentation, metriques
+from .catalogue import aobtenir_catalogue, obtenir_catalogue, version_catalogue
+from .formatage import formater_euros, formater_prix
 from .forms import ConnexionForm, PaiementForm, TicketForm, UtilisateurForm
-from .models import GenerationTicket, Sport, Ticket
+from .models import Commande, GenerationTicket, PanierInvalide, Ticket
+from .passerelle import STATUT_EN_ATTENTE, PasserelleIndisponible, obtenir_passerelle
+from .pdf import rendre_pdf
+from .qr_codes import completer_qr_code
+from .routeur import lectures_sur_replique
 
-try:
-    locale.setlocale(locale.LC_ALL, "fr_FR.UTF-8")
-except locale.Error:
-    locale.setlocale(locale.LC_ALL, "C")
+logger = logging.getLogger(__name__)
 
 
 def home(request):
@@ -55,11 +73,11 @@ def ticket_create_view(request):
     """
     Crée la vue pour la création d'un ticket.
     """
-    sport_nom = request.GET.get("sport", "")
-    sport = Sport.objects.filter(nom=sport_nom).first()
+    catalogue = obtenir_catalogue()
+    sport = catalogue.sports_par_nom.get(request.GET.get("sport", ""))
 
     if sport:
-        date_evenement = sport.date_evenement.strftime("%d %B %Y")
+        date_evenement = catalogue.dates_formatees[sport.id]
     else:
         date_evenement = None
 
@@ -75,18 +93,134 @@ def ticket_create_view(request):
         form = TicketForm(initial=initial_data)
 
     return render(
-        request, "ticket.html", {"form": form, "date_evenement": date_evenement}
+        request,
+        "ticket.html",
+        {
+            "form": form,
+            "date_evenement": date_evenement,
+            "dates_sports": catalogue.dates_formatees,
+        },
     )
 
 
+class Echo:
+    """
+    Pseudo-fichier pour csv.writer : writerow retourne la ligne écrite.
+    """
+
+    def write(self, valeur):
+        """
+        Retourne la valeur au lieu de l'écrire.
+        """
+        return valeur
+
+
+def tickets_visibles(request):
+    """
+    Retourne les tickets visibles par l'utilisateur : les siens, ou tous pour
+    le personnel.
+    """
+    tickets = Ticket.objects.all()
+    if not request.user.is_staff:
+        tickets = tickets.filter(utilisateur=request.user)
+    return tickets
+
+
+def decrire_ticket(ticket):
+    """
+    Retourne la description JSON d'un ticket.
+    """
+    return {
+        "id": ticket.id,
+        "sport": ticket.sport.nom,
+        "date_evenement": ticket.sport.date_evenement.isoformat(),
+        "offre": ticket.offre.type,
+        "quantite": ticket.quantite,
+        "prix_total": str(ticket.get_prix_total()),
+        "est_achete": ticket.est_achete,
+        "date_creation": ticket.date_creation.isoformat(),
+    }
+
+
 @login_required(login_url="connexion")
+@lectures_sur_replique
 def ticket_list_view(request):
     """
-    Crée la vue pour la liste des tickets.
+    Crée la vue pour la liste des tickets, paginée par curseur : ?apres=<id>
+    donne les tickets d'identifiant inférieur, du plus récent au plus ancien.
+    Répond en JSON avec ?format=json.
     """
-    tickets = Ticket.objects.all()
-    tickets_list = ", ".join([str(ticket) for ticket in tickets])
-    return HttpResponse(f"Liste des tickets: {tickets_list}")
+    try:
+        apres = int(request.GET.get("apres", 0))
+    except ValueError:
+        apres = 0
+    tickets = tickets_visibles(request).select_related("sport", "offre")
+    if apres > 0:
+        tickets = tickets.filter(id__lt=apres)
+    page = list(tickets.order_by("-id")[: settings.TICKETS_PAR_PAGE + 1])
+    suivant = None
+    if len(page) > settings.TICKETS_PAR_PAGE:
+        page = page[: settings.TICKETS_PAR_PAGE]
+        suivant = page[-1].id
+
+    if request.GET.get("format") == "json":
+        return JsonResponse(
+            {"tickets": [decrire_ticket(t) for t in page], "suivant": suivant}
+        )
+    return render(request, "tickets.html", {"tickets": page, "suivant": suivant})
+
+
+@login_required(login_url="connexion")
+def ticket_export_view(request):
+    """
+    Exporte les tickets visibles au format CSV, en flux : les tickets sont lus
+    par lots de TICKETS_EXPORT_LOT, la mémoire utilisée ne dépend pas du volume.
+    """
+    tickets = tickets_visibles(request).values_list(
+        "id",
+        "utilisateur__email",
+        "sport__nom",
+        "sport__date_evenement",
+        "offre__type",
+        "offre__prix",
+        "quantite",
+        "est_achete",
+        "date_creation",
+    )
+
+    def lignes():
+        """
+        Produit l'en-tête puis les tickets, lot par lot, par identifiant croissant.
+        """
+        ecrivain = csv.writer(Echo(), delimiter=";")
+        yield ecrivain.writerow(
+            [
+                "id",
+                "email",
+                "sport",
+                "date_evenement",
+                "offre",
+                "prix",
+                "quantite",
+                "est_achete",
+                "date_creation",
+            ]
+        )
+        dernier = 0
+        while True:
+            lot = list(
+                tickets.filter(id__gt=dernier).order_by("id")[
+                    : settings.TICKETS_EXPORT_LOT
+                ]
+            )
+            if not lot:
+                return
+            yield "".join(ecrivain.writerow(ligne) for ligne in lot)
+            dernier = lot[-1][0]
+
+    response = StreamingHttpResponse(lignes(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = 'attachment; filename="tickets.csv"'
+    return response
 
 
 @login_required(login_url="connexion")
@@ -102,7 +236,16 @@ def ticket_update_view(request, ticket_id):
             return redirect("ticket_list")
     else:
         form = TicketForm(instance=ticket)
-    return render(request, "ticket.html", {"form": form})
+    catalogue = obtenir_catalogue()
+    return render(
+        request,
+        "ticket.html",
+        {
+            "form": form,
+            "date_evenement": catalogue.dates_formatees.get(ticket.sport_id),
+            "dates_sports": catalogue.dates_formatees,
+        },
+    )
 
 
 @login_required(login_url="connexion")
@@ -117,25 +260,66 @@ def ticket_delete_view(request, ticket_id):
     return render(request, "ticket_confirm_delete.html", {"ticket": ticket})
 
 
-def get_sport_date(request, sport_id):
+def etag_catalogue(request, *args, **kwargs):
     """
-    Récupère la date d'un événement
+    Retourne l'ETag des réponses du catalogue : sa version partagée.
     """
-    try:
-        sport = Sport.objects.get(id=sport_id)
-        formatted_date = sport.date_evenement.strftime("%d %B %Y")
-        print(f"Date formatée : {formatted_date}")
-        return JsonResponse({"date_evenement": formatted_date})
-    except Sport.DoesNotExist:
-        print(f"Sport avec ID {sport_id} non trouvé.")
-        return JsonResponse({"error": "Sport non trouvé"}, status=404)
+    return version_catalogue()
+
+
+@cache_control(public=True, max_age=settings.CATALOGUE_MAX_AGE)
+async def get_sport_date(request, sport_id):
+    """
+    Récupère la date d'un événement.
+    L'ETag est la version de l'instantané chargé sans bloquer la boucle
+    d'évènements (le décorateur etag l'obtiendrait de façon synchrone).
+    """
+    catalogue = await aobtenir_catalogue()
+    etag_version = quote_etag(catalogue.version)
+    response = get_conditional_response(request, etag=etag_version)
+    if response is None:
+        formatted_date = catalogue.dates_formatees.get(sport_id)
+        if formatted_date is None:
+            response = JsonResponse({"error": "Sport non trouvé"}, status=404)
+        else:
+            response = JsonResponse({"date_evenement": formatted_date})
+    response["ETag"] = etag_version
+    return response
+
+
+@cache_control(public=True, max_age=settings.CATALOGUE_MAX_AGE)
+@etag(etag_catalogue)
+def catalogue_json_view(request):
+    """
+    Retourne tout le catalogue (sports avec leurs dates formatées, offres) en JSON.
+    Une requête conditionnelle sur une version inchangée reçoit un 304.
+    """
+    catalogue = obtenir_catalogue()
+    return JsonResponse(
+        {
+            "version": catalogue.version,
+            "sports": [
+                {
+                    "id": sport.id,
+                    "nom": sport.nom,
+                    "date_evenement": sport.date_evenement.isoformat(),
+                    "date_formatee": catalogue.dates_formatees[sport.id],
+                }
+                for sport in catalogue.sports
+            ],
+            "offres": [
+                {"id": offre.id, "type": offre.type, "prix": str(offre.prix)}
+                for offre in catalogue.offres
+            ],
+        }
+    )
 
 
 def sport_list_view(request):
     """
     Crée la vue pour la liste des sports.
     """
-    sports = Sport.objects.all()
+    sports = obtenir_catalogue().sports
     return render(request, "sport.html", {"sports": sports})
 
 
@@ -222,59 +406,163 @@ class DeconnexionView(LogoutView):
 def paiement_view(request):
     """
     Crée la vue pour le paiement.
+    Chaque formulaire porte une clé d'idempotence : une soumission répétée
+    (double clic, nouvel envoi du navigateur) renvoie la commande déjà créée.
+    Si la passerelle ne répond pas ou si le paiement est encore en attente,
+    le formulaire est réaffiché avec la même clé : la passerelle peut avoir
+    débité la carte, et une nouvelle soumission la réinterroge sur ce même
+    paiement au lieu d'en créer un second.
     """
     utilisateur = request.user
-    tickets = Ticket.objects.filter(utilisateur=utilisateur, est_achete=False)
-    total = sum(ticket.get_prix_total() for ticket in tickets)
 
     if request.method == "POST":
-        card_number = request.POST.get("cardNumber")
-        expiry_date = request.POST.get("expiryDate")
-        cvv = request.POST.get("cvv")
-
-        if card_number and expiry_date and cvv:
-            for ticket in tickets:
-                for _ in range(ticket.quantite):
-                    GenerationTicket.objects.create(ticket=ticket)
-                ticket.est_achete = True
-                ticket.save()
-
-            messages.success(request, "Paiement réussi et billets générés !")
+        cle = request.POST.get("cle_idempotence") or request.headers.get(
+            "Idempotency-Key"
+        )
+        if cle:
+            commandes = Commande.objects.filter(utilisateur=utilisateur)
+            commande = commandes.filter(cle_idempotence=cle).first()
+            if commande:
+                return reponse_commande(commande)
+
+    tickets = Ticket.objects.filter(
+        utilisateur=utilisateur, est_achete=False
+    ).select_related("offre")
+    total = sum(ticket.get_prix_total() for ticket in tickets)
+    cle_formulaire = secrets.token_hex(32)
 
-            return redirect("confirmation")
+    if request.method == "POST":
+        carte = {
+            "numero": request.POST.get("cardNumber"),
+            "expiration": request.POST.get("expiryDate"),
+            "cvv": request.POST.get("cvv"),
+        }
+
+        if not tickets:
+            messages.error(request, "Votre panier est vide.")
+        elif all(carte.values()):
+            cle = cle or secrets.token_hex(32)
+            passerelle = obtenir_passerelle()
+            try:
+                resultat = passerelle.autoriser(total, carte, cle)
+            except PasserelleIndisponible:
+                resultat = None
+                cle_formulaire = cle
+                metriques.PAIEMENTS.labels(resultat="indisponible").inc()
+                messages.error(
+                    request,
+                    "Le service de paiement est momentanément indisponible, "
+                    "veuillez réessayer.",
+                )
+
+            if resultat is not None:
+                metriques.PAIEMENTS.labels(resultat=resultat.statut).inc()
+
+            if resultat is not None and resultat.statut == STATUT_EN_ATTENTE:
+                cle_formulaire = cle
+                messages.warning(
+                    request,
+                    "Le paiement est en cours de validation. Réessayez dans "
+                    "quelques instants : vous ne serez pas débité deux fois.",
+                )
+            elif resultat is not None and resultat.accepte:
+                try:
+                    commande = Commande.objects.creer_depuis_panier(
+                        utilisateur,
+                        cle,
+                        reference_paiement=resultat.reference,
+                        montant_autorise=total,
+                    )
+                except IntegrityError:
+                    commande = get_object_or_404(
+                        Commande, cle_idempotence=cle, utilisateur=utilisateur
+                    )
+                except PanierInvalide as e:
+                    annuler_paiement(request, passerelle, resultat.reference, e)
+                    return redirect("paiement")
+                else:
+                    messages.success(request, "Paiement réussi et billets générés !")
+
+                return reponse_commande(commande)
+            elif resultat is not None:
+                messages.error(request, "Le paiement a été refusé.")
         else:
             messages.error(
                 request, "Veuillez remplir tous les champs pour le paiement."
             )
 
-    return render(request, "paiement.html", {"total": total})
+    return render(
+        request,
+        "paiement.html",
+        {"total": total, "cle_idempotence": cle_formulaire},
+    )
+
+
+def annuler_paiement(request, passerelle, reference, motif):
+    """
+    Annule l'autorisation d'un paiement qui ne correspond plus au panier.
+    Si la passerelle ne répond pas, la référence est journalisée pour être
+    annulée lors du rapprochement.
+    """
+    try:
+        passerelle.annuler(reference)
+    except PasserelleIndisponible:
+        metriques.PAIEMENTS.labels(resultat="annulation_en_echec").inc()
+        logger.error(f"Paiement {reference} à annuler au rapprochement : {motif}")
+        messages.error(
+            request,
+            "Votre panier a été modifié pendant le paiement : aucune commande "
+            "n'a été créée et le paiement sera annulé. Référence du paiement : "
+            f"{reference}.",
+        )
+    else:
+        metriques.PAIEMENTS.labels(resultat="annule").inc()
+        logger.warning(f"Paiement {reference} annulé : {motif}")
+        messages.error(
+            request,
+            "Votre panier a été modifié pendant le paiement : le paiement a été "
+            "annulé et aucune commande n'a été créée. Vérifiez votre panier "
+            "avant de payer à nouveau.",
+        )
+
+
+def reponse_commande(commande):
+    """
+    Redirige vers la confirmation en renvoyant la clé d'idempotence de la commande.
+    """
+    response = redirect("confirmation")
+    response["Idempotency-Key"] = commande.cle_idempotence
+    return response
 
 
 @login_required(login_url="connexion")
-def maj_quantite_view(request):
+async def maj_quantite_view(request):
     """
     Met à jour la quantité d'un ticket dans le panier.
     """
     if request.method == "POST":
+        utilisateur = await request.auser()
         ticket_id = request.POST.get("ticket_id")
         quantite = request.POST.get("quantite")
 
         try:
-            ticket = Ticket.objects.get(
-                id=ticket_id, utilisateur=request.user, est_achete=False
+            ticket = await Ticket.objects.aget(
+                id=ticket_id, utilisateur=utilisateur, est_achete=False
             )
             if quantite.isdigit() and int(quantite) > 0:
                 ticket.quantite = int(quantite)
-                ticket.save()
+                await ticket.asave(update_fields=["quantite"])
             else:
                 return JsonResponse({"success": False, "message": "Quantité invalide."})
         except Ticket.DoesNotExist:
             return JsonResponse({"success": False, "message": "Ticket non trouvé."})
 
-        tickets = Ticket.objects.filter(utilisateur=request.user, est_achete=False)
-        total = sum(ticket.get_prix_total() for ticket in tickets)
-        
-        formatted_total = f"{total:,.2f}€".replace(",", " ").replace(".", ",")
+        panier = await Ticket.objects.filter(
+            utilisateur=utilisateur, est_achete=False
+        ).aaggregate(total=Sum(F("quantite") * F("offre__prix")))
+        total = panier["total"] or 0
+
+        formatted_total = formater_euros(total)
 
         return JsonResponse({"success": True, "total": formatted_total})
 
@@ -295,6 +583,7 @@ def confirmation_view(request):
 
 
 @login_required(login_url="connexion")
+@lectures_sur_replique
 def mes_commandes_view(request):
     """
     Crée la vue pour les commandes de l'utilisateur.
@@ -316,6 +605,8 @@ def telecharger_billet_view(request, billet_id):
     billet = get_object_or_404(
         GenerationTicket, id=billet_id, ticket__utilisateur=request.user
     )
+    if not billet.qr_code:
+        completer_qr_code(billet)
     nom_fichier = f"Billet_{
         billet.ticket.sport.nom}_{
         billet.ticket.utilisateur.prenom}_{
@@ -323,25 +614,24 @@ def telecharger_billet_view(request, billet_id):
     qr_code_url = billet.qr_code
     offre_formate = f"{
         billet.ticket.offre.type} - {
-        locale.format_string(
-            '%.2f',
-            billet.ticket.offre.prix,
-            grouping=True)} €"
+        formater_prix(
+            billet.ticket.offre.prix)} €"
     html_string = render(
         request,
         "billet_pdf.html",
         {"billet": billet, "qr_code_url": qr_code_url, "offre_formate": offre_formate},
     ).content.decode("utf-8")
-    html = HTML(string=html_string)
     response = HttpResponse(content_type="application/pdf")
     response["Content-Disposition"] = f'attachment; filename="{nom_fichier}"'
-    html.write_pdf(response)
+    with metriques.RENDU_PDF.time():
+        rendre_pdf(html_string, response)
 
     return response
 
 
 # Vue ventes pour admin
 @login_required(login_url="connexion")
+@lectures_sur_replique
 def ventes_view(request):
     """
     Crée la vue pour les ventes.
@@ -385,3 +675,78 @@ def ventes_view(request):
             "total_prix_global": total_prix_global,
         },
     )
+
+
+def file_attente_statut_view(request):
+    """
+    Indique au visiteur en attente s'il est admis, ou sa position dans la file.
+    """
+    if file_attente.admission_valide(request):
+        return JsonResponse({"admis": True, "position": 0})
+
+    numero, position = file_attente.position(request)
+    response = JsonResponse({"admis": position == 0, "position": position})
+    return file_attente.poser_cookies(response, request, numero, admis=position == 0)
+
+
+@staff_member_required(login_url="connexion")
+@require_POST
+async def scan_view(request):
+    """
+    Vérifie à l'entrée un billet à partir du contenu de son QR code
+    (clé de l'acheteur suivie de la clé du billet).
+    """
+    contenu = request.POST.get("qr_code", "")
+    cle_acheteur, cle_billet = contenu[:64], contenu[64:]
+    billet = None
+    if len(contenu) == 128:
+        billet = await (
+            GenerationTicket.objects.select_related(
+                "ticket__utilisateur", "ticket__sport", "ticket__offre"
+            )
+            .filter(cle_securisee_2=cle_billet)
+            .afirst()
+        )
+    if billet is None or not constant_time_compare(
+        billet.ticket.utilisateur.cle_securisee_1, cle_acheteur
+    ):
+        return JsonResponse({"valide": False}, status=404)
+
+    ticket = billet.ticket
+    return JsonResponse(
+        {
+            "valide": True,
+            "billet": billet.id,
+            "acheteur": str(ticket.utilisateur),
+            "sport": ticket.sport.nom,
+            "date_evenement": ticket.sport.date_evenement.isoformat(),
+            "offre": ticket.offre.type,
+            "quantite": ticket.quantite,
+        }
+    )
+
+
+@staff_member_required(login_url="connexion")
+def instrumentation_view(request):
+    """
+    Retourne les histogrammes de latence par vue du worker qui répond.
+    """
+    return JsonResponse(instrumentation.instantane())
+
+
+def metriques_view(request):
+    """
+    Expose les métriques au format Prometheus. Avec METRIQUES_JETON, le
+    collecteur s'authentifie par « Authorization: Bearer <jeton> » ; sans
+    jeton, seul le personnel y a accès.
+    """
+    jeton = settings.METRIQUES_JETON
+    if jeton:
+        autorise = constant_time_compare(
+            request.headers.get("Authorization", ""), f"Bearer {jeton}"
+        )
+    else:
+        autorise = request.user.is_staff
+    if not autorise:
+        return HttpResponse(status=403)
+    return HttpResponse(metriques.exposer(), content_type=metriques.FORMAT)